@@ -4,11 +4,13 @@ from dashboard import DashboardScreen
 from members import MemberScreen
 from books import BookScreen  # ✅ Import BooksScreen
 from lendings import LendingsScreen
+from api_client import api
 
 class Sidebar:
     def __init__(self, root, content_frame):
         self.root = root
         self.content_frame = content_frame
+        self.current_screen = None
 
         # Create the sidebar frame
         self.sidebar_frame = tk.Frame(root, bg="#333333", width=200)
@@ -36,12 +38,17 @@ class Sidebar:
 
     def switch_to(self, screen_class):
         # Clear current content and show the selected screen
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-        screen_class(self.content_frame)
+        self.clear_content()
+        self.current_screen = screen_class(self.content_frame)
 
     def show_dashboard(self):
         # Clear content and show the Dashboard
+        self.clear_content()
+        self.current_screen = DashboardScreen(self.content_frame)  # ✅ Show Dashboard properly
+
+    def clear_content(self):
+        # Drop responses still on their way to the screen being closed
+        if self.current_screen is not None:
+            api.cancel(self.current_screen)
         for widget in self.content_frame.winfo_children():
             widget.destroy()
-        DashboardScreen(self.content_frame)  # ✅ Show Dashboard properly
@@ -0,0 +1,255 @@
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "http://127.0.0.1:5000/api"
+MAX_WORKERS = 4  # Concurrent requests (and kept-alive connections)
+POLL_INTERVAL_MS = 20  # How often the Tk thread picks up finished requests
+TIMEOUT = 30  # Seconds before a request is abandoned
+MAX_CACHED_RESPONSES = 64  # GET responses kept for conditional requests
+COLUMNS_FORMAT = "columns"  # ?format= value asking list endpoints for {"columns", "rows"}
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class Row(tuple):
+    """A row of a columnar response: a tuple that can also be indexed by column name."""
+
+    __slots__ = ()
+    positions = {}  # Column name -> index, set on the subclass made for each response
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self.positions[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.positions else default
+
+    def keys(self):
+        return self.positions.keys()
+
+
+def _is_columnar(value):
+    return isinstance(value, dict) and value.keys() == {"columns", "rows"}
+
+
+def _decode_rows(table):
+    positions = {name: index for index, name in enumerate(table["columns"])}
+    row_type = type("Row", (Row,), {"__slots__": (), "positions": positions})
+    return [row_type(values) for values in table["rows"]]
+
+
+def decode_columns(body):
+    """
+    Turn the columnar format ({"columns": [...], "rows": [[...], ...]}) back
+    into a list of Rows, for the whole body or for values of a top-level
+    object such as the "data" of a page. Anything else is returned as is.
+    """
+    if _is_columnar(body):
+        return _decode_rows(body)
+    if isinstance(body, dict):
+        return {key: _decode_rows(value) if _is_columnar(value) else value for key, value in body.items()}
+    return body
+
+
+class ColumnarResponse:
+    """A requests.Response whose json() is the decoded columnar body."""
+
+    def __init__(self, response):
+        self.response = response
+        self.data = decode_columns(response.json())
+
+    def json(self, **kwargs):
+        return self.data
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+
+class Request:
+    """Handle for one caller's interest in a request. cancel() drops its callbacks."""
+
+    def __init__(self, call, on_success, on_error, owner):
+        self.call = call
+        self.on_success = on_success
+        self.on_error = on_error
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        self.call.client.cancel_request(self)
+
+
+class _Call:
+    """One HTTP request in flight, possibly shared by several identical GETs."""
+
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+        self.subscribers = []
+        self.future = None
+
+
+class ApiClient:
+    """
+    Non-blocking HTTP client for the Tkinter screens.
+
+    Requests run on a small thread pool over one keep-alive requests.Session.
+    Results are handed back to the Tk main thread through root.after, so
+    callbacks may touch widgets. Identical GETs issued while one is already in
+    flight share that request, and everything a screen started can be
+    cancelled when the user leaves it.
+
+    The last response to each GET that carried an ETag is kept; repeating the
+    GET sends If-None-Match, and a 304 is answered with the kept response, so
+    refreshing unchanged data transfers no body.
+
+    Bodies arrive compressed (requests sends Accept-Encoding and decodes). A
+    GET with columns=True asks a list endpoint for the columnar format, which
+    does not repeat key names in every row; its json() gives Rows that read
+    like both the tuples and the objects the endpoint would otherwise send.
+    """
+
+    def __init__(self, base_url=BASE_URL, max_workers=MAX_WORKERS):
+        self.base_url = base_url
+        self.root = None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.in_flight = {}  # Coalescing key -> _Call, for GETs
+        self.calls = set()  # Every _Call not yet delivered
+        self.responses = OrderedDict()  # Coalescing key -> last 200 response with an ETag
+
+    def attach(self, root):
+        """Start delivering results on the Tk main loop of `root`"""
+        self.root = root
+        self.root.after(POLL_INTERVAL_MS, self._deliver)
+
+    def get(self, path, on_success, on_error=None, owner=None, params=None, columns=False):
+        if columns:
+            params = dict(params or {}, format=COLUMNS_FORMAT)
+        return self.request("GET", path, on_success, on_error, owner, params=params)
+
+    def post(self, path, on_success, on_error=None, owner=None, json=None):
+        return self.request("POST", path, on_success, on_error, owner, json=json)
+
+    def put(self, path, on_success, on_error=None, owner=None, json=None):
+        return self.request("PUT", path, on_success, on_error, owner, json=json)
+
+    def delete(self, path, on_success, on_error=None, owner=None):
+        return self.request("DELETE", path, on_success, on_error, owner)
+
+    def request(self, method, path, on_success, on_error=None, owner=None, params=None, json=None):
+        """
+        Send a request in the background.
+
+        :param on_success: Called with the requests.Response (any status code).
+        :param on_error: Called with the RequestException if the server could not be reached.
+        :param owner: Object (usually the screen) the request belongs to, for cancel(owner).
+        :return: Request handle.
+        """
+        if self.root is None:
+            raise RuntimeError("ApiClient.attach(root) must be called before sending requests")
+
+        url = f"{self.base_url}{path}"
+        key = None
+        if method == "GET":
+            key = (url, tuple(sorted((params or {}).items())))
+
+        with self.lock:
+            call = self.in_flight.get(key) if key else None
+            if call is None:
+                call = _Call(self, key)
+                if key:
+                    self.in_flight[key] = call
+                self.calls.add(call)
+                call.future = self.executor.submit(self._send, call, method, url, params, json)
+            handle = Request(call, on_success, on_error, owner)
+            call.subscribers.append(handle)
+        return handle
+
+    def _send(self, call, method, url, params, json):
+        """Runs on a worker thread"""
+        try:
+            with self.lock:
+                cached = self.responses.get(call.key) if call.key else None
+            headers = {"If-None-Match": cached.headers["ETag"]} if cached is not None else None
+
+            response = self.session.request(method, url, params=params, json=json, headers=headers, timeout=TIMEOUT)
+
+            if response.status_code == 304 and cached is not None:
+                response = cached  # Unchanged since last time
+            elif response.status_code == 200 and (params or {}).get("format") == COLUMNS_FORMAT:
+                response = ColumnarResponse(response)  # Decoded here, off the Tk thread
+
+            if response is not cached and call.key and response.status_code == 200 and "ETag" in response.headers:
+                self._remember(call.key, response)
+            self.results.put((call, response, None))
+        except requests.exceptions.RequestException as e:
+            self.results.put((call, None, e))
+
+    def _remember(self, key, response):
+        with self.lock:
+            self.responses[key] = response
+            self.responses.move_to_end(key)
+            while len(self.responses) > MAX_CACHED_RESPONSES:
+                self.responses.popitem(last=False)
+
+    def _deliver(self):
+        """Runs on the Tk main thread: hand finished responses to their callbacks"""
+        try:
+            while True:
+                call, response, error = self.results.get_nowait()
+                with self.lock:
+                    self._forget(call)
+                    subscribers = [handle for handle in call.subscribers if not handle.cancelled]
+                for handle in subscribers:
+                    try:
+                        if error is None:
+                            handle.on_success(response)
+                        elif handle.on_error is not None:
+                            handle.on_error(error)
+                        else:
+                            logger.error(f"Request to {call.key or 'server'} failed: {error}")
+                    except Exception:
+                        logger.exception("Error in API callback")
+        except queue.Empty:
+            pass
+        self.root.after(POLL_INTERVAL_MS, self._deliver)
+
+    def cancel_request(self, handle):
+        with self.lock:
+            handle.cancelled = True
+            call = handle.call
+            if all(h.cancelled for h in call.subscribers):
+                # Nobody is waiting any more: skip it if it has not started
+                if call.future.cancel():
+                    self._forget(call)
+
+    def cancel(self, owner):
+        """Drop every pending request started by `owner`"""
+        with self.lock:
+            handles = [handle for call in self.calls for handle in call.subscribers
+                       if handle.owner is owner and not handle.cancelled]
+        for handle in handles:
+            self.cancel_request(handle)
+
+    def _forget(self, call):
+        """Stop tracking a call. Caller holds the lock."""
+        self.calls.discard(call)
+        if call.key and self.in_flight.get(call.key) is call:
+            del self.in_flight[call.key]
+
+
+api = ApiClient()
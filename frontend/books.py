@@ -1,6 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from api_client import api
+from search_helpers import DebouncedSearch
+from virtual_list import VirtualList
+
+PAGE_SIZE = 100  # Books fetched per request
+SEARCH_LIMIT = 500  # Most search results shown at once
+SCROLL_PREFETCH_THRESHOLD = 0.9  # Fetch the next page once this fraction of the list is scrolled
 
 class BookScreen:
     def __init__(self, parent):
@@ -21,13 +27,21 @@ class BookScreen:
         tk.Label(search_frame, text="Search: ").pack(side=tk.LEFT, padx=5)
         self.search_entry = tk.Entry(search_frame, width=30)
         self.search_entry.pack(side=tk.LEFT, padx=5)
-        tk.Button(search_frame, text="Search", command=self.search_books).pack(side=tk.LEFT, padx=5)
+        tk.Button(search_frame, text="Search", command=lambda: self.search.trigger()).pack(side=tk.LEFT, padx=5)
+
+        # Book List; scrolling near the bottom of the list fetches the next page
+        self.table = VirtualList(self.frame, ("ID", "Title", "Author", "ISBN", "Availability"),
+                                 on_scroll=self.on_tree_scroll)
+        self.table.pack(fill=tk.BOTH, expand=True, pady=10)
+
+        # Pagination state
+        self.next_cursor = None
+        self.has_more = False
+        self.loading = False
+        self.listing_request = None
 
-        # Book List (Treeview)
-        self.tree = ttk.Treeview(self.frame, columns=("ID", "Title", "Author", "ISBN", "Availability"), show="headings")
-        for col in ("ID", "Title", "Author", "ISBN", "Availability"):
-            self.tree.heading(col, text=col)
-        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        # Searches run on the server as the user types
+        self.search = DebouncedSearch(self.search_entry, self.search_books)
 
         # Buttons for Actions
         button_frame = tk.Frame(self.frame)
@@ -43,34 +57,88 @@ class BookScreen:
         self.load_books()
 
     def load_books(self):
-        """Fetch books from the Flask backend and load them into the Treeview"""
-        try:
-            response = requests.get("http://127.0.0.1:5000/api/books/all")
-            if response.status_code == 200:
-                books = response.json()
-                self.tree.delete(*self.tree.get_children())  # Clear existing data
-                for book in books:
-                    self.tree.insert("", tk.END, values=(
-                        book['id'],
-                        book['title'],
-                        book['author'],
-                        book['isbn'],
-                        "Available" if book['copies'] > 0 else "Borrowed"
-                    ))
-            else:
-                messagebox.showerror("Error", "Failed to fetch books.")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Failed to connect to the server: {e}")
-
-    def search_books(self):
-        """Filter books based on search criteria"""
-        search_term = self.search_entry.get().lower()
-        for row in self.tree.get_children():
-            values = self.tree.item(row, "values")
-            if any(search_term in str(value).lower() for value in values):
-                self.tree.reattach(row, "", tk.END)  # Show row if it matches search
-            else:
-                self.tree.detach(row)  # Hide row if it doesn't match
+        """Reload the Treeview starting from the first page of books"""
+        self.cancel_listing()
+        self.table.clear()  # Clear existing data
+        self.next_cursor = None
+        self.has_more = True
+        self.load_next_page()
+
+    def cancel_listing(self):
+        """Abandon any page or search request still in progress"""
+        if self.listing_request is not None:
+            self.listing_request.cancel()
+            self.listing_request = None
+        self.loading = False
+
+    def load_next_page(self):
+        """Fetch the next page of books from the Flask backend and append it to the Treeview"""
+        if self.loading or not self.has_more:
+            return
+
+        params = {"limit": PAGE_SIZE}
+        if self.next_cursor is not None:
+            params["after"] = self.next_cursor
+
+        self.loading = True
+        self.listing_request = api.get("/books/all", self.on_page_loaded, self.on_listing_error,
+                                       owner=self, params=params, columns=True)
+
+    def on_page_loaded(self, response):
+        self.loading = False
+        self.listing_request = None
+        if response.status_code == 200:
+            page = response.json()
+            self.table.append_rows((
+                book['id'],
+                book['title'],
+                book['author'],
+                book['isbn'],
+                "Available" if book['copies'] > 0 else "Borrowed"
+            ) for book in page["data"])
+            self.next_cursor = page["next_cursor"]
+            self.has_more = self.next_cursor is not None
+        else:
+            self.has_more = False
+            messagebox.showerror("Error", "Failed to fetch books.")
+
+    def on_listing_error(self, error):
+        self.loading = False
+        self.listing_request = None
+        self.has_more = False
+        self.show_connection_error(error)
+
+    def show_connection_error(self, error):
+        messagebox.showerror("Error", f"Failed to connect to the server: {error}")
+
+    def on_tree_scroll(self, first, last):
+        """Fetch more books when the end of the list comes into view"""
+        if float(last) >= SCROLL_PREFETCH_THRESHOLD and self.has_more and not self.loading:
+            self.frame.after_idle(self.load_next_page)
+
+    def search_books(self, search_term):
+        """Show the books matching the search term, searched on the server"""
+        if not search_term:
+            self.load_books()  # Back to the paged catalog
+            return
+
+        self.cancel_listing()  # Results of an older search must not overwrite this one
+        self.has_more = False  # Search results are not paged on scroll
+        self.listing_request = api.get("/books/search", self.on_search_results, self.on_listing_error,
+                                       owner=self, params={"q": search_term, "limit": SEARCH_LIMIT}, columns=True)
+
+    def on_search_results(self, response):
+        self.listing_request = None
+        if response.status_code == 200:
+            self.table.set_rows((
+                book['id'],
+                book['title'],
+                book['author'],
+                book['isbn'],
+                book['availability']
+            ) for book in response.json())
+        else:
+            messagebox.showerror("Error", "Failed to search books.")
 
     def add_book(self):
         """Open a form to add a new book"""
@@ -78,34 +146,32 @@ class BookScreen:
 
     def update_book(self):
         """Update selected book"""
-        selected = self.tree.selection()
-        if not selected:
+        book_values = self.table.selected()
+        if not book_values:
             messagebox.showwarning("No Selection", "Please select a book to update.")
             return
 
-        book_values = self.tree.item(selected, "values")
         self.book_form("Update Book", self.save_changes, book_values)
 
     def delete_book(self):
         """Delete the selected book"""
-        selected = self.tree.selection()
+        selected = self.table.selected()
         if not selected:
             messagebox.showwarning("No Selection", "Please select a book to delete.")
             return
 
-        book_id = self.tree.item(selected, "values")[0]
+        book_id = selected[0]
         confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this book?")
         if confirm:
-            try:
-                response = requests.delete(f"http://127.0.0.1:5000/api/books/delete/{book_id}")
+            def on_response(response):
                 if response.status_code == 200:
                     messagebox.showinfo("Success", "Book deleted successfully!")
-                    self.tree.delete(selected)
+                    self.table.remove(lambda book: book[0] == book_id)
                 else:
                     error_msg = response.json().get('error', 'Failed to delete book')
                     messagebox.showerror("Error", error_msg)
-            except requests.exceptions.RequestException as e:
-                messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+            api.delete(f"/books/delete/{book_id}", on_response, self.show_connection_error, owner=self)
 
     def book_form(self, title, save_command, book=None):
         """Create book form for adding/updating"""
@@ -148,17 +214,7 @@ class BookScreen:
         generate_barcode = self.generate_barcode_var.get()
 
         if title and author and isbn and copies:
-            try:
-                response = requests.post(
-                    "http://127.0.0.1:5000/api/books/create",
-                    json={
-                        "title": title,
-                        "author": author,
-                        "isbn": isbn,
-                        "copies": int(copies),
-                        "generate_barcode": generate_barcode
-                    }
-                )
+            def on_response(response):
                 if response.status_code == 201:
                     messagebox.showinfo("Success", "Book added successfully!")
                     self.load_books()
@@ -166,8 +222,20 @@ class BookScreen:
                 else:
                     error_msg = response.json().get('error', 'Failed to add book')
                     messagebox.showerror("Error", error_msg)
-            except requests.exceptions.RequestException as e:
-                messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+            api.post(
+                "/books/create",
+                on_response,
+                self.show_connection_error,
+                owner=self,
+                json={
+                    "title": title,
+                    "author": author,
+                    "isbn": isbn,
+                    "copies": int(copies),
+                    "generate_barcode": generate_barcode
+                }
+            )
         else:
             messagebox.showwarning("Input Error", "All fields are required.")
 
@@ -179,69 +247,65 @@ class BookScreen:
         copies = copies_entry.get()
 
         if title and author and copies and copies.isdigit():
-            try:
-                response = requests.put(
-                    f"http://127.0.0.1:5000/api/books/update/{book_id}",
-                    json={
-                        "title": title,
-                        "author": author,
-                        "isbn": isbn,
-                        "copies": int(copies)
-                    }
-                )
+            def on_response(response):
                 if response.status_code == 200:
                     messagebox.showinfo("Success", "Book updated successfully!")
                     self.load_books()
                     form.destroy()
                 else:
                     messagebox.showerror("Error", "Failed to update book.")
-            except requests.exceptions.RequestException as e:
-                messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+            api.put(
+                f"/books/update/{book_id}",
+                on_response,
+                self.show_connection_error,
+                owner=self,
+                json={
+                    "title": title,
+                    "author": author,
+                    "isbn": isbn,
+                    "copies": int(copies)
+                }
+            )
         else:
             messagebox.showwarning("Input Error", "All fields are required.")
 
     def view_history(self):
         """Show borrowing history for selected book"""
-        selected = self.tree.selection()
+        selected = self.table.selected()
         if not selected:
             messagebox.showwarning("No Selection", "Please select a book to view its history.")
             return
             
-        book_id = self.tree.item(selected, "values")[0]
-        try:
-            response = requests.get(f"http://127.0.0.1:5000/api/books/history/{book_id}")
+        book_id = selected[0]
+
+        def on_response(response):
             if response.status_code == 200:
                 history = response.json()
                 self.show_history_window(history)
             else:
                 messagebox.showerror("Error", "Failed to fetch book history.")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+        api.get(f"/books/history/{book_id}", on_response, self.show_connection_error, owner=self, columns=True)
 
     def show_history_window(self, history):
         """Create a window to display borrowing history"""
         history_window = tk.Toplevel(self.parent)
         history_window.title("Book Borrowing History")
         
-        # Create Treeview
-        tree = ttk.Treeview(history_window, columns=("Member", "Issue Date", "Due Date", "Return Date"), show="headings")
-        tree.heading("Member", text="Member")
-        tree.heading("Issue Date", text="Issue Date")
-        tree.heading("Due Date", text="Due Date")
-        tree.heading("Return Date", text="Return Date")
-        tree.pack(fill=tk.BOTH, expand=True)
-
-        # Insert history records
-        for record in history:
-            tree.insert("", tk.END, values=(
-                record["MemberName"],
-                record["IssueDate"],
-                record["DueDate"],
-                record["ReturnDate"]
-            ))
+        # Only the visible records become Treeview rows
+        table = VirtualList(history_window, ("Member", "Issue Date", "Due Date", "Return Date"))
+        table.pack(fill=tk.BOTH, expand=True)
+        table.set_rows((
+            record["MemberName"],
+            record["IssueDate"],
+            record["DueDate"],
+            record["ReturnDate"]
+        ) for record in history)
 
 # Run the application
 if __name__ == "__main__":
     root = tk.Tk()
+    api.attach(root)
     app = BookScreen(root)
     root.mainloop()
\ No newline at end of file
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-import requests
+from api_client import api
 
 class DashboardScreen:
     def __init__(self, parent):
@@ -62,61 +62,29 @@ class DashboardScreen:
         messagebox.showinfo("View Records", "View Records functionality is not implemented yet!")
 
     def refresh_data(self):
-        """Refresh all data (books, members, issued books, overdue returns)"""
-        self.fetch_books_count()
-        self.fetch_members_count()
-        self.fetch_issued_books_count()
-        self.fetch_overdue_returns_count()  # NEW
-
-    def fetch_books_count(self):
-        """Fetch and update the total number of books"""
-        try:
-            response = requests.get("http://127.0.0.1:5000/api/books/all")
-            if response.status_code == 200:
-                books = response.json()
-                self.total_books_label.config(text=str(len(books)))
-            else:
-                self.total_books_label.config(text="Error fetching")
-        except requests.exceptions.RequestException as e:
-            print("Error fetching books:", e)
-            self.total_books_label.config(text="Server error")
-
-    def fetch_members_count(self):
-        """Fetch and update the total number of members"""
-        try:
-            response = requests.get("http://127.0.0.1:5000/api/members/all")
-            if response.status_code == 200:
-                members = response.json()
-                self.total_members_label.config(text=str(len(members)))
-            else:
-                self.total_members_label.config(text="Error fetching")
-        except requests.exceptions.RequestException as e:
-            print("Error fetching members:", e)
-            self.total_members_label.config(text="Server error")
-
-    def fetch_issued_books_count(self):
-        """Fetch and update the total number of issued books"""
-        try:
-            response = requests.get("http://127.0.0.1:5000/api/lending/all")
-            if response.status_code == 200:
-                lending_records = response.json()
-                issued_books_count = sum(1 for record in lending_records if record[5] is None)
-                self.issued_books_label.config(text=str(issued_books_count))
-            else:
-                self.issued_books_label.config(text="Error fetching")
-        except requests.exceptions.RequestException as e:
-            print("Error fetching lending records:", e)
-            self.issued_books_label.config(text="Server error")
-
-    def fetch_overdue_returns_count(self):
-        """Fetch and update the total number of overdue returns"""
-        try:
-            response = requests.get("http://127.0.0.1:5000/api/lending/overdue")
-            if response.status_code == 200:
-                overdue_books = response.json()
-                self.overdue_returns_label.config(text=str(len(overdue_books)))
-            else:
-                self.overdue_returns_label.config(text="Error fetching")
-        except requests.exceptions.RequestException as e:
-            print("Error fetching overdue returns:", e)
-            self.overdue_returns_label.config(text="Server error")
\ No newline at end of file
+        """Refresh all metrics (books, members, issued books, overdue returns) from /api/stats"""
+        api.get("/stats", self.on_stats_loaded, self.on_stats_error, owner=self)
+
+    def on_stats_loaded(self, response):
+        if response.status_code == 200:
+            stats = response.json()
+            self.update_metrics(stats["total_books"], stats["total_members"],
+                                stats["issued_books"], stats["overdue_books"])
+        else:
+            self.set_metric_labels("Error fetching")
+
+    def on_stats_error(self, error):
+        print("Error fetching stats:", error)
+        self.set_metric_labels("Server error")
+
+    def set_metric_labels(self, text):
+        for label in (self.total_books_label, self.total_members_label,
+                      self.issued_books_label, self.overdue_returns_label):
+            label.config(text=text)
+
+    def update_metrics(self, total_books, total_members, issued_books, overdue_returns):
+        """Show the given counts in the metrics section"""
+        self.total_books_label.config(text=str(total_books))
+        self.total_members_label.config(text=str(total_members))
+        self.issued_books_label.config(text=str(issued_books))
+        self.overdue_returns_label.config(text=str(overdue_returns))
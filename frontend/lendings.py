@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from api_client import api
+from search_helpers import DebouncedSearch
+from virtual_list import VirtualList
 import logging
 import json
 
@@ -8,6 +10,10 @@ import json
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+LOANS_PAGE_SIZE = 200  # Active loans fetched per request
+SCROLL_PREFETCH_THRESHOLD = 0.9  # Fetch the next page once this fraction of the list is scrolled
+SORT_KEYS = {"Book Title": "title", "Member Name": "member", "Issue Date": "issue_date", "Due Date": "due_date"}
+
 class LendingsScreen:
     def __init__(self, parent):
         self.parent = parent
@@ -42,13 +48,20 @@ class LendingsScreen:
         return_button.pack(side=tk.BOTTOM, pady=5)
 
 
+        # Sorted and filtered on the server, a page at a time as the list is scrolled
         columns = ("ID", "Book", "Member", "Issue Date", "Due Date")
-        self.loans_tree = ttk.Treeview(loans_frame, columns=columns, show="headings")
-        self.loans_tree.pack(fill="both", expand=True)
+        self.loans_table = VirtualList(loans_frame, columns, on_scroll=self.on_loans_scroll, sortable=False)
+        self.loans_table.pack(fill="both", expand=True)
+
+        # Pagination state
+        self.loans_offset = 0
+        self.has_more_loans = False
+        self.loading_loans = False
+        self.loans_request = None
+        self.search_term = ""
 
         for col in columns:
-            self.loans_tree.heading(col, text=col)
-            self.loans_tree.column(col, width=100)
+            self.loans_table.tree.column(col, width=100)
 
         # Search Section
         search_frame = tk.LabelFrame(self.frame, text="Search Active Loans", padx=10, pady=10)
@@ -59,7 +72,10 @@ class LendingsScreen:
         self.search_entry = tk.Entry(search_frame, textvariable=self.search_var)
         self.search_entry.grid(row=0, column=1, padx=5, pady=5)
 
-        tk.Button(search_frame, text="Search", command=self.search_loans).grid(row=0, column=2, padx=5, pady=5)
+        tk.Button(search_frame, text="Search", command=lambda: self.search.trigger()).grid(row=0, column=2, padx=5, pady=5)
+
+        # Searches run on the server as the user types
+        self.search = DebouncedSearch(self.search_entry, self.search_loans)
 
         # Load initial data and sorting/filtering options
         tk.Label(search_frame, text="Sort By:").grid(row=1, column=0, padx=5, pady=5)
@@ -68,6 +84,9 @@ class LendingsScreen:
                                            values=["Book Title", "Member Name", "Issue Date", "Due Date"])
         self.sort_dropdown.grid(row=1, column=1, padx=5, pady=5)
         self.sort_dropdown.bind("<<ComboboxSelected>>", lambda event: self.sort_loans())
+        self.descending_var = tk.BooleanVar()
+        tk.Checkbutton(search_frame, text="Descending", variable=self.descending_var,
+                       command=self.sort_loans).grid(row=1, column=2, padx=5, pady=5)
 
 
 
@@ -75,134 +94,143 @@ class LendingsScreen:
 
     def fetch_lending_records(self):
         """Fetch and display all lending records."""
-        try:
-            logger.debug("Fetching lending records")
-            lending_records = self.fetch_data("http://localhost:5000/api/lending/records")
-            logger.debug(f"Lending Records Response: {json.dumps(lending_records, indent=2)}")
-
-            # Clear existing items in the loans table
-            for item in self.loans_tree.get_children():
-                self.loans_tree.delete(item)
-
-            if lending_records and isinstance(lending_records, list):
-                for record in lending_records:
-                    self.loans_tree.insert("", "end", values=(
-                        record["LendID"],       # id
-                        record["BookTitle"],    # book_title
-                        record["MemberName"],    # member_name
-                        record["IssueDate"],     # issue_date
-                        record["DueDate"],       # due_date
-                        record["ReturnDate"]     # return_date
-                    ))
-        except Exception as e:
-            logger.error(f"Failed to fetch lending records: {str(e)}")
-            messagebox.showerror("Error", f"Failed to fetch lending records: {str(e)}")
+        logger.debug("Fetching lending records")
+        self.fetch_data("/lending/records", self.show_lending_records, "lending records")
+
+    def show_lending_records(self, lending_records):
+        logger.debug(f"Lending Records Response: {json.dumps(lending_records, indent=2)}")
+
+        if lending_records and isinstance(lending_records, list):
+            self.loans_table.set_rows((
+                record["LendID"],       # id
+                record["BookTitle"],    # book_title
+                record["MemberName"],    # member_name
+                record["IssueDate"],     # issue_date
+                record["DueDate"],       # due_date
+                record["ReturnDate"]     # return_date
+            ) for record in lending_records)
+        else:
+            self.loans_table.clear()
 
     def load_data(self):
         """Load initial data for dropdowns and tables"""
-        try:
-            logger.debug("Loading books and members data")
-            # Load books and members for dropdowns
-            books_response = self.fetch_data("http://localhost:5000/api/books/all")
-            members_response = self.fetch_data("http://localhost:5000/api/members/all")
-
-            logger.debug(f"Books response: {json.dumps(books_response, indent=2)}")
-            logger.debug(f"Members response: {json.dumps(members_response, indent=2)}")
-
-            if books_response and isinstance(books_response, list):
-                self.book_dropdown['values'] = [f"{b['title']} (ID: {b['id']})" for b in books_response]
-            elif books_response and 'data' in books_response:
-                self.book_dropdown['values'] = [f"{b['title']} (ID: {b['id']})" for b in books_response['data']]
-
-            if members_response and isinstance(members_response, list):
-                self.member_dropdown['values'] = [f"{m[1]} (ID: {m[0]})" for m in members_response]
-            elif members_response and 'data' in members_response:
-                self.member_dropdown['values'] = [f"{m[1]} (ID: {m[0]})" for m in members_response['data']]
-
-            # Load active loans
-            self.refresh_loans()
-
+        logger.debug("Loading books and members data")
+        # Load books and members for dropdowns
+        self.fetch_data("/books/all", self.show_books, "books")
+        self.fetch_data("/members/all", self.show_members, "members")
+
+        # Load active loans
+        self.refresh_loans()
+
+    def show_books(self, books_response):
+        logger.debug(f"Books response: {json.dumps(books_response, indent=2)}")
+        if books_response and isinstance(books_response, list):
+            self.book_dropdown['values'] = [f"{b['title']} (ID: {b['id']})" for b in books_response]
+        elif books_response and 'data' in books_response:
+            self.book_dropdown['values'] = [f"{b['title']} (ID: {b['id']})" for b in books_response['data']]
+
+    def show_members(self, members_response):
+        logger.debug(f"Members response: {json.dumps(members_response, indent=2)}")
+        if members_response and isinstance(members_response, list):
+            self.member_dropdown['values'] = [f"{m[1]} (ID: {m[0]})" for m in members_response]
+        elif members_response and 'data' in members_response:
+            self.member_dropdown['values'] = [f"{m[1]} (ID: {m[0]})" for m in members_response['data']]
+
+    def fetch_data(self, path, on_data, description):
+        """Helper method to fetch JSON from the API in the background and pass it to on_data"""
+        def on_response(response):
+            if response.ok:
+                on_data(response.json())
+            else:
+                logger.error(f"API request failed for {path}: HTTP {response.status_code}")
+                messagebox.showerror("Error", f"Failed to fetch {description}.")
 
-        except Exception as e:
-            logger.error(f"Failed to load data: {str(e)}")
-            messagebox.showerror("Error", f"Failed to load data: {str(e)}")
+        def on_error(error):
+            logger.error(f"API request failed for {path}: {str(error)}")
+            messagebox.showerror("Error", f"Failed to fetch {description}: {str(error)}")
 
-    def fetch_data(self, url):
-        """Helper method to fetch data from API"""
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed for {url}: {str(e)}")
-            return None
+        return api.get(path, on_response, on_error, owner=self, columns=True)
 
     def refresh_loans(self):
-        """Refresh the active loans table.""" 
-        try:
-            logger.debug("Refreshing active loans data")
-            # Clear existing items
-            for item in self.loans_tree.get_children():
-                self.loans_tree.delete(item)
-
-            # Fetch active loans
-            loans = self.fetch_data("http://localhost:5000/api/lending/active")
-            logger.debug(f"Active Loans Response: {json.dumps(loans, indent=2)}")
-
-            if loans and isinstance(loans, list):
-                for loan in loans:
-                    # Convert tuple to dictionary
-                    loan_dict = {
-                        "LendID": loan[0],
-                        "BookTitle": loan[1],
-                        "MemberName": loan[2],
-                        "IssueDate": loan[3],
-                        "DueDate": loan[4]
-                    }
-                    # Ensure correct data order in UI
-                    self.loans_tree.insert("", "end", values=(
-                        loan_dict["LendID"],       # id
-                        loan_dict["BookTitle"],    # book_title
-                        loan_dict["MemberName"],   # member_name
-                        loan_dict["IssueDate"],    # issue_date
-                        loan_dict["DueDate"]       # due_date
-                    ))
-
-
-        except Exception as e:
-            logger.error(f"Failed to refresh active loans: {str(e)}")
-            messagebox.showerror("Error", f"Failed to refresh active loans: {str(e)}")
+        """Reload the active loans table from the first page, with the current sort and search."""
+        logger.debug("Refreshing active loans data")
+        if self.loans_request is not None:
+            self.loans_request.cancel()
+            self.loans_request = None
+        self.loading_loans = False
+        self.loans_table.clear()
+        self.loans_offset = 0
+        self.has_more_loans = True
+        self.load_next_loans()
+
+    def load_next_loans(self):
+        """Fetch the next page of active loans and append it to the table."""
+        if self.loading_loans or not self.has_more_loans:
+            return
+
+        params = {
+            "sort": SORT_KEYS[self.sort_var.get()],
+            "order": "desc" if self.descending_var.get() else "asc",
+            "limit": LOANS_PAGE_SIZE,
+            "offset": self.loans_offset,
+        }
+        if self.search_term:
+            params["q"] = self.search_term
+
+        self.loading_loans = True
+        self.loans_request = api.get("/lending/active", self.on_loans_page, self.on_loans_error,
+                                     owner=self, params=params, columns=True)
+
+    def on_loans_page(self, response):
+        self.loading_loans = False
+        self.loans_request = None
+        if response.ok:
+            page = response.json()
+            # Rows are (LendID, BookTitle, MemberName, IssueDate, DueDate), in the UI's column order
+            self.loans_table.append_rows(page["data"])
+            self.loans_offset += len(page["data"])
+            self.has_more_loans = bool(page["data"]) and self.loans_offset < page["total"]
+        else:
+            self.has_more_loans = False
+            logger.error(f"API request failed for /lending/active: HTTP {response.status_code}")
+            messagebox.showerror("Error", "Failed to fetch active loans.")
+
+    def on_loans_error(self, error):
+        self.loading_loans = False
+        self.loans_request = None
+        self.has_more_loans = False
+        logger.error(f"API request failed for /lending/active: {str(error)}")
+        messagebox.showerror("Error", f"Failed to fetch active loans: {str(error)}")
+
+    def on_loans_scroll(self, first, last):
+        """Fetch more loans when the end of the list comes into view."""
+        if float(last) >= SCROLL_PREFETCH_THRESHOLD and self.has_more_loans and not self.loading_loans:
+            self.frame.after_idle(self.load_next_loans)
 
     def refresh_returned_loans(self):
         """Refresh the returned loans table."""
-        try:
-            logger.debug("Refreshing returned loans data")
-            # Clear existing items (if applicable)
-            # Fetch returned loans
-            returned_loans = self.fetch_data("http://localhost:5000/api/lending/returned")
-            logger.debug(f"Returned Loans Response: {json.dumps(returned_loans, indent=2)}")
-
-            # Assuming there is a Treeview for returned loans, similar to active loans
-            # Here you would update the UI with the returned loans data
-            # For example:
-            # for loan in returned_loans:
-            #     self.returned_loans_tree.insert("", "end", values=(loan["LendID"], loan["BookTitle"], loan["MemberName"], loan["ReturnDate"]))
-
-        except Exception as e:
-            logger.error(f"Failed to refresh returned loans: {str(e)}")
-            messagebox.showerror("Error", f"Failed to refresh returned loans: {str(e)}")
+        logger.debug("Refreshing returned loans data")
+        self.fetch_data("/lending/returned", self.show_returned_loans, "returned loans")
+
+    def show_returned_loans(self, returned_loans):
+        logger.debug(f"Returned Loans Response: {json.dumps(returned_loans, indent=2)}")
+
+        # Assuming there is a Treeview for returned loans, similar to active loans
+        # Here you would update the UI with the returned loans data
+        # For example:
+        # for loan in returned_loans:
+        #     self.returned_loans_tree.insert("", "end", values=(loan["LendID"], loan["BookTitle"], loan["MemberName"], loan["ReturnDate"]))
 
     def lend_book(self):
         """Handle lending a book"""
         try:
             book_id = self.book_var.get().split("(ID: ")[1][:-1]
             member_id = self.member_var.get().split("(ID: ")[1][:-1]
+        except IndexError:
+            messagebox.showwarning("Warning", "Please select a book and a member")
+            return
 
-            response = requests.post("http://localhost:5000/api/lending/create", json={
-                "book_id": book_id,
-                "member_id": member_id
-            })
-
+        def on_response(response):
             if response.status_code == 201:
                 messagebox.showinfo("Success", "Book lent successfully!")
                 self.refresh_loans()
@@ -211,21 +239,26 @@ class LendingsScreen:
                 error_msg = response.json().get("message", "Failed to lend book")
                 logger.error(f"Lending failed: {error_msg}")
                 messagebox.showerror("Error", error_msg)
-        except Exception as e:
-            logger.error(f"Lending error: {str(e)}")
-            messagebox.showerror("Error", f"Failed to lend book: {str(e)}")
+
+        def on_error(error):
+            logger.error(f"Lending error: {str(error)}")
+            messagebox.showerror("Error", f"Failed to lend book: {str(error)}")
+
+        api.post("/lending/create", on_response, on_error, owner=self, json={
+            "book_id": book_id,
+            "member_id": member_id
+        })
 
     def return_book(self):
         """Handle returning a book"""
-        try:
-            selected_item = self.loans_tree.selection()
-            if not selected_item:
-                messagebox.showwarning("Warning", "Please select a loan to return")
-                return
+        selected_loan = self.loans_table.selected()
+        if not selected_loan:
+            messagebox.showwarning("Warning", "Please select a loan to return")
+            return
 
-            loan_id = self.loans_tree.item(selected_item)['values'][0]
-            response = requests.put(f"http://localhost:5000/api/lending/id{loan_id}")
+        loan_id = selected_loan[0]
 
+        def on_response(response):
             if response.status_code == 200:
                 messagebox.showinfo("Success", "Book returned successfully!")
                 self.refresh_loans()
@@ -233,40 +266,18 @@ class LendingsScreen:
                 error_msg = response.json().get("message", "Failed to return book")
                 logger.error(f"Return failed: {error_msg}")
                 messagebox.showerror("Error", error_msg)
-        except Exception as e:
-            logger.error(f"Return error: {str(e)}")
-            messagebox.showerror("Error", f"Failed to return book: {str(e)}")
+
+        def on_error(error):
+            logger.error(f"Return error: {str(error)}")
+            messagebox.showerror("Error", f"Failed to return book: {str(error)}")
+
+        api.put(f"/lending/id{loan_id}", on_response, on_error, owner=self)
 
     def sort_loans(self):
-        """Sort the active loans based on the selected criteria."""
-        sort_by = self.sort_var.get()
-        loans = []
-        for item in self.loans_tree.get_children():
-            loans.append(self.loans_tree.item(item)['values'])
-        
-        if sort_by == "Book Title":
-            loans.sort(key=lambda x: x[1])  # Sort by Book Title
-        elif sort_by == "Member Name":
-            loans.sort(key=lambda x: x[2])  # Sort by Member Name
-        elif sort_by == "Issue Date":
-            loans.sort(key=lambda x: x[3])  # Sort by Issue Date
-        elif sort_by == "Due Date":
-            loans.sort(key=lambda x: x[4])  # Sort by Due Date
-
-        # Clear the tree and reinsert sorted loans
-        for item in self.loans_tree.get_children():
-            self.loans_tree.delete(item)
-        for loan in loans:
-            self.loans_tree.insert("", "end", values=loan)
-
-    def search_loans(self):
-
-        """Handle searching loans"""
-        search_term = self.search_entry.get().lower()
-
-        for item in self.loans_tree.get_children():
-            values = self.loans_tree.item(item)['values']
-            if any(search_term in str(value).lower() for value in values):
-                self.loans_tree.selection_set(item)
-            else:
-                self.loans_tree.selection_remove(item)
+        """Reload the active loans sorted on the server by the selected criteria."""
+        self.refresh_loans()
+
+    def search_loans(self, search_term):
+        """Show only the active loans matching the search term (title or member prefix, or loan ID)."""
+        self.search_term = search_term
+        self.refresh_loans()
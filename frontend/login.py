@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-import requests
+from api_client import api
 
 
 class LoginScreen:
@@ -82,16 +82,16 @@ class LoginScreen:
         self.error_label.config(text="")
 
         # Perform login request
-        try:
-            response = requests.post(
-                "http://127.0.0.1:5000/api/login",
-                json={"username": username, "password": password},
-            )
-            if response.status_code == 200:
-                messagebox.showinfo("Login Successful", "Welcome to the dashboard!")
-                self.on_success_callback()
-                self.frame.destroy()  # Hide login screen
-            else:
-                self.error_label.config(text="Invalid username or password.")
-        except requests.exceptions.RequestException:
-            self.error_label.config(text="Error connecting to the server.")
+        api.post("/login", self.on_login_response, self.on_login_error, owner=self,
+                 json={"username": username, "password": password})
+
+    def on_login_response(self, response):
+        if response.status_code == 200:
+            messagebox.showinfo("Login Successful", "Welcome to the dashboard!")
+            self.on_success_callback()
+            self.frame.destroy()  # Hide login screen
+        else:
+            self.error_label.config(text="Invalid username or password.")
+
+    def on_login_error(self, error):
+        self.error_label.config(text="Error connecting to the server.")
@@ -3,11 +3,11 @@ from Sidebar import Sidebar
 from login import LoginScreen
 from dashboard import DashboardScreen
 from members import MemberScreen  # Import the DashboardScreen
+from api_client import api
 
 def show_dashboard(content_frame):
-    # Initialize the DashboardScreen in the content frame
-    dashboard_screen = DashboardScreen(content_frame)
-    dashboard_screen.update_metrics(120, 45, 15, 3)  # Example metrics (replace with API later)
+    # Initialize the DashboardScreen in the content frame (metrics are loaded from /api/stats)
+    DashboardScreen(content_frame)
 
 def main():
     # Create the main Tkinter window
@@ -15,6 +15,9 @@ def main():
     root.title("School Library System")
     root.geometry("800x600")  # Set window size
 
+    # Deliver background API responses on the Tk main loop
+    api.attach(root)
+
     # Create a frame for the main content area
     content_frame = Frame(root)
     content_frame.pack(side="right", fill="both", expand=True)
@@ -1,6 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import requests
+from api_client import api
+from search_helpers import DebouncedSearch
+from virtual_list import VirtualList
+
+SEARCH_LIMIT = 500  # Most search results shown at once
+HISTORY_PAGE_SIZE = 100  # Borrowing history rows fetched per request
+SCROLL_PREFETCH_THRESHOLD = 0.9  # Fetch the next page once this fraction of the list is scrolled
+HISTORY_STATUSES = ("all", "active", "returned", "overdue")
 
 class MemberScreen:
     def __init__(self, parent):
@@ -18,15 +25,15 @@ class MemberScreen:
         tk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
         self.search_entry = tk.Entry(search_frame, width=30)
         self.search_entry.pack(side=tk.LEFT, padx=5)
-        tk.Button(search_frame, text="Search", command=self.search_members).pack(side=tk.LEFT, padx=5)
+        tk.Button(search_frame, text="Search", command=lambda: self.search.trigger()).pack(side=tk.LEFT, padx=5)
+
+        # Member List (only the visible rows are materialized in the Treeview)
+        self.table = VirtualList(self.frame, ("ID", "Name", "Contact", "Join Date"))
+        self.table.pack(fill=tk.BOTH, expand=True, pady=10)
 
-        # Member List (Treeview)
-        self.tree = ttk.Treeview(self.frame, columns=("ID", "Name", "Contact", "Join Date"), show="headings")
-        self.tree.heading("ID", text="ID")
-        self.tree.heading("Name", text="Name")
-        self.tree.heading("Contact", text="Contact")
-        self.tree.heading("Join Date", text="Join Date")
-        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        # Searches run on the server as the user types
+        self.listing_request = None
+        self.search = DebouncedSearch(self.search_entry, self.search_members)
 
         # Buttons for Actions
         button_frame = tk.Frame(self.frame)
@@ -44,37 +51,40 @@ class MemberScreen:
 
     def load_members(self):
         """Fetch members from the Flask backend and load them into the Treeview"""
-        try:
-            response = requests.get("http://127.0.0.1:5000/api/members/all")
-            if response.status_code == 200:
-                members = response.json()
-                # Clear existing data
-                for row in self.tree.get_children():
-                    self.tree.delete(row)
-                # Add members to the Treeview
-                for member in members:
-                    # Access fields by index (assuming the order is: MemberID, Name, Contact, JoinDate)
-                    self.tree.insert("", tk.END, values=(
-                        member[0],  # MemberID
-                        member[1],  # Name
-                        member[2],  # Contact
-                        member[3]   # JoinDate
-                    ))
-            else:
-                messagebox.showerror("Error", "Failed to fetch members.")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Failed to connect to the server: {e}")
-
-    def search_members(self):
-        """Filter members based on search criteria"""
-        search_term = self.search_entry.get().lower()
-        for row in self.tree.get_children():
-            values = self.tree.item(row, "values")
-            if search_term in values[1].lower() or search_term in values[0].lower():  # Search by name or ID
-                self.tree.selection_set(row)
-                self.tree.focus(row)
-            else:
-                self.tree.detach(row)
+        self.start_listing(api.get("/members/all", self.on_members_loaded, self.show_connection_error,
+                                   owner=self, columns=True))
+
+    def start_listing(self, request):
+        """Track the request that fills the member list, abandoning the previous one"""
+        if self.listing_request is not None:
+            self.listing_request.cancel()
+        self.listing_request = request
+
+    def on_members_loaded(self, response):
+        self.listing_request = None
+        if response.status_code == 200:
+            members = response.json()
+            # Access fields by index (assuming the order is: MemberID, Name, Contact, JoinDate)
+            self.table.set_rows((
+                member[0],  # MemberID
+                member[1],  # Name
+                member[2],  # Contact
+                member[3]   # JoinDate
+            ) for member in members)
+        else:
+            messagebox.showerror("Error", "Failed to fetch members.")
+
+    def show_connection_error(self, error):
+        messagebox.showerror("Error", f"Failed to connect to the server: {error}")
+
+    def search_members(self, search_term):
+        """Show the members matching the search term (name prefix or ID), searched on the server"""
+        if not search_term:
+            self.load_members()
+            return
+
+        self.start_listing(api.get("/members/search", self.on_members_loaded, self.show_connection_error,
+                                   owner=self, params={"q": search_term, "limit": SEARCH_LIMIT}, columns=True))
 
     def add_member(self):
         """Open a form to add a new member"""
@@ -93,19 +103,16 @@ class MemberScreen:
             name = name_entry.get()
             contact = contact_entry.get()
             if name:
-                try:
-                    response = requests.post(
-                        "http://127.0.0.1:5000/api/members/create",
-                        json={"name": name, "contact": contact}
-                    )
+                def on_response(response):
                     if response.status_code == 200:
                         messagebox.showinfo("Success", "Member added successfully!")
                         self.load_members()  # Refresh the member list
                         form.destroy()
                     else:
                         messagebox.showerror("Error", "Failed to add member.")
-                except requests.exceptions.RequestException as e:
-                    messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+                api.post("/members/create", on_response, self.show_connection_error, owner=self,
+                         json={"name": name, "contact": contact})
             else:
                 messagebox.showwarning("Input Error", "Name is required.")
 
@@ -113,13 +120,13 @@ class MemberScreen:
 
     def update_member(self):
         """Update the selected member's details"""
-        selected = self.tree.selection()
+        selected = self.table.selected()
         if not selected:
             messagebox.showwarning("No Selection", "Please select a member to update.")
             return
 
         # Get the selected member's details
-        member_id, name, contact, join_date = self.tree.item(selected, "values")
+        member_id, name, contact, join_date = selected
 
         # Open a form to update the member
         form = tk.Toplevel(self.parent)
@@ -139,20 +146,16 @@ class MemberScreen:
             new_name = name_entry.get()
             new_contact = contact_entry.get()
             if new_name:
-                try:
-                    # Assuming you have an update endpoint (e.g., /members/update/<int:member_id>)
-                    response = requests.put(
-                        f"http://127.0.0.1:5000/api/members/update/{member_id}",
-                        json={"name": new_name, "contact": new_contact}
-                    )
+                def on_response(response):
                     if response.status_code == 200:
                         messagebox.showinfo("Success", "Member updated successfully!")
                         self.load_members()  # Refresh the member list
                         form.destroy()
                     else:
                         messagebox.showerror("Error", "Failed to update member.")
-                except requests.exceptions.RequestException as e:
-                    messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+                api.put(f"/members/update/{member_id}", on_response, self.show_connection_error, owner=self,
+                        json={"name": new_name, "contact": new_contact})
             else:
                 messagebox.showwarning("Input Error", "Name is required.")
 
@@ -160,60 +163,142 @@ class MemberScreen:
 
     def delete_member(self):
         """Delete the selected member"""
-        selected = self.tree.selection()
+        selected = self.table.selected()
         if not selected:
             messagebox.showwarning("No Selection", "Please select a member to delete.")
             return
 
-        member_id = self.tree.item(selected, "values")[0]
+        member_id = selected[0]
         confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this member?")
         if confirm:
-            try:
-                # Assuming you have a delete endpoint (e.g., /members/delete/<int:member_id>)
-                response = requests.delete(f"http://127.0.0.1:5000/api/members/delete/{member_id}")
+            def on_response(response):
                 if response.status_code == 200:
                     messagebox.showinfo("Success", "Member deleted successfully!")
                     self.load_members()  # Refresh the member list
                 else:
                     messagebox.showerror("Error", "Failed to delete member.")
-            except requests.exceptions.RequestException as e:
-                messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+
+            api.delete(f"/members/delete/{member_id}", on_response, self.show_connection_error, owner=self)
 
     def view_borrowing_history(self):
         """Show the borrowing history of the selected member"""
-        selected = self.tree.selection()
+        selected = self.table.selected()
         if not selected:
             messagebox.showwarning("No Selection", "Please select a member to view their borrowing history.")
             return
 
-        member_id = self.tree.item(selected, "values")[0]  # Get the selected member's ID
-        member_name = self.tree.item(selected, "values")[1]  # Get the selected member's name
-
-        # Fetch borrowing history from the backend
-        try:
-            response = requests.get(f"http://127.0.0.1:5000/api/members/{member_id}/borrowing-history")
-            if response.status_code == 200:
-                history = response.json()
-                # Open a new window to display borrowing history
-                history_window = tk.Toplevel(self.parent)
-                history_window.title(f"Borrowing History - {member_name}")
-
-                # Display history in a Treeview
-                history_tree = ttk.Treeview(history_window, columns=("BookTitle", "IssueDate", "DueDate", "ReturnDate"), show="headings")
-                history_tree.heading("BookTitle", text="Book Title")
-                history_tree.heading("IssueDate", text="Issue Date")
-                history_tree.heading("DueDate", text="Due Date")
-                history_tree.heading("ReturnDate", text="Return Date")
-                history_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-                for record in history:
-                    history_tree.insert("", tk.END, values=(
-                        record["BookTitle"],  # Updated key
-                        record["IssueDate"],
-                        record["DueDate"],
-                        record["ReturnDate"]
-                    ))
-            else:
-                messagebox.showerror("Error", "Failed to fetch borrowing history.")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Failed to connect to the server: {e}")
+        member_id, member_name = selected[0], selected[1]  # The selected member's ID and name
+
+        BorrowingHistoryWindow(self.parent, member_id, member_name)
+
+
+class BorrowingHistoryWindow:
+    """
+    Popup with a member's borrowing history, newest first.
+
+    Rows are fetched a page at a time and the next page is requested when the
+    end of the list scrolls into view. Changing the filters starts over from
+    the first page.
+    """
+
+    def __init__(self, parent, member_id, member_name):
+        self.member_id = member_id
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Borrowing History - {member_name}")
+
+        # Filters: issue date range (YYYY-MM-DD) and loan status
+        filter_frame = tk.Frame(self.window)
+        filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        tk.Label(filter_frame, text="From:").pack(side=tk.LEFT, padx=5)
+        self.from_entry = tk.Entry(filter_frame, width=12)
+        self.from_entry.pack(side=tk.LEFT)
+        tk.Label(filter_frame, text="To:").pack(side=tk.LEFT, padx=5)
+        self.to_entry = tk.Entry(filter_frame, width=12)
+        self.to_entry.pack(side=tk.LEFT)
+        tk.Label(filter_frame, text="Status:").pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar(value=HISTORY_STATUSES[0])
+        ttk.Combobox(filter_frame, textvariable=self.status_var, values=HISTORY_STATUSES,
+                     state="readonly", width=10).pack(side=tk.LEFT)
+        tk.Button(filter_frame, text="Apply", command=self.reload).pack(side=tk.LEFT, padx=5)
+
+        # Display history; scrolling near the bottom of the list fetches the next page
+        self.table = VirtualList(self.window, ("Book Title", "Issue Date", "Due Date", "Return Date"),
+                                 on_scroll=self.on_tree_scroll)
+        self.table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Pagination state
+        self.filters = {}
+        self.next_cursor = None
+        self.has_more = False
+        self.loading = False
+        self.page_request = None
+
+        # Closing the popup drops any request still in flight
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.reload()
+
+    def reload(self):
+        """Start over from the first page with the current filters"""
+        if self.page_request is not None:
+            self.page_request.cancel()
+            self.page_request = None
+        self.loading = False
+
+        self.filters = {}
+        for name, entry in (("from", self.from_entry), ("to", self.to_entry)):
+            if entry.get().strip():
+                self.filters[name] = entry.get().strip()
+        if self.status_var.get() != "all":
+            self.filters["status"] = self.status_var.get()
+
+        self.table.clear()
+        self.next_cursor = None
+        self.has_more = True
+        self.load_next_page()
+
+    def load_next_page(self):
+        """Fetch the next page of history and append it to the Treeview"""
+        if self.loading or not self.has_more:
+            return
+
+        params = dict(self.filters, limit=HISTORY_PAGE_SIZE)
+        if self.next_cursor is not None:
+            params["after"] = self.next_cursor
+
+        self.loading = True
+        self.page_request = api.get(f"/members/{self.member_id}/borrowing-history", self.on_page_loaded,
+                                    self.on_page_error, owner=self, params=params, columns=True)
+
+    def on_page_loaded(self, response):
+        self.loading = False
+        self.page_request = None
+        if response.status_code == 200:
+            page = response.json()
+            self.table.append_rows((
+                record["BookTitle"],
+                record["IssueDate"],
+                record["DueDate"],
+                record["ReturnDate"] or ""
+            ) for record in page["data"])
+            self.next_cursor = page["next_cursor"]
+            self.has_more = self.next_cursor is not None
+        else:
+            self.has_more = False
+            error = response.json().get("error", "Failed to fetch borrowing history.")
+            messagebox.showerror("Error", error, parent=self.window)
+
+    def on_page_error(self, error):
+        self.loading = False
+        self.page_request = None
+        self.has_more = False
+        messagebox.showerror("Error", f"Failed to connect to the server: {error}", parent=self.window)
+
+    def on_tree_scroll(self, first, last):
+        """Fetch more history when the end of the list comes into view"""
+        if float(last) >= SCROLL_PREFETCH_THRESHOLD and self.has_more and not self.loading:
+            self.window.after_idle(self.load_next_page)
+
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            api.cancel(self)
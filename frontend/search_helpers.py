@@ -0,0 +1,39 @@
+SEARCH_DELAY_MS = 300  # Pause in typing before a search is sent
+
+
+class DebouncedSearch:
+    """Calls `callback(text)` once the user stops typing in `entry` for `delay` ms."""
+
+    def __init__(self, entry, callback, delay=SEARCH_DELAY_MS):
+        self.entry = entry
+        self.callback = callback
+        self.delay = delay
+        self.pending = None
+        self.last_text = None
+        entry.bind("<KeyRelease>", self.schedule)
+        entry.bind("<Return>", lambda event: self.trigger())
+
+    def schedule(self, event=None):
+        """Restart the countdown on every keystroke"""
+        self.cancel()
+        self.pending = self.entry.after(self.delay, self.fire)
+
+    def trigger(self):
+        """Search right away (e.g. when the Search button is pressed)"""
+        self.cancel()
+        self.last_text = None
+        self.fire()
+
+    def fire(self):
+        self.pending = None
+        text = self.entry.get().strip()
+        if text == self.last_text:  # Arrow keys, Shift etc. don't change the query
+            return
+        self.last_text = text
+        self.callback(text)
+
+    def cancel(self):
+        if self.pending is not None:
+            self.entry.after_cancel(self.pending)
+            self.pending = None
+
@@ -0,0 +1,244 @@
+import tkinter as tk
+from tkinter import ttk
+from array import array
+
+DEFAULT_ROW_HEIGHT = 20  # Pixels per Treeview row until a real row can be measured
+DEFAULT_HEADING_HEIGHT = 25
+WHEEL_ROWS = 3  # Rows scrolled per mouse-wheel step
+
+
+class VirtualList:
+    """
+    A Treeview that can show very large tables.
+
+    The full dataset is kept in Python as a list of value tuples. On top of it
+    sits an array of row indices in display order (after filtering and
+    sorting). Only the rows that fit on screen exist as Treeview items. Scrolling
+    rewrites the values of those few items in place, so loading, sorting and
+    filtering never insert or delete the whole table.
+
+    `on_scroll(first, last)` is called with the visible fraction after every
+    redraw, like a Treeview's yscrollcommand.
+    """
+
+    def __init__(self, parent, columns, on_scroll=None, sortable=True):
+        self.columns = tuple(columns)
+        self.on_scroll = on_scroll
+        self.frame = tk.Frame(parent)
+
+        self.tree = ttk.Treeview(self.frame, columns=self.columns, show="headings", selectmode="browse")
+        for index, column in enumerate(self.columns):
+            command = (lambda index=index: self.toggle_sort(index)) if sortable else ""
+            self.tree.heading(column, text=column, command=command)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.rows = []  # Value tuples, in load order
+        self.view = array("l")  # Indices into rows, in display order
+        self.filter_predicate = None
+        self.sort_column = None
+        self.sort_reverse = False
+
+        self.top = 0  # Position in view of the first visible row
+        self.visible_rows = 1
+        self.row_height = DEFAULT_ROW_HEIGHT
+        self.heading_height = DEFAULT_HEADING_HEIGHT
+        self.slots = []  # Treeview items currently materialized, top to bottom
+        self.slot_rows = {}  # Treeview item -> row index it shows
+        self.selected_row = None  # Row index, so the selection survives scrolling
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(WHEEL_ROWS))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda event, step=step: self.move_selection(step))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def __len__(self):
+        """Number of rows shown (after filtering)"""
+        return len(self.view)
+
+    # Data
+
+    def set_rows(self, rows):
+        """Replace the whole dataset"""
+        self.rows = [tuple(row) for row in rows]
+        self.selected_row = None
+        self.top = 0
+        self.rebuild_view()
+
+    def append_rows(self, rows):
+        """Add rows at the end of the dataset, e.g. the next page from the server"""
+        start = len(self.rows)
+        self.rows.extend(tuple(row) for row in rows)
+        if self.filter_predicate is None and self.sort_column is None:
+            self.view.extend(range(start, len(self.rows)))
+            self.redraw()
+        else:
+            self.rebuild_view()
+
+    def clear(self):
+        self.set_rows([])
+
+    def remove(self, predicate):
+        """Drop the rows for which predicate(values) is true"""
+        selected = self.selected()
+        self.rows = [row for row in self.rows if not predicate(row)]
+        self.selected_row = next((index for index, row in enumerate(self.rows) if row is selected), None)
+        self.rebuild_view()
+
+    def selected(self):
+        """Values of the selected row, or None"""
+        return self.rows[self.selected_row] if self.selected_row is not None else None
+
+    # Sorting and filtering
+
+    def sort(self, column, reverse=False):
+        """Order the rows by a column (name or position); None restores load order"""
+        self.sort_column = self.columns.index(column) if isinstance(column, str) else column
+        self.sort_reverse = reverse
+        self.rebuild_view()
+
+    def toggle_sort(self, column):
+        """Heading click: sort by the column, reversing on a second click"""
+        reverse = self.sort_column == column and not self.sort_reverse
+        self.sort(column, reverse)
+
+    def filter(self, predicate):
+        """Only show rows for which predicate(values) is true; None shows every row"""
+        self.filter_predicate = predicate
+        self.top = 0
+        self.rebuild_view()
+
+    def filter_text(self, text):
+        """Only show rows with a value containing `text` (case-insensitive)"""
+        text = text.strip().lower()
+        if not text:
+            self.filter(None)
+            return
+        self.filter(lambda values: any(text in str(value).lower() for value in values))
+
+    def rebuild_view(self):
+        indices = range(len(self.rows))
+        if self.filter_predicate is not None:
+            indices = [index for index in indices if self.filter_predicate(self.rows[index])]
+        if self.sort_column is not None:
+            rows, column = self.rows, self.sort_column
+            # Empty values sort after the rest; a column's other values must be comparable
+            indices = sorted(indices, reverse=self.sort_reverse,
+                             key=lambda index: (rows[index][column] is None, rows[index][column]))
+        self.view = array("l", indices)
+        self.redraw()
+
+    # Scrolling
+
+    def yview(self, *args):
+        """Scrollbar command ("moveto", fraction) or ("scroll", count, "units" | "pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.view)))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            self.scroll(count * self.visible_rows if args[2] == "pages" else count)
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.view) - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def on_wheel(self, event):
+        return self.scroll(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+
+    def on_resize(self, event):
+        visible_rows = max(1, (event.height - self.heading_height) // self.row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.redraw()
+
+    # Selection
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.slot_rows:
+            self.selected_row = self.slot_rows[selection[0]]
+
+    def move_selection(self, step):
+        """Keyboard navigation over the whole view, not just the visible rows"""
+        if not self.view:
+            return "break"
+        slot = self.selected_slot()
+        position = self.top + self.slots.index(slot) if slot else self.top - 1
+        if step == "home":
+            position = 0
+        elif step == "end":
+            position = len(self.view) - 1
+        else:
+            pages = {"page": self.visible_rows, "-page": -self.visible_rows}
+            position = max(0, min(position + pages.get(step, step), len(self.view) - 1))
+
+        self.selected_row = self.view[position]
+        if position < self.top:
+            self.scroll_to(position)
+        elif position >= self.top + self.visible_rows:
+            self.scroll_to(position - self.visible_rows + 1)
+        self.redraw()
+        return "break"
+
+    def selected_slot(self):
+        for slot in self.slots:
+            if self.slot_rows[slot] == self.selected_row:
+                return slot
+        return None
+
+    # Rendering
+
+    def redraw(self):
+        """Show the rows from self.top, reusing the materialized Treeview items"""
+        self.top = max(0, min(self.top, len(self.view) - self.visible_rows))
+        needed = min(self.visible_rows, len(self.view) - self.top)
+        while len(self.slots) > needed:
+            slot = self.slots.pop()
+            del self.slot_rows[slot]
+            self.tree.delete(slot)
+        while len(self.slots) < needed:
+            self.slots.append(self.tree.insert("", tk.END))
+
+        for offset, slot in enumerate(self.slots):
+            index = self.view[self.top + offset]
+            self.slot_rows[slot] = index
+            self.tree.item(slot, values=self.rows[index])
+
+        slot = self.selected_slot()
+        if slot:
+            self.tree.selection_set(slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.measure()
+
+        total = len(self.view)
+        first, last = (self.top / total, (self.top + needed) / total) if total else (0.0, 1.0)
+        self.scrollbar.set(first, last)
+        if self.on_scroll is not None:
+            self.on_scroll(first, last)
+
+    def measure(self):
+        """Pick up the real row and heading heights once a row is on screen"""
+        if not self.slots:
+            return
+        bbox = self.tree.bbox(self.slots[0])
+        if bbox and (bbox[1], bbox[3]) != (self.heading_height, self.row_height):
+            self.heading_height, self.row_height = bbox[1], bbox[3]
+            visible_rows = max(1, (self.tree.winfo_height() - self.heading_height) // self.row_height)
+            if visible_rows != self.visible_rows:
+                self.visible_rows = visible_rows
+                self.tree.after_idle(self.redraw)
@@ -1,26 +1,61 @@
-from flask import Flask
+from flask import Flask, jsonify
 from config import SECRET_KEY
 from db_config import create_app, mysql
+from db_pool import PoolTimeout
+from cache import cache
+from compression import compression
+from json_provider import FastJSONProvider
+from labels import labels
+from models.circulation import barcode_index
+from models.overdue import refresh_overdue
+from models.fines import accrue_fines
+from models.lending import reconcile_active_loans
+from scheduler import scheduler
 from routes.book_routes import book_routes
-from barcode import Code128
-from barcode.writer import ImageWriter
 
 from routes.member_routes import member_routes
 from routes.lending_routes import lending_routes
 from routes.auth_routes import auth_routes
+from routes.stats_routes import stats_routes
+from routes.label_routes import label_routes
+from routes.circulation_routes import circulation_routes
+from routes.fine_routes import fine_routes
 from models.librarians import authenticate_librarian
 
 
 app = create_app()
+app.json = FastJSONProvider(app)
 mysql.init_app(app)
+cache.init_app(app)
+compression.init_app(app)
+labels.init_app(app)
+barcode_index.init_app(app)
+scheduler.init_app(app)
+scheduler.daily('refresh_overdue', app.config['OVERDUE_REFRESH_AT'], refresh_overdue)
+scheduler.daily('accrue_fines', app.config['FINE_ACCRUAL_AT'], accrue_fines)
+scheduler.daily('reconcile_active_loans', app.config['ACTIVE_LOANS_RECONCILE_AT'], reconcile_active_loans)
 app.secret_key = SECRET_KEY
 
 app.register_blueprint(book_routes, url_prefix='/api')
 app.register_blueprint(member_routes, url_prefix='/api')
 app.register_blueprint(lending_routes, url_prefix='/api')
 app.register_blueprint(auth_routes, url_prefix='/api')
+app.register_blueprint(stats_routes, url_prefix='/api')
+app.register_blueprint(label_routes, url_prefix='/api')
+app.register_blueprint(circulation_routes, url_prefix='/api')
+app.register_blueprint(fine_routes, url_prefix='/api')
+
+@app.errorhandler(PoolTimeout)
+def database_busy(e):
+    """Every pooled connection stayed busy for MYSQL_POOL_WAIT_TIMEOUT: ask the client to retry."""
+    response = jsonify({"message": "The server is busy, please try again shortly.", "error": str(e)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(app.config['MYSQL_POOL_WAIT_TIMEOUT'])
+    return response
 
 
 
 if __name__ == '__main__':
+    # Development server; wsgi.py is the production entry point
+    scheduler.start()
     app.run(debug=True)
@@ -0,0 +1,129 @@
+"""
+Measure lend throughput for members with long borrowing histories.
+
+Creates one member per thread, each with --history returned loans, then
+every thread lends and returns a copy in a loop through lend_book() and
+return_book(). Also times the borrowing-limit read on its own: the old
+COUNT(*) over the member's loans against the Members.ActiveLoans counter.
+Runs against the local MySQL configured in db_config.py:
+
+    python benchmarks/bench_lend.py --threads 8 --history 10000 --duration 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from db_config import mysql  # noqa: E402
+from models.lending import lend_book, return_book  # noqa: E402
+
+HISTORY_BATCH = 5000  # Historical loans inserted per executemany
+
+
+def create_fixtures(members, history):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)",
+                       ("Lend Benchmark", "Benchmark", "Benchmark", f"BENCHLEND-{os.getpid()}", 10 ** 6))
+        book_id = cursor.lastrowid
+        member_ids = []
+        for number in range(members):
+            cursor.execute("INSERT INTO Members (Name, Contact) VALUES (%s, %s)", (f"Lend Benchmark {number}", "benchmark"))
+            member_ids.append(cursor.lastrowid)
+
+        issued = datetime.now() - timedelta(days=365)
+        loans = [(book_id, member_id, issued, issued + timedelta(days=14), issued + timedelta(days=7))
+                 for member_id in member_ids for _ in range(history)]
+        for start in range(0, len(loans), HISTORY_BATCH):
+            cursor.executemany("INSERT INTO Lending (BookID, MemberID, IssueDate, DueDate, ReturnDate) "
+                               "VALUES (%s, %s, %s, %s, %s)", loans[start:start + HISTORY_BATCH])
+        mysql.connection.commit()
+        cursor.close()
+    return book_id, member_ids
+
+
+def drop_fixtures(book_id, member_ids):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("DELETE FROM Lending WHERE BookID = %s", (book_id,))
+        cursor.execute("DELETE FROM Books WHERE BookID = %s", (book_id,))
+        cursor.execute(f"DELETE FROM Members WHERE MemberID IN ({', '.join(['%s'] * len(member_ids))})", member_ids)
+        mysql.connection.commit()
+        cursor.close()
+
+
+def time_limit_reads(member_ids, repeat):
+    """Median seconds per limit read: (COUNT(*) over Lending, ActiveLoans counter)."""
+    queries = ("SELECT COUNT(*) FROM Lending WHERE MemberID = %s AND ReturnDate IS NULL",
+               "SELECT ActiveLoans FROM Members WHERE MemberID = %s")
+    timings = []
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        for query in queries:
+            samples = []
+            for _ in range(repeat):
+                for member_id in member_ids:
+                    started = time.perf_counter()
+                    cursor.execute(query, (member_id,))
+                    cursor.fetchone()
+                    samples.append(time.perf_counter() - started)
+            timings.append(statistics.median(samples))
+        cursor.close()
+    return timings
+
+
+def run(book_id, member_ids, duration):
+    deadline = time.monotonic() + duration
+
+    def worker(member_id):
+        latencies = []
+        errors = 0
+        with app.app_context():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                result = lend_book(book_id, member_id)
+                latencies.append(time.perf_counter() - started)
+                if not result["success"]:
+                    errors += 1
+                    continue
+                return_book(result["lend_id"])
+        return latencies, errors
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(member_ids)) as executor:
+        results = [f.result() for f in [executor.submit(worker, m) for m in member_ids]]
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(latency for r in results for latency in r[0])
+    return len(latencies) / elapsed, sum(r[1] for r in results), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--history", type=int, default=10000, help="Returned loans per member")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=50, help="Limit reads per member and query")
+    args = parser.parse_args()
+
+    book_id, member_ids = create_fixtures(args.threads, args.history)
+    try:
+        count_read, counter_read = time_limit_reads(member_ids, args.repeat)
+        print(f"limit read p50: COUNT(*) {count_read * 1000:.3f}ms, ActiveLoans {counter_read * 1000:.3f}ms")
+
+        lends_per_second, errors, latencies = run(book_id, member_ids, args.duration)
+        print(f"{lends_per_second:.1f} lends/s over {len(latencies)} lends ({errors} failed)")
+        print(f"lend latency p50={statistics.median(latencies) * 1000:.2f}ms "
+              f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms")
+    finally:
+        drop_fixtures(book_id, member_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare requests/second with and without the connection pool.
+
+Runs against the local MySQL configured in db_config.py using Flask's test
+client, so the numbers isolate database connection cost from HTTP overhead:
+
+    python benchmarks/bench_pool.py --threads 8 --duration 10
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from db_config import mysql  # noqa: E402
+
+
+def create_fixtures():
+    """Insert a book with plenty of copies and a member to lend it to."""
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)",
+                       ("Pool Benchmark", "Benchmark", "Benchmark", f"BENCH-{os.getpid()}", 10 ** 6))
+        book_id = cursor.lastrowid
+        cursor.execute("INSERT INTO Members (Name, Contact) VALUES (%s, %s)", ("Pool Benchmark", "benchmark"))
+        member_id = cursor.lastrowid
+        mysql.connection.commit()
+        cursor.close()
+    return book_id, member_id
+
+
+def drop_fixtures(book_id, member_id):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("DELETE FROM Lending WHERE BookID = %s", (book_id,))
+        cursor.execute("DELETE FROM Books WHERE BookID = %s", (book_id,))
+        cursor.execute("DELETE FROM Members WHERE MemberID = %s", (member_id,))
+        mysql.connection.commit()
+        cursor.close()
+
+
+def run(method, path, payload, threads, duration):
+    """Hammer one endpoint from `threads` clients for `duration` seconds."""
+    deadline = time.monotonic() + duration
+
+    def worker():
+        client = app.test_client()
+        statuses = Counter()
+        while time.monotonic() < deadline:
+            response = client.open(path, method=method, json=payload)
+            statuses[response.status_code] += 1
+        return statuses
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = [f.result() for f in [executor.submit(worker) for _ in range(threads)]]
+    elapsed = time.monotonic() - started
+
+    statuses = sum(results, Counter())
+    return sum(statuses.values()) / elapsed, dict(statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    args = parser.parse_args()
+
+    book_id, member_id = create_fixtures()
+    scenarios = [
+        ("GET", "/api/books/all", None),
+        ("POST", "/api/lending/create", {"book_id": book_id, "member_id": member_id}),
+    ]
+    try:
+        for method, path, payload in scenarios:
+            for pooled in (False, True):
+                app.config['MYSQL_POOL_ENABLED'] = pooled
+                rps, statuses = run(method, path, payload, args.threads, args.duration)
+                print(f"{method:4} {path:22} pool={'on ' if pooled else 'off'} {rps:10.1f} req/s  statuses={statuses}")
+        print(f"pool metrics: {mysql.pool.metrics()}")
+    finally:
+        drop_fixtures(book_id, member_id)
+
+
+if __name__ == "__main__":
+    main()
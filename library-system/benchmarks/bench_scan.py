@@ -0,0 +1,107 @@
+"""
+Measure /api/circulation/scan throughput.
+
+Creates one title with --copies barcoded copies and one member per thread,
+then every thread scans its own share of the copies in a loop: the first
+scan of a copy lends it, the next returns it. Uses Flask's test client
+against the local MySQL configured in db_config.py:
+
+    python benchmarks/bench_scan.py --threads 16 --duration 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from db_config import mysql  # noqa: E402
+from models.books import insert_barcodes  # noqa: E402
+from models.circulation import barcode_index  # noqa: E402
+from models.lending import CLASS_MONITOR_LOAN_LIMIT  # noqa: E402
+
+
+def create_fixtures(copies, members):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)",
+                       ("Scan Benchmark", "Benchmark", "Benchmark", f"BENCHSCAN-{os.getpid()}", copies))
+        book_id = cursor.lastrowid
+        insert_barcodes(cursor, {book_id: copies})
+        cursor.execute("SELECT Barcode FROM Barcodes WHERE BookID = %s ORDER BY Barcode", (book_id,))
+        barcodes = [row[0] for row in cursor.fetchall()]
+        member_ids = []
+        for number in range(members):
+            cursor.execute("INSERT INTO Members (Name, Contact, MemberType) VALUES (%s, %s, 'class_monitor')",
+                           (f"Scan Benchmark {number}", "benchmark"))
+            member_ids.append(cursor.lastrowid)
+        mysql.connection.commit()
+        cursor.close()
+    return book_id, barcodes, member_ids
+
+
+def drop_fixtures(book_id, member_ids):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("DELETE FROM Lending WHERE BookID = %s", (book_id,))
+        cursor.execute("DELETE FROM Barcodes WHERE BookID = %s", (book_id,))
+        cursor.execute("DELETE FROM Books WHERE BookID = %s", (book_id,))
+        cursor.execute(f"DELETE FROM Members WHERE MemberID IN ({', '.join(['%s'] * len(member_ids))})", member_ids)
+        mysql.connection.commit()
+        cursor.close()
+
+
+def run(barcodes, member_ids, duration):
+    deadline = time.monotonic() + duration
+    # A member never holds more copies than a class monitor may borrow
+    shares = [barcodes[i::len(member_ids)][:CLASS_MONITOR_LOAN_LIMIT] for i in range(len(member_ids))]
+
+    def worker(member_id, share):
+        client = app.test_client()
+        statuses = Counter()
+        latencies = []
+        while time.monotonic() < deadline:
+            for barcode in share:
+                started = time.perf_counter()
+                response = client.post("/api/circulation/scan",
+                                       json={"barcode": barcode, "member_id": member_id})
+                latencies.append(time.perf_counter() - started)
+                statuses[(response.status_code, response.json.get("action"))] += 1
+        return statuses, latencies
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(member_ids)) as executor:
+        results = [f.result() for f in [executor.submit(worker, m, s) for m, s in zip(member_ids, shares)]]
+    elapsed = time.monotonic() - started
+
+    statuses = sum((r[0] for r in results), Counter())
+    latencies = sorted(latency for r in results for latency in r[1])
+    return len(latencies) / elapsed, statuses, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--copies", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    book_id, barcodes, member_ids = create_fixtures(args.copies, args.threads)
+    try:
+        with app.app_context():
+            barcode_index.warm()
+        scans_per_second, statuses, latencies = run(barcodes, member_ids, args.duration)
+        print(f"{scans_per_second:.1f} scans/s over {len(latencies)} scans")
+        print(f"latency p50={statistics.median(latencies) * 1000:.2f}ms "
+              f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms")
+        print(f"statuses={dict(statuses)}")
+    finally:
+        drop_fixtures(book_id, member_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure /api/books/search latency on a large catalog.
+
+Seed a synthetic catalog once (rows are tagged with an ISBN prefix so they
+can be removed again), then time random prefix searches:
+
+    python benchmarks/bench_search.py --seed 1000000
+    python benchmarks/bench_search.py --queries 2000
+    python benchmarks/bench_search.py --cleanup
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from db_config import mysql  # noqa: E402
+
+ISBN_PREFIX = "BENCHSEARCH-"
+WORDS = ("shadow", "river", "garden", "empire", "silent", "winter", "crystal", "forest", "secret",
+         "ocean", "golden", "journey", "kingdom", "midnight", "history", "science", "dragon", "island",
+         "letters", "machine", "harbor", "summer", "voices", "mountain", "lantern", "atlas", "orchard")
+SURNAMES = ("Smith", "Okafor", "Nakamura", "Garcia", "Novak", "Haddad", "Larsen", "Mensah", "Rossi", "Khan")
+BATCH_SIZE = 5000
+
+
+def random_title(rng):
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 5)))
+
+
+def seed(count):
+    rng = random.Random(42)
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Books WHERE ISBN LIKE %s", (f"{ISBN_PREFIX}%",))
+        start = cursor.fetchone()[0]
+        query = "INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)"
+        for offset in range(start, count, BATCH_SIZE):
+            rows = [(random_title(rng), f"{rng.choice(SURNAMES)} {rng.choice(WORDS).capitalize()}", "Benchmark",
+                     f"{ISBN_PREFIX}{n}", rng.randint(0, 5))
+                    for n in range(offset, min(offset + BATCH_SIZE, count))]
+            cursor.executemany(query, rows)
+            mysql.connection.commit()
+            print(f"seeded {offset + len(rows)}/{count}", end="\r")
+        cursor.close()
+    print()
+
+
+def cleanup():
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("DELETE FROM Books WHERE ISBN LIKE %s", (f"{ISBN_PREFIX}%",))
+        mysql.connection.commit()
+        print(f"removed {cursor.rowcount} benchmark books")
+        cursor.close()
+
+
+def bench(queries):
+    rng = random.Random(7)
+    client = app.test_client()
+    timings = []
+    for _ in range(queries):
+        # As-you-type style queries: one or two words, the last one truncated
+        words = rng.sample(WORDS, rng.randint(1, 2))
+        words[-1] = words[-1][:rng.randint(3, len(words[-1]))]
+        started = time.perf_counter()
+        response = client.get("/api/books/search", query_string={"q": " ".join(words), "limit": 50})
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+
+    timings.sort()
+    print(f"{queries} searches: mean {statistics.mean(timings):.2f} ms, "
+          f"p50 {timings[len(timings) // 2]:.2f} ms, p95 {timings[int(len(timings) * 0.95)]:.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, metavar="N", help="Grow the synthetic catalog to N books")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the synthetic catalog and exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if args.seed:
+        seed(args.seed)
+    bench(args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure the per-row cost of mapping and serializing lending rows.
+
+Compares the old per-row dicts (strftime on every date, stdlib encoder with
+sorted keys, as Flask's default provider did) against BookLoanRecord records
+serialized by json_provider.py, with the stdlib encoder and with orjson when
+it is installed. Rows are generated in memory, so no database is needed:
+
+    python benchmarks/bench_serialization.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from json_provider import _default, orjson  # noqa: E402
+from models.lending import BookLoanRecord  # noqa: E402
+from models.rows import map_rows  # noqa: E402
+
+MEMORY_SAMPLE_ROWS = 100000  # Rows mapped under tracemalloc to measure bytes per row
+
+
+def make_rows(count):
+    """Tuples shaped like iter_book_borrowing_history's query rows."""
+    start = date(2020, 1, 1)
+    rows = []
+    for lend_id in range(1, count + 1):
+        issued = start + timedelta(days=lend_id % 1500)
+        returned = issued + timedelta(days=lend_id % 20) if lend_id % 10 else None
+        rows.append((lend_id, f"Member {lend_id % 5000}", issued, issued + timedelta(days=14), returned))
+    return rows
+
+
+def legacy_dicts(rows):
+    return [{
+        "LendID": record[0],
+        "MemberName": record[1],
+        "IssueDate": record[2].strftime("%Y-%m-%d") if record[2] else None,
+        "DueDate": record[3].strftime("%Y-%m-%d") if record[3] else None,
+        "ReturnDate": record[4].strftime("%Y-%m-%d") if record[4] else None
+    } for record in rows]
+
+
+def records(rows):
+    return list(map_rows(BookLoanRecord, rows))
+
+
+def timed(func, arg):
+    started = time.perf_counter()
+    result = func(arg)
+    return result, time.perf_counter() - started
+
+
+def bytes_per_row(func, rows):
+    sample = rows[:MEMORY_SAMPLE_ROWS]
+    tracemalloc.start()
+    mapped = func(sample)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del mapped
+    return size / len(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    encoders = [
+        ("dicts, stdlib (old)", legacy_dicts,
+         lambda mapped: json.dumps(mapped, default=DefaultJSONProvider.default, sort_keys=True, separators=(",", ":"))),
+        ("records, stdlib", records,
+         lambda mapped: json.dumps(mapped, default=_default, separators=(",", ":"))),
+    ]
+    if orjson is not None:
+        encoders.append(("records, orjson", records,
+                         lambda mapped: orjson.dumps(mapped, default=_default, option=orjson.OPT_NON_STR_KEYS)))
+    else:
+        print("orjson is not installed; skipping it")
+
+    print(f"{'':22} {'map ns/row':>11} {'encode ns/row':>14} {'total ns/row':>13} {'bytes/row':>10}")
+    for name, mapper, encode in encoders:
+        mapped, map_seconds = timed(mapper, rows)
+        _, encode_seconds = timed(encode, mapped)
+        del mapped
+        per_row = 1e9 / len(rows)
+        print(f"{name:22} {map_seconds * per_row:11.0f} {encode_seconds * per_row:14.0f} "
+              f"{(map_seconds + encode_seconds) * per_row:13.0f} {bytes_per_row(mapper, rows):10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the size of /api/lending/records payloads by wire format and encoding.
+
+Serves generated lending rows through stream_json() and the Compression
+extension on a bare Flask app, so no database is needed, and reports the
+body size of: objects (one JSON object per row), the default arrays, and
+?format=columns, each sent as is and with every encoding compression.py
+can produce here:
+
+    python benchmarks/bench_wire_format.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from compression import Compression  # noqa: E402
+from db_config import create_app  # noqa: E402
+from json_provider import FastJSONProvider  # noqa: E402
+from models.lending import LOAN_COLUMNS  # noqa: E402
+from routes.streaming import stream_json  # noqa: E402
+
+
+def make_rows(count):
+    """Tuples shaped like iter_lending_records' query rows."""
+    start = date(2020, 1, 1)
+    rows = []
+    for lend_id in range(1, count + 1):
+        issued = start + timedelta(days=lend_id % 1500)
+        returned = issued + timedelta(days=lend_id % 20) if lend_id % 10 else None
+        rows.append((lend_id, f"Book title {lend_id % 20000}", f"Member {lend_id % 5000}",
+                     issued, issued + timedelta(days=14), returned))
+    return rows
+
+
+def make_app(rows):
+    app = Flask(__name__)
+    app.config.update({key: value for key, value in create_app().config.items() if key.startswith('COMPRESS_')})
+    app.json = FastJSONProvider(app)
+    compression = Compression(app)
+
+    @app.route('/records')
+    def records():
+        return stream_json(iter(rows), "lending records", LOAN_COLUMNS)
+
+    @app.route('/objects')
+    def objects():
+        return stream_json((dict(zip(LOAN_COLUMNS, row)) for row in rows), "lending records")
+
+    return app, compression
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    app, compression = make_app(make_rows(args.rows))
+    client = app.test_client()
+    formats = [("objects", "/objects"), ("arrays", "/records"), ("columns", "/records?format=columns")]
+    encodings = ("identity",) + compression.encodings()
+
+    baseline = None
+    print(f"{'':10} {'encoding':>9} {'bytes':>12} {'bytes/row':>10} {'vs objects':>11} {'seconds':>8}")
+    for name, path in formats:
+        for encoding in encodings:
+            started = time.perf_counter()
+            response = client.get(path, headers={"Accept-Encoding": encoding})
+            size = len(response.get_data())
+            elapsed = time.perf_counter() - started
+            baseline = baseline or size
+            print(f"{name:10} {response.headers.get('Content-Encoding', 'identity'):>9} {size:12d} "
+                  f"{size / args.rows:10.1f} {baseline / size:10.1f}x {elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
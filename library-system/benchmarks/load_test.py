@@ -0,0 +1,119 @@
+"""
+Measure how HTTP throughput scales with gunicorn worker processes.
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py wsgi:app` on a
+local port, drives one endpoint for --duration seconds from --clients
+keep-alive connections (spread over several client processes, so the load
+generator is not held back by one GIL), reports requests/second and latency,
+then stops the server. Runs against the local MySQL configured in
+db_config.py; Linux/macOS only, as gunicorn is:
+
+    python benchmarks/load_test.py --workers 1 2 4 8 --clients 64 --path "/api/books/all?limit=100"
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TIMEOUT = 30  # Seconds to wait for the server to answer
+
+
+def start_server(workers, threads, port):
+    command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+               "--threads", str(threads), "--bind", f"127.0.0.1:{port}", "--max-requests", "0",
+               "--access-logfile", "/dev/null", "wsgi:app"]
+    server = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api/stats/pool")  # Answers without touching the database
+            connection.getresponse().read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f"Server with {workers} workers did not start within {STARTUP_TIMEOUT}s")
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)  # Graceful shutdown
+    server.wait()
+
+
+def client(port, path, duration):
+    """One keep-alive connection sending GETs until the deadline; returns (latencies, errors)."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Accept-Encoding": "gzip"}
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        if response.status != 200:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    return latencies, errors
+
+
+def client_process(port, path, duration, connections):
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        results = [f.result() for f in [executor.submit(client, port, path, duration) for _ in range(connections)]]
+    return [latency for r in results for latency in r[0]], sum(r[1] for r in results)
+
+
+def run(port, path, duration, clients, processes):
+    per_process = [clients // processes + (1 if n < clients % processes else 0) for n in range(processes)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = [f.result() for f in [executor.submit(client_process, port, path, duration, connections)
+                                        for connections in per_process if connections]]
+    latencies = sorted(latency for r in results for latency in r[0])
+    return latencies, sum(r[1] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 2])
+    parser.add_argument("--threads", type=int, default=4, help="Threads per worker")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent keep-alive connections")
+    parser.add_argument("--client-processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--path", default="/api/books/all?limit=100")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for workers in sorted(set(args.workers)):
+        server = start_server(workers, args.threads, args.port)
+        try:
+            latencies, errors = run(args.port, args.path, args.duration, args.clients, args.client_processes)
+        finally:
+            stop_server(server)
+        if not latencies:
+            print(f"{workers:7d} {'-':>9} {'-':>8} {'-':>8} {'-':>8} {errors:7d}")
+            continue
+        throughput = len(latencies) / args.duration
+        baseline = baseline or throughput
+        print(f"{workers:7d} {throughput:9.1f} {throughput / baseline:7.2f}x "
+              f"{latencies[len(latencies) // 2] * 1000:8.2f} {latencies[int(len(latencies) * 0.99)] * 1000:8.2f} "
+              f"{errors:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Only needed for CACHE_BACKEND = 'redis'
+    redis = None
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+GENERATION_TTL = 3600  # Seconds an invalidation stamp is kept; far longer than any load takes
+
+
+class LocalLRUBackend:
+    """In-process LRU cache with per-entry TTL. Each worker process has its own copy."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self.generations = OrderedDict()  # key -> stamp of its last invalidation, oldest first
+        self.last_generation = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value)."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl):
+        """Caller holds the lock."""
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+                # A fresh stamp each time, so a forgotten stamp can never come back equal
+                self.last_generation += 1
+                self.generations[key] = self.last_generation
+                self.generations.move_to_end(key)
+            while len(self.generations) > self.max_entries:
+                self.generations.popitem(last=False)
+
+    def generation(self, key):
+        with self.lock:
+            return self.generations.get(key, 0)
+
+    def set_if_generation(self, key, value, ttl, generation):
+        """Store value only if key was not invalidated since generation() returned `generation`."""
+        with self.lock:
+            if self.generations.get(key, 0) != generation:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def size(self):
+        return len(self.entries)
+
+    def eviction_count(self):
+        return self.evictions
+
+
+class NullBackend:
+    """Caches nothing: every lookup goes to the database."""
+
+    def get(self, key):
+        return False, None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def generation(self, key):
+        return 0
+
+    def set_if_generation(self, key, value, ttl, generation):
+        return False
+
+    def size(self):
+        return 0
+
+    def eviction_count(self):
+        return 0
+
+
+class RedisBackend:
+    """Cache shared by every worker through a Redis-compatible server."""
+
+    # Set KEYS[1] only while the generation stamp KEYS[2] still equals ARGV[2]
+    SET_IF_GENERATION = """
+        if (redis.call('GET', KEYS[2]) or '0') == ARGV[2] then
+            redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+            return 1
+        end
+        return 0
+    """
+
+    def __init__(self, url, prefix="library:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND 'redis' requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.set_if_generation_script = self.client.register_script(self.SET_IF_GENERATION)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return False, None
+        return True, pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        stamp = self.client.incr(self.prefix + "generation")  # Shared counter: stamps never repeat
+        pipeline = self.client.pipeline()
+        pipeline.delete(*(self.prefix + key for key in keys))
+        for key in keys:
+            pipeline.set(self._generation_key(key), stamp, ex=GENERATION_TTL)
+        pipeline.execute()
+
+    def _generation_key(self, key):
+        return f"{self.prefix}gen:{key}"
+
+    def generation(self, key):
+        return int(self.client.get(self._generation_key(key)) or 0)
+
+    def set_if_generation(self, key, value, ttl, generation):
+        keys = [self.prefix + key, self._generation_key(key)]
+        return bool(self.set_if_generation_script(keys=keys, args=[pickle.dumps(value), str(generation), ttl]))
+
+    def size(self):
+        return self.client.dbsize()
+
+    def eviction_count(self):
+        return self.client.info("stats").get("evicted_keys", 0)
+
+
+class Cache:
+    """
+    Read-through cache used by the models for single-row lookups: book by ID
+    and ISBN (/books/isbn) and member by ID (/members/id). The lend and
+    return paths read the same rows with SELECT ... FOR UPDATE inside their
+    transactions, so they always go to the database and only invalidate.
+
+    Every invalidation stamps the key with a new generation. get_or_load()
+    notes the generation before calling the loader and only stores the result
+    if it is unchanged, so a load that raced with a write cannot put the old
+    row back after the write's invalidation.
+
+    Backend errors are logged and treated as misses so a cache outage only
+    costs speed, never correctness.
+
+    The 'local' backend is only correct in a single process: a write in one
+    worker cannot invalidate another worker's copy. gunicorn.conf.py turns
+    caching off (NullBackend) when several workers run with it.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['CACHE_TTL']
+        if app.config['CACHE_BACKEND'] == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        elif app.config['CACHE_BACKEND'] == 'none':
+            self.backend = NullBackend()
+        else:
+            self.backend = LocalLRUBackend(app.config['CACHE_MAX_ENTRIES'])
+
+    def _count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        """Return (found, value) for key."""
+        try:
+            found, value = self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache get failed for {key}: {str(e)}")
+            return False, None
+        self._count("hits" if found else "misses")
+        return found, value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache set failed for {key}: {str(e)}")
+
+    def generation(self, key):
+        """Invalidation stamp of key, for set_if_unchanged(); None if the backend failed."""
+        try:
+            return self.backend.generation(key)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache generation read failed for {key}: {str(e)}")
+            return None
+
+    def set_if_unchanged(self, key, value, generation):
+        """Store value unless key was invalidated since generation(key) returned `generation`."""
+        if generation is None:
+            return
+        try:
+            self.backend.set_if_generation(key, value, self.ttl, generation)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache set failed for {key}: {str(e)}")
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss. None results are not cached."""
+        found, value = self.get(key)
+        if found:
+            return value
+        generation = self.generation(key)  # Before the loader reads the database
+        value = loader()
+        if value is not None:
+            self.set_if_unchanged(key, value, generation)
+        return value
+
+    def invalidate(self, *keys):
+        try:
+            self.backend.delete(*keys)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache invalidation failed for {keys}: {str(e)}")
+
+    def disable(self):
+        """Stop caching; every lookup goes to the database from now on."""
+        self.backend = NullBackend()
+
+    def stats(self):
+        """Hit/miss/eviction counters."""
+        try:
+            size, evictions = self.backend.size(), self.backend.eviction_count()
+        except Exception as e:
+            logger.warning(f"Cache stats unavailable: {str(e)}")
+            size, evictions = None, None
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": evictions,
+                "errors": self.errors,
+                "entries": size,
+            }
+
+
+def book_key(book_id):
+    return f"book:{book_id}"
+
+def book_isbn_key(isbn):
+    return f"book-isbn:{isbn}"
+
+def member_key(member_id):
+    return f"member:{member_id}"
+
+cache = Cache()
@@ -0,0 +1,103 @@
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip and deflate need only the standard library
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/plain", "text/csv", "text/html"}
+
+
+class Compression:
+    """
+    Flask extension compressing response bodies with the best encoding the
+    client accepts: br (when the brotli package is installed), gzip or deflate.
+
+    Buffered bodies are compressed whole, and left alone when smaller than
+    COMPRESS_MIN_SIZE. Streamed bodies (routes/streaming.py) are compressed
+    chunk by chunk as they are generated, so memory stays flat. A strong ETag
+    becomes weak on a compressed response, because the bytes differ from the
+    identity encoding; routes/conditional.py compares ETags weakly.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config['COMPRESS_ENABLED']
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.level = app.config['COMPRESS_LEVEL']
+        self.brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+        app.after_request(self.after_request)
+
+    def encodings(self):
+        """Encodings this server can produce, in order of preference"""
+        return ("br", "gzip", "deflate") if brotli is not None else ("gzip", "deflate")
+
+    def negotiate(self):
+        """The encoding to use for this request, or None to send the body as is"""
+        return request.accept_encodings.best_match(self.encodings())
+
+    def compressor(self, encoding):
+        """(compress, flush) functions of a new compressor for `encoding`"""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        # gzip framing for gzip, zlib framing for deflate (as HTTP defines it)
+        wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, wbits)
+        return compressor.compress, compressor.flush
+
+    def after_request(self, response):
+        if (not self.enabled or request.method == "HEAD" or response.status_code < 200
+                or response.status_code in (204, 206, 304) or response.direct_passthrough
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES or "Content-Encoding" in response.headers):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            body = response.response
+            response.response = self.compress_stream(response.iter_encoded(), encoding, getattr(body, "close", None))
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            compress, flush = self.compressor(encoding)
+            response.set_data(compress(body) + flush())
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def compress_stream(self, chunks, encoding, close=None):
+        """
+        Compress an iterable of byte chunks lazily. `close` releases the
+        original body (e.g. a server-side cursor) if the client goes away.
+        """
+        compress, flush = self.compressor(encoding)
+        try:
+            for chunk in chunks:
+                compressed = compress(chunk)
+                if compressed:  # The compressor buffers until it has a block's worth
+                    yield compressed
+            yield flush()
+        finally:
+            if close is not None:
+                close()
+
+
+compression = Compression()
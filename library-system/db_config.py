@@ -1,5 +1,10 @@
-from flask import Flask
-from flask_mysqldb import MySQL
+import os
+import threading
+
+from flask import Flask, current_app, g
+import MySQLdb
+
+from db_pool import ConnectionPool
 
 def create_app():
     app = Flask(__name__)
@@ -7,6 +12,135 @@ def create_app():
     app.config['MYSQL_USER'] = 'root'
     app.config['MYSQL_PASSWORD'] = ''
     app.config['MYSQL_DB'] = 'LibrarySystem'
+    app.config['MYSQL_PORT'] = 3306
+    app.config['MYSQL_CHARSET'] = 'utf8'
+
+    # Connection pool settings (seconds for the timeouts)
+    app.config['MYSQL_POOL_ENABLED'] = True
+    app.config['MYSQL_POOL_MIN_SIZE'] = 2
+    app.config['MYSQL_POOL_MAX_SIZE'] = 10
+    app.config['MYSQL_POOL_IDLE_TIMEOUT'] = 300
+    app.config['MYSQL_POOL_WAIT_TIMEOUT'] = 5
+    app.config['MYSQL_POOL_PING_INTERVAL'] = 30
+
+    # Read-through cache for single book/member lookups ('local', 'redis' or 'none').
+    # 'local' is per process: under gunicorn with several workers it is turned
+    # off (see gunicorn.conf.py), so use 'redis' there to keep the cache.
+    app.config['CACHE_BACKEND'] = 'local'
+    app.config['CACHE_TTL'] = 300
+    app.config['CACHE_MAX_ENTRIES'] = 10000
+    app.config['CACHE_REDIS_URL'] = 'redis://localhost:6379/0'
+
+    # In-process barcode index behind /api/circulation/scan (entries, seconds)
+    app.config['CIRCULATION_INDEX_SIZE'] = 200000
+    app.config['CIRCULATION_INDEX_TTL'] = 600
+
+    # Background daily jobs (scheduler.py); times are local "HH:MM"
+    app.config['SCHEDULER_ENABLED'] = True
+    app.config['OVERDUE_REFRESH_AT'] = '00:05'
+    app.config['FINE_ACCRUAL_AT'] = '00:10'
+    app.config['ACTIVE_LOANS_RECONCILE_AT'] = '03:00'
+
+    # Response compression (compression.py): bodies below the minimum size (bytes) are sent as is
+    app.config['COMPRESS_ENABLED'] = True
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_LEVEL'] = 6
+    app.config['COMPRESS_BROTLI_QUALITY'] = 4
+
+    # Production WSGI server (wsgi.py, gunicorn.conf.py); each worker process has its own pool and cache
+    app.config['WSGI_BIND'] = '0.0.0.0:8000'
+    app.config['WSGI_WORKERS'] = os.cpu_count() or 2
+    app.config['WSGI_THREADS'] = 4  # Per worker; keep at or below MYSQL_POOL_MAX_SIZE
+    app.config['WSGI_TIMEOUT'] = 60  # Seconds before a silent worker is killed and replaced
+    app.config['WSGI_GRACEFUL_TIMEOUT'] = 30  # Seconds workers get to finish requests on reload/stop
+    app.config['WSGI_MAX_REQUESTS'] = 10000  # Recycle a worker after this many requests (0 = never)
+    app.config['WSGI_MAX_REQUESTS_JITTER'] = 1000  # So the workers do not all recycle at once
+
+    # Barcode label rendering: disk cache / job directory, render processes, job lifetime (seconds)
+    app.config['LABEL_CACHE_DIR'] = os.path.join(app.root_path, 'label_cache')
+    app.config['LABEL_WORKERS'] = None  # Per server process; None = the CPU count, split across gunicorn workers
+    app.config['LABEL_JOB_TTL'] = 86400
+    app.config['LABEL_JOB_STALE_AFTER'] = 600  # Seconds without progress before another host's job counts as dead
     return app
 
-mysql = MySQL()
+
+class PooledMySQL:
+    """
+    Flask extension exposing `mysql.connection` like flask_mysqldb.MySQL, but
+    backed by a ConnectionPool: the first access in an app context checks a
+    connection out and the app context teardown hands it back.
+
+    The pool belongs to the process that created it. A process forked from
+    it (a pre-fork server's worker) starts with a fresh, empty pool, so two
+    processes never share a MySQL socket or a lock held at fork time.
+    """
+
+    def __init__(self, app=None):
+        self.pool = None
+        self.config = None
+        self.pid = None
+        self.fork_lock = threading.Lock()  # Only ever taken in a forked child, so never held across a fork
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.config = app.config
+        self.pool = self.create_pool()
+        app.teardown_appcontext(self.teardown)
+
+    def create_pool(self):
+        self.pid = os.getpid()
+        return ConnectionPool(
+            self.connect_args(self.config),
+            min_size=self.config['MYSQL_POOL_MIN_SIZE'],
+            max_size=self.config['MYSQL_POOL_MAX_SIZE'],
+            idle_timeout=self.config['MYSQL_POOL_IDLE_TIMEOUT'],
+            wait_timeout=self.config['MYSQL_POOL_WAIT_TIMEOUT'],
+            ping_interval=self.config['MYSQL_POOL_PING_INTERVAL'],
+        )
+
+    def check_pid(self):
+        """
+        In a forked child, replace the parent's pool. Its connections are
+        abandoned, not closed, since closing them would end the parent's sessions.
+        """
+        if self.pid != os.getpid():
+            with self.fork_lock:
+                if self.pid != os.getpid():
+                    self.pool = self.create_pool()
+
+    @staticmethod
+    def connect_args(config):
+        return {
+            'host': config['MYSQL_HOST'],
+            'user': config['MYSQL_USER'],
+            'passwd': config['MYSQL_PASSWORD'],
+            'db': config['MYSQL_DB'],
+            'port': config['MYSQL_PORT'],
+            'charset': config['MYSQL_CHARSET'],
+        }
+
+    @property
+    def connection(self):
+        """Connection bound to the current app context."""
+        if 'mysql_connection' not in g:
+            if current_app.config['MYSQL_POOL_ENABLED']:
+                self.check_pid()
+                g.mysql_connection = self.pool.acquire()
+                g.mysql_pooled = True
+            else:
+                g.mysql_connection = MySQLdb.connect(**self.connect_args(current_app.config))
+                g.mysql_pooled = False
+        return g.mysql_connection
+
+    def teardown(self, exception):
+        conn = g.pop('mysql_connection', None)
+        if conn is None:
+            return
+        if g.pop('mysql_pooled', False):
+            broken = isinstance(exception, MySQLdb.OperationalError)
+            self.pool.release(conn, discard=broken)
+        else:
+            conn.close()
+
+mysql = PooledMySQL()
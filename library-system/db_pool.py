@@ -0,0 +1,237 @@
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+import MySQLdb
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the wait timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQLdb connections.
+
+    :param connect_args: Keyword arguments passed to MySQLdb.connect().
+    :param min_size: Connections kept open even when idle.
+    :param max_size: Upper bound on open connections (idle + in use).
+    :param idle_timeout: Seconds after which an idle connection above min_size is closed.
+    :param wait_timeout: Seconds acquire() waits for a free connection before raising PoolTimeout.
+    :param ping_interval: Idle connections older than this are pinged before being handed out.
+    """
+
+    def __init__(self, connect_args, min_size=1, max_size=10, idle_timeout=300, wait_timeout=5, ping_interval=30):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.connect_args = connect_args
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.ping_interval = ping_interval
+
+        self._idle = deque()  # (connection, last_used) pairs, most recently used on the right
+        self._size = 0  # Open connections, idle or in use
+        self._in_use = 0
+        self._closed = False
+        self._filled = False
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+        self._stats = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "acquired": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "ping_failures": 0,
+        }
+
+    def _connect(self):
+        conn = MySQLdb.connect(**self.connect_args)
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled connection: {str(e)}")
+        with self._lock:
+            self._size -= 1
+            self._stats["connections_closed"] += 1
+            self._available.notify()
+
+    def _is_alive(self, conn):
+        try:
+            conn.ping()
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled connection failed health check: {str(e)}")
+            with self._lock:
+                self._stats["ping_failures"] += 1
+            return False
+
+    def fill(self):
+        """Open connections until min_size is reached."""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+                self._available.notify()
+
+    def acquire(self, timeout=None):
+        """Check a connection out of the pool, waiting up to `timeout` seconds for one to free up."""
+        if not self._filled:
+            # Open the min_size connections lazily so no sockets exist before the first request
+            self._filled = True
+            try:
+                self.fill()
+            except Exception as e:
+                logger.error(f"Error opening initial pool connections: {str(e)}")
+
+        timeout = self.wait_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            conn = None
+            create = False
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"No database connection available after {timeout}s "
+                                          f"({self._in_use} of {self.max_size} in use)")
+                    waited = True
+                    self._available.wait(remaining)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    raise
+            else:
+                idle_for = time.monotonic() - last_used
+                stale = idle_for > self.idle_timeout and self._size > self.min_size
+                if stale or (idle_for > self.ping_interval and not self._is_alive(conn)):
+                    with self._lock:
+                        self._in_use -= 1
+                    self._close(conn)
+                    continue
+
+            wait_time = time.monotonic() - started
+            with self._lock:
+                self._stats["acquired"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += wait_time
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+            return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool. Uncommitted work is rolled back."""
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding pooled connection that failed to roll back: {str(e)}")
+                discard = True
+
+        with self._lock:
+            self._in_use -= 1
+            if not discard and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                self._available.notify()
+                expired = self._expire_idle()
+            else:
+                expired = []
+
+        if discard or self._closed:
+            self._close(conn)
+        for stale in expired:
+            self._close(stale)
+
+    def _expire_idle(self):
+        """Pop idle connections past idle_timeout while staying at or above min_size. Caller holds the lock."""
+        expired = []
+        now = time.monotonic()
+        # The oldest idle connections sit on the left
+        while (self._idle and self._size - len(expired) > self.min_size
+               and now - self._idle[0][1] > self.idle_timeout):
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks a connection out and always gives it back."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except MySQLdb.OperationalError:
+            # The connection itself may be broken; do not hand it to anyone else
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def metrics(self):
+        """Snapshot of pool counters."""
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        return metrics
+
+    def close(self):
+        """Close every idle connection; connections in use are closed when released."""
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._available.notify_all()
+        for conn in idle:
+            self._close(conn)
@@ -0,0 +1,68 @@
+"""
+gunicorn settings for the production server (see wsgi.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Values come from the WSGI_* settings in db_config.py; gunicorn command-line
+options (e.g. --workers 8) override them.
+
+The app is loaded in each worker, not in the master (no preload), so a HUP
+reload picks up new code and no database connection is opened before the
+fork. Every worker runs its own scheduler; the daily jobs claim their run
+in ScheduledJobs, so each still runs once per day.
+
+Each worker renders the label jobs it accepted in its own process pool
+(labels.py); with LABEL_WORKERS unset the CPUs are split between the
+workers instead of every worker starting one render process per CPU. A job
+does not outlive its worker: when a worker is recycled (max_requests), HUP
+reloaded or stopped, worker_exit marks its unfinished jobs failed, and the
+jobs of a worker that was killed (timeout, or graceful_timeout ran out)
+are marked failed at the next poll. Clients resubmit; labels rendered
+before the worker went away are reused from the label cache.
+
+With more than one worker, CACHE_BACKEND 'local' would let each worker keep
+serving rows another worker has changed, so the cache is switched off in
+every worker instead; set CACHE_BACKEND = 'redis' to cache across workers.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_config import create_app  # noqa: E402
+
+config = create_app().config
+
+bind = config['WSGI_BIND']
+workers = config['WSGI_WORKERS']
+worker_class = 'gthread'
+threads = config['WSGI_THREADS']
+timeout = config['WSGI_TIMEOUT']
+graceful_timeout = config['WSGI_GRACEFUL_TIMEOUT']
+max_requests = config['WSGI_MAX_REQUESTS']
+max_requests_jitter = config['WSGI_MAX_REQUESTS_JITTER']
+preload_app = False
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    from cache import cache, LocalLRUBackend
+    from labels import labels
+    from scheduler import scheduler
+
+    if worker.cfg.workers > 1 and isinstance(cache.backend, LocalLRUBackend):
+        worker.log.warning("CACHE_BACKEND 'local' is per process; caching is off with %d workers. "
+                           "Set CACHE_BACKEND = 'redis' to share the cache.", worker.cfg.workers)
+        cache.disable()
+    if config['LABEL_WORKERS'] is None:
+        labels.workers = max(1, (os.cpu_count() or 2) // worker.cfg.workers)
+    scheduler.start()
+
+
+def worker_exit(server, worker):
+    from db_config import mysql
+    from labels import labels
+
+    labels.shutdown()
+    if mysql.pool is not None:
+        mysql.pool.close()
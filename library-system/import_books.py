@@ -0,0 +1,58 @@
+"""
+Import a book catalog from a CSV or tab-separated file.
+
+The file needs a header row with at least Title, Author and ISBN columns;
+Genre and Copies are optional. Rows whose ISBN is already in the catalog
+(or earlier in the file) are skipped.
+
+    python import_books.py catalog.csv
+    python import_books.py catalog.tsv --batch-size 5000 --no-barcodes
+"""
+import argparse
+import json
+import sys
+import time
+
+from app import app
+from models.book_import import IMPORT_BATCH_SIZE, read_catalog, import_books
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Catalog file to import")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows per insert batch and commit")
+    parser.add_argument("--no-barcodes", action="store_true", help="Do not generate barcodes for the copies")
+    parser.add_argument("--errors", metavar="FILE", help="Write the per-row errors to FILE as JSON")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+
+    def progress(report):
+        elapsed = time.monotonic() - started
+        print(f"\r{report['rows']} rows, {report['inserted']} inserted, {report['duplicates']} duplicates, "
+              f"{report['failed']} failed ({report['rows'] / elapsed:.0f} rows/s)", end="", flush=True)
+
+    with app.app_context(), open(args.path, encoding="utf-8-sig", newline="") as catalog:
+        try:
+            report = import_books(read_catalog(catalog), generate_barcodes=not args.no_barcodes,
+                                  batch_size=args.batch_size, progress=progress)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+    print()
+
+    print(f"Imported {report['inserted']} books and {report['barcodes']} barcodes "
+          f"in {time.monotonic() - started:.1f}s")
+    for error in report["errors"][:20]:
+        print(f"  line {error['line']} (ISBN {error['isbn']}): {error['error']}")
+    if report["failed"] > 20:
+        print(f"  ... {report['failed'] - 20} more errors")
+
+    if args.errors:
+        with open(args.errors, "w", encoding="utf-8") as errors_file:
+            json.dump(report["errors"], errors_file, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
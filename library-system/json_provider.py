@@ -0,0 +1,50 @@
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+from models.rows import as_dict, is_record
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is used without it
+    orjson = None
+
+
+def _default(o):
+    """Encode what the JSON encoder does not handle itself."""
+    if is_record(o):
+        return as_dict(o)
+    if isinstance(o, date):  # Also datetime
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)  # Decimal, UUID, dataclasses, ...
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Serializes responses with orjson when it is installed, otherwise with the
+    standard library like Flask's default provider.
+
+    Both paths encode dates as ISO 8601 (YYYY-MM-DD, or with a time for
+    datetimes), records from models/rows.py as objects and Decimal as a
+    string. orjson handles records and dates natively, so only Decimal
+    values reach _default() there. Keys keep their order instead of being sorted.
+    """
+
+    default = staticmethod(_default)
+    sort_keys = False
+    orjson_options = orjson.OPT_NON_STR_KEYS if orjson else 0  # Rows keyed by IDs
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:  # Callers passing encoder options get the stdlib encoder
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self.orjson_options).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.orjson_options | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=option), mimetype=self.mimetype)
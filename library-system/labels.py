@@ -0,0 +1,278 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from barcode import Code128
+from barcode.writer import ImageWriter
+from PIL import Image
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Sheet layout: A4 at 200 dpi with a 3 x 8 grid of 70 x 37 mm labels
+DPI = 200
+PAGE_SIZE = (1654, 2339)
+PAGE_MARGIN = (35, 45)
+GRID = (3, 8)
+LABELS_PER_PAGE = GRID[0] * GRID[1]
+CELL_PADDING = 12
+
+# Passed to python-barcode; changing them changes LABEL_STYLE so stale cache entries are not reused
+WRITER_OPTIONS = {"module_width": 0.25, "module_height": 10.0, "font_size": 8, "text_distance": 3.0,
+                  "quiet_zone": 2.0, "dpi": DPI}
+LABEL_STYLE = hashlib.sha1(json.dumps(WRITER_OPTIONS, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+
+HOSTNAME = socket.gethostname()
+UNFINISHED_STATES = ("rendering", "assembling")
+
+
+# The functions below run in the worker processes, so they only take plain arguments.
+
+def label_path(cache_dir, barcode):
+    """Cache file of the rendered label for `barcode`."""
+    digest = hashlib.sha1(f"{LABEL_STYLE}:{barcode}".encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "labels", digest[:2], f"{digest}.png")
+
+def render_label(cache_dir, barcode):
+    """Render one Code 128 label to the disk cache unless it is already there. Returns its path."""
+    path = label_path(cache_dir, barcode)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        Code128(barcode, writer=ImageWriter()).write(f, WRITER_OPTIONS)
+    os.replace(tmp_path, path)  # Atomic, so other processes never read half a file
+    return path
+
+def render_page(cache_dir, barcodes, out_path):
+    """Lay out up to LABELS_PER_PAGE labels on one bilevel sheet image."""
+    page = Image.new("1", PAGE_SIZE, 1)
+    cell_width = (PAGE_SIZE[0] - 2 * PAGE_MARGIN[0]) // GRID[0]
+    cell_height = (PAGE_SIZE[1] - 2 * PAGE_MARGIN[1]) // GRID[1]
+    box = (cell_width - 2 * CELL_PADDING, cell_height - 2 * CELL_PADDING)
+
+    for index, barcode in enumerate(barcodes):
+        with Image.open(render_label(cache_dir, barcode)) as label:
+            label = label.convert("1")
+            label.thumbnail(box)
+        column, row = index % GRID[0], index // GRID[0]
+        x = PAGE_MARGIN[0] + column * cell_width + (cell_width - label.width) // 2
+        y = PAGE_MARGIN[1] + row * cell_height + (cell_height - label.height) // 2
+        page.paste(label, (x, y))
+
+    tmp_path = f"{out_path}.tmp"
+    page.save(tmp_path, "PNG")
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def assemble_pdf(page_paths, out_path):
+    """Combine the page images into one PDF sheet."""
+    pages = [Image.open(path) for path in page_paths]
+    try:
+        tmp_path = f"{out_path}.tmp"
+        pages[0].save(tmp_path, "PDF", resolution=DPI, save_all=True, append_images=pages[1:])
+        os.replace(tmp_path, out_path)
+    finally:
+        for page in pages:
+            page.close()
+    return out_path
+
+
+class LabelService:
+    """
+    Renders label sheets in a process pool, off the API workers.
+
+    Jobs live on disk under LABEL_CACHE_DIR/jobs/<job_id>/, with a status.json
+    any worker process can read, so a job can be polled and downloaded through
+    whichever worker the request lands on. Rendered labels are cached under
+    LABEL_CACHE_DIR/labels/ keyed by barcode and reused by later sheets.
+
+    A job is driven by the server process that submitted it (its pool and
+    callbacks), and dies with it. status.json records that owner (host and
+    pid) and when it last wrote; a poll marks the job failed once the owner
+    is gone, or has been silent for LABEL_JOB_STALE_AFTER when it runs on
+    another host, and shutdown() fails the jobs of a process that exits.
+    """
+
+    def __init__(self, app=None):
+        self.cache_dir = None
+        self.workers = None
+        self.job_ttl = 86400
+        self.stale_after = 600
+        self.executor = None
+        self.active = {}  # job_id -> (status, job lock) of the jobs this process is running
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.cache_dir = os.path.abspath(app.config['LABEL_CACHE_DIR'])
+        self.workers = app.config['LABEL_WORKERS'] or os.cpu_count() or 2
+        self.job_ttl = app.config['LABEL_JOB_TTL']
+        self.stale_after = app.config['LABEL_JOB_STALE_AFTER']
+
+    def _pool(self):
+        # Started on first use and with "spawn", so no worker is forked from a threaded server
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+            return self.executor
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.cache_dir, "jobs", job_id)
+
+    def _write_status(self, job_id, status):
+        status["updated"] = time.time()
+        path = os.path.join(self._job_dir(job_id), "status.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(tmp_path, path)
+
+    def status(self, job_id):
+        """Status dictionary of a job, or None if there is no such job. Orphaned jobs are marked failed."""
+        try:
+            with open(os.path.join(self._job_dir(job_id), "status.json"), encoding="utf-8") as f:
+                status = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if status["state"] in UNFINISHED_STATES and self._orphaned(status):
+            logger.warning(f"Label job {job_id} was abandoned by process {status['pid']} on {status['host']}")
+            status.update(state="failed", error="The server process rendering this job stopped; submit it again.")
+            self._write_status(job_id, status)
+        return status
+
+    def _orphaned(self, status):
+        if "pid" not in status:
+            return True  # Written before jobs recorded their owner, by a process that has since been replaced
+        if status["host"] != HOSTNAME:
+            return time.time() - status["updated"] > self.stale_after
+        if status["pid"] == os.getpid():
+            return status["job_id"] not in self.active
+        if os.name == "nt":
+            return True  # A single server process on Windows (see wsgi.py): any other pid is gone
+        try:
+            os.kill(status["pid"], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # Alive, owned by another user
+        return False
+
+    def sheet_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), "sheet.pdf")
+
+    def page_path(self, job_id, page):
+        return os.path.join(self._job_dir(job_id), f"page-{page:05d}.png")
+
+    def render_label(self, barcode):
+        """Path of the cached PNG for a single barcode, rendering it in the pool if needed."""
+        path = label_path(self.cache_dir, barcode)
+        if os.path.exists(path):
+            return path
+        return self._pool().submit(render_label, self.cache_dir, barcode).result()
+
+    def submit(self, barcodes, title=None):
+        """
+        Start rendering a sheet for `barcodes` and return the job id right away.
+        Each page is rendered by its own pool task; the PDF is assembled once
+        they have all finished.
+        """
+        self.expire_jobs()
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job_id))
+
+        pages = [barcodes[start:start + LABELS_PER_PAGE] for start in range(0, len(barcodes), LABELS_PER_PAGE)]
+        status = {"job_id": job_id, "title": title, "state": "rendering", "labels": len(barcodes),
+                  "pages": len(pages), "pages_done": 0, "error": None, "created": time.time(),
+                  "host": HOSTNAME, "pid": os.getpid()}
+        job_lock = threading.RLock()  # sheet_done can run inside page_done if the PDF is already done
+        with self.lock:
+            self.active[job_id] = (status, job_lock)
+        self._write_status(job_id, status)
+
+        pool = self._pool()
+
+        def page_done(future):
+            with job_lock:
+                if status["state"] != "rendering":
+                    return
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"Label job {job_id} failed rendering a page: {error}")
+                    status.update(state="failed", error=str(error))
+                else:
+                    status["pages_done"] += 1
+                    if status["pages_done"] == len(pages):
+                        status["state"] = "assembling"
+                        page_paths = [self.page_path(job_id, number) for number in range(len(pages))]
+                        pool.submit(assemble_pdf, page_paths, self.sheet_path(job_id)).add_done_callback(sheet_done)
+                self._write_status(job_id, status)
+                if status["state"] == "failed":
+                    self._finished(job_id)  # After the write, so a poll here never sees it unowned
+
+        def sheet_done(future):
+            with job_lock:
+                if status["state"] != "assembling":
+                    return
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"Label job {job_id} failed assembling the sheet: {error}")
+                    status.update(state="failed", error=str(error))
+                else:
+                    status["state"] = "done"
+                self._write_status(job_id, status)
+                self._finished(job_id)
+
+        for number, page_barcodes in enumerate(pages):
+            future = pool.submit(render_page, self.cache_dir, page_barcodes, self.page_path(job_id, number))
+            future.add_done_callback(page_done)
+        return job_id
+
+    def _finished(self, job_id):
+        with self.lock:
+            self.active.pop(job_id, None)
+
+    def shutdown(self):
+        """
+        Fail the jobs this process is still running and stop its pool, for a
+        server process that is exiting (see gunicorn.conf.py). Labels already
+        rendered stay cached, so a resubmitted job only renders the rest.
+        """
+        with self.lock:
+            active, self.active = list(self.active.items()), {}
+            executor, self.executor = self.executor, None
+        for job_id, (status, job_lock) in active:
+            with job_lock:
+                if status["state"] in UNFINISHED_STATES:
+                    status.update(state="failed", error="The server process rendering this job stopped; submit it again.")
+                    self._write_status(job_id, status)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def expire_jobs(self):
+        """Delete job directories older than LABEL_JOB_TTL. Cached labels are kept."""
+        jobs_dir = os.path.join(self.cache_dir, "jobs")
+        if not os.path.isdir(jobs_dir):
+            return
+        cutoff = time.time() - self.job_ttl
+        for job_id in os.listdir(jobs_dir):
+            path = os.path.join(jobs_dir, job_id)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path)
+            except OSError as e:
+                logger.warning(f"Could not remove expired label job {job_id}: {str(e)}")
+
+labels = LabelService()
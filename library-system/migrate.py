@@ -0,0 +1,123 @@
+"""
+Apply the schema migrations in migrations/ to the database configured in
+db_config.py.
+
+Migrations are numbered SQL files (NNNN_description.sql) applied in order;
+the applied versions are recorded in the SchemaVersion table, so running this
+again only applies new files.
+
+    python migrate.py              # apply pending migrations
+    python migrate.py --status     # list applied and pending migrations
+    python migrate.py --baseline 5 # record 1..5 as applied without running them
+                                   # (for databases set up from the old sql/ scripts)
+"""
+import argparse
+import os
+import re
+import sys
+
+import MySQLdb
+
+from db_config import create_app, PooledMySQL
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Return [(version, name, path)] sorted by version."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Two migrations share a version number")
+    return migrations
+
+
+def split_statements(sql):
+    """Split a migration file into statements, dropping -- comments."""
+    lines = [re.sub(r"--.*$", "", line) for line in sql.splitlines()]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaVersion (
+            Version INT NOT NULL PRIMARY KEY,
+            Name VARCHAR(255) NOT NULL,
+            AppliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT Version FROM SchemaVersion")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(connection, baseline=None, log=print):
+    """
+    Apply every pending migration. MySQL commits DDL implicitly, so a
+    migration is recorded only after all of its statements succeeded; if one
+    fails, fix the file (or the database) and run again.
+
+    :return: Versions applied (or recorded, with baseline).
+    """
+    cursor = connection.cursor()
+    try:
+        ensure_version_table(cursor)
+        done = applied_versions(cursor)
+        applied = []
+        for version, name, path in discover_migrations():
+            if version in done:
+                continue
+            if baseline is not None and version <= baseline:
+                log(f"Recording {version:04d}_{name} as applied")
+            else:
+                log(f"Applying {version:04d}_{name}")
+                with open(path, encoding="utf-8") as f:
+                    for statement in split_statements(f.read()):
+                        cursor.execute(statement)
+            cursor.execute("INSERT INTO SchemaVersion (Version, Name) VALUES (%s, %s)", (version, name))
+            connection.commit()
+            applied.append(version)
+        return applied
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations")
+    parser.add_argument("--baseline", type=int, metavar="VERSION",
+                        help="Record migrations up to VERSION as applied without running them")
+    args = parser.parse_args()
+
+    app = create_app()
+    connection = MySQLdb.connect(**PooledMySQL.connect_args(app.config))
+    try:
+        if args.status:
+            cursor = connection.cursor()
+            ensure_version_table(cursor)
+            done = applied_versions(cursor)
+            cursor.close()
+            for version, name, _ in discover_migrations():
+                print(f"{'applied' if version in done else 'pending'}  {version:04d}_{name}")
+            return 0
+
+        applied = migrate(connection, baseline=args.baseline)
+        print(f"{len(applied)} migration(s) applied" if applied else "Database is up to date")
+        return 0
+    except MySQLdb.Error as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
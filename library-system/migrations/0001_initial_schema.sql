@@ -0,0 +1,44 @@
+-- Base schema. Written with IF NOT EXISTS so it can be applied to databases
+-- that were created by hand before migrations existed.
+CREATE TABLE IF NOT EXISTS Books (
+    BookID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Title VARCHAR(255) NOT NULL,
+    Author VARCHAR(255) NOT NULL,
+    Genre VARCHAR(100) NULL,
+    ISBN VARCHAR(20) NOT NULL,
+    Copies INT NOT NULL DEFAULT 0,  -- Copies currently available; lending decrements it
+    UNIQUE INDEX ux_books_isbn (ISBN)
+);
+
+CREATE TABLE IF NOT EXISTS Members (
+    MemberID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Name VARCHAR(255) NOT NULL,
+    Contact VARCHAR(255) NULL,
+    JoinDate DATE NOT NULL DEFAULT (CURRENT_DATE)
+);
+
+CREATE TABLE IF NOT EXISTS Lending (
+    LendID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    BookID INT NOT NULL,
+    MemberID INT NOT NULL,
+    IssueDate DATE NOT NULL DEFAULT (CURRENT_DATE),
+    DueDate DATE NOT NULL,
+    ReturnDate DATE NULL,
+    CONSTRAINT fk_lending_book FOREIGN KEY (BookID) REFERENCES Books (BookID),
+    CONSTRAINT fk_lending_member FOREIGN KEY (MemberID) REFERENCES Members (MemberID)
+);
+
+CREATE TABLE IF NOT EXISTS Barcodes (
+    BarcodeID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    BookID INT NOT NULL,
+    Barcode VARCHAR(64) NOT NULL,
+    IsBorrowed BOOLEAN NOT NULL DEFAULT FALSE,
+    CONSTRAINT fk_barcodes_book FOREIGN KEY (BookID) REFERENCES Books (BookID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Librarians (
+    LibrarianID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Username VARCHAR(100) NOT NULL,
+    PasswordHash VARCHAR(255) NOT NULL,
+    UNIQUE INDEX ux_librarians_username (Username)
+);
@@ -0,0 +1,12 @@
+-- Per-table change versions behind the ETags of the list endpoints.
+-- models/versions.py bumps a row in the same transaction as every write to the table.
+CREATE TABLE IF NOT EXISTS TableVersions (
+    TableName VARCHAR(64) NOT NULL PRIMARY KEY,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO TableVersions (TableName, Version) VALUES
+    ('Books', 0),
+    ('Members', 0),
+    ('Lending', 0),
+    ('Barcodes', 0);
@@ -0,0 +1,6 @@
+-- FULLTEXT indexes used by advanced_search_books() in models/books.py.
+-- MATCH() can only use an index whose column list matches exactly, so the
+-- combined title/author search and the per-column filters each get one.
+ALTER TABLE Books ADD FULLTEXT INDEX ft_books_title_author (Title, Author);
+ALTER TABLE Books ADD FULLTEXT INDEX ft_books_title (Title);
+ALTER TABLE Books ADD FULLTEXT INDEX ft_books_author (Author);
@@ -0,0 +1,9 @@
+-- Single-row counter the barcode allocator in models/books.py reserves ranges from.
+-- Barcodes are "LIB" + the zero-padded sequence number, so they never collide
+-- with each other or with the older "#_<title>_<book>_<copy>" barcodes.
+CREATE TABLE IF NOT EXISTS BarcodeSequence (
+    ID TINYINT UNSIGNED NOT NULL PRIMARY KEY,
+    NextValue BIGINT UNSIGNED NOT NULL
+);
+
+INSERT IGNORE INTO BarcodeSequence (ID, NextValue) VALUES (1, 1);
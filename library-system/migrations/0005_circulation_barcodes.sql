@@ -0,0 +1,10 @@
+-- Barcode scan fast path (models/circulation.py).
+-- Each copy points at its open loan, and each loan records the copy it was
+-- issued on, so a scan updates exactly one Lending row.
+ALTER TABLE Barcodes
+    ADD COLUMN CurrentLendID INT NULL,
+    ADD UNIQUE INDEX ux_barcodes_barcode (Barcode),
+    ADD INDEX ix_barcodes_current_lend (CurrentLendID);
+
+ALTER TABLE Lending
+    ADD COLUMN Barcode VARCHAR(64) NULL;
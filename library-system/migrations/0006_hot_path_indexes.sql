@@ -0,0 +1,17 @@
+-- Composite indexes for the hot queries in models/ (checked by test_query_plans.py).
+
+-- Active-loan count per member (check_borrow_limit, bulk_lend_books) and a
+-- member's overdue loans: equality on MemberID and ReturnDate IS NULL, then
+-- DueDate, all answered from the index alone.
+ALTER TABLE Lending ADD INDEX ix_lending_member_open (MemberID, ReturnDate, DueDate);
+
+-- Active loans, overdue loans and the dashboard counters:
+-- ReturnDate IS NULL then a range on DueDate.
+ALTER TABLE Lending ADD INDEX ix_lending_open_due (ReturnDate, DueDate);
+
+-- Popularity (open loans per book) in advanced_search_books and a book's history.
+ALTER TABLE Lending ADD INDEX ix_lending_book_open (BookID, ReturnDate);
+
+-- Member name prefix search and the genre prefix filter.
+ALTER TABLE Members ADD INDEX ix_members_name (Name);
+ALTER TABLE Books ADD INDEX ix_books_genre (Genre);
@@ -0,0 +1,23 @@
+-- Precomputed overdue loans (models/overdue.py). Rebuilt once a day by the
+-- scheduler and trimmed as loans are returned, so reading the overdue list
+-- or count never has to evaluate DueDate < CURDATE() over Lending.
+CREATE TABLE IF NOT EXISTS OverdueLoans (
+    LendID INT NOT NULL PRIMARY KEY,
+    BookID INT NOT NULL,
+    MemberID INT NOT NULL,
+    IssueDate DATE NOT NULL,
+    DueDate DATE NOT NULL,
+    DaysOverdue INT NOT NULL,
+    Fine DECIMAL(10, 2) NOT NULL,
+    INDEX ix_overdue_member (MemberID)
+);
+
+-- Last run date of each daily job. Claiming a run is a conditional UPDATE of
+-- the job's row, so only one worker process runs a job on a given day.
+CREATE TABLE IF NOT EXISTS ScheduledJobs (
+    JobName VARCHAR(64) NOT NULL PRIMARY KEY,
+    LastRunOn DATE NULL,
+    LastRunAt DATETIME NULL
+);
+
+INSERT IGNORE INTO ScheduledJobs (JobName) VALUES ('refresh_overdue');
@@ -0,0 +1,44 @@
+-- Fines subsystem (models/fines.py).
+
+-- Borrower category; fine rates are set per type
+ALTER TABLE Members
+    ADD COLUMN MemberType VARCHAR(20) NOT NULL DEFAULT 'student';
+
+-- Rate rules: PerDay for each day overdue, capped at MaxFine per loan (NULL = no cap)
+CREATE TABLE IF NOT EXISTS FineRates (
+    MemberType VARCHAR(20) NOT NULL PRIMARY KEY,
+    PerDay DECIMAL(10, 2) NOT NULL,
+    MaxFine DECIMAL(10, 2) NULL
+);
+
+INSERT IGNORE INTO FineRates (MemberType, PerDay, MaxFine) VALUES
+    ('student', 1.00, NULL),
+    ('class_monitor', 1.00, NULL);
+
+-- Append-only ledger. Accruals are positive; payments and waivers negative.
+-- BatchID groups the entries written by one statement so MemberFineTotals
+-- can be incremented from exactly those rows.
+CREATE TABLE IF NOT EXISTS FineLedger (
+    EntryID BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    BatchID CHAR(32) NOT NULL,
+    LendID INT NULL,
+    MemberID INT NOT NULL,
+    EntryDate DATE NOT NULL,
+    Kind VARCHAR(10) NOT NULL,  -- accrual, payment or waiver
+    Amount DECIMAL(10, 2) NOT NULL,
+    CreatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_fineledger_lend (LendID, Kind),
+    INDEX ix_fineledger_member (MemberID, EntryID),
+    INDEX ix_fineledger_batch (BatchID)
+);
+
+-- Per-member aggregates of the ledger, kept current by every ledger write
+CREATE TABLE IF NOT EXISTS MemberFineTotals (
+    MemberID INT NOT NULL PRIMARY KEY,
+    Accrued DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    Paid DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    Outstanding DECIMAL(12, 2) AS (Accrued - Paid) STORED,
+    INDEX ix_memberfinetotals_outstanding (Outstanding)
+);
+
+INSERT IGNORE INTO ScheduledJobs (JobName) VALUES ('accrue_fines');
@@ -0,0 +1,15 @@
+-- Open loans per member, maintained by every lend and return path in
+-- models/lending.py and models/circulation.py so the borrowing limit check
+-- is a primary-key read. reconcile_active_loans repairs any drift daily.
+ALTER TABLE Members
+    ADD COLUMN ActiveLoans INT NOT NULL DEFAULT 0;
+
+UPDATE Members
+JOIN (
+    SELECT MemberID, COUNT(*) AS Loans FROM Lending
+    WHERE ReturnDate IS NULL
+    GROUP BY MemberID
+) AS OpenLoans ON OpenLoans.MemberID = Members.MemberID
+SET Members.ActiveLoans = OpenLoans.Loans;
+
+INSERT IGNORE INTO ScheduledJobs (JobName) VALUES ('reconcile_active_loans');
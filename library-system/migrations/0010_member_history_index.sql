@@ -0,0 +1,3 @@
+-- A member's history pages (get_borrowing_history): equality on MemberID,
+-- then a descending seek on LendID for keyset pagination.
+ALTER TABLE Lending ADD INDEX ix_lending_member_history (MemberID, LendID);
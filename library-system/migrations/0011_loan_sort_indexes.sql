@@ -0,0 +1,10 @@
+-- Server-side sorting of loans (find_loans). Sorting by DueDate is served by
+-- ix_lending_open_due and by member by ix_members_name (0006); these cover
+-- the remaining sort keys.
+
+-- Active loans by issue date: ReturnDate IS NULL, then IssueDate in order.
+ALTER TABLE Lending ADD INDEX ix_lending_open_issued (ReturnDate, IssueDate);
+
+-- Loans by book title: walk Books in title order, then each book's loans
+-- through ix_lending_book_open.
+ALTER TABLE Books ADD INDEX ix_books_title (Title);
@@ -0,0 +1,77 @@
+from db_config import mysql
+from cache import LocalLRUBackend
+
+_MISSING = (None, None, None)
+
+RELOAD_QUERY = """
+    SELECT Barcodes.BookID, Barcodes.CurrentLendID, Lending.DueDate
+    FROM Barcodes
+    LEFT JOIN Lending ON Lending.LendID = Barcodes.CurrentLendID
+    WHERE Barcodes.Barcode = %s
+"""
+
+class BarcodeIndex:
+    """
+    Hot in-process index of barcode -> (BookID, CurrentLendID, DueDate), so a
+    scan is resolved without a lookup query.
+
+    Entries are a hint, not the truth, and each worker process has its own
+    index. Every write made on the strength of an entry is conditional on the
+    database still agreeing, and a scan is only refused after the entry has
+    been reloaded, so a copy moved by another worker is decided again from the
+    database. The lend and return paths in models/lending.py forget the
+    barcodes they touch; the TTL bounds how long any other stale entry lingers.
+    """
+
+    def __init__(self, app=None):
+        self.entries = LocalLRUBackend(200000)
+        self.ttl = 600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.entries = LocalLRUBackend(app.config['CIRCULATION_INDEX_SIZE'])
+        self.ttl = app.config['CIRCULATION_INDEX_TTL']
+
+    def lookup(self, cursor, barcode):
+        """
+        Return ((book_id, lend_id, due_date), fresh); book_id is None for an
+        unknown barcode, and `fresh` is True when the entry was just read from
+        the database rather than the index.
+        """
+        found, entry = self.entries.get(barcode)
+        if found:
+            return entry, False
+        return self.reload(cursor, barcode), True
+
+    def reload(self, cursor, barcode):
+        cursor.execute(RELOAD_QUERY, (barcode,))
+        entry = cursor.fetchone() or _MISSING
+        self.set(barcode, *entry)
+        return entry
+
+    def set(self, barcode, book_id, lend_id=None, due_date=None):
+        self.entries.set(barcode, (book_id, lend_id, due_date), self.ttl)
+
+    def forget(self, *barcodes):
+        """Drop entries after their copies changed outside a scan"""
+        barcodes = [barcode for barcode in barcodes if barcode]
+        if barcodes:
+            self.entries.delete(*barcodes)
+
+    def warm(self):
+        """Load every barcode (up to the index size) in one pass, e.g. at start-up."""
+        cursor = mysql.connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT Barcodes.Barcode, Barcodes.BookID, Barcodes.CurrentLendID, Lending.DueDate
+                FROM Barcodes
+                LEFT JOIN Lending ON Lending.LendID = Barcodes.CurrentLendID
+                LIMIT %s
+            """, (self.entries.max_entries,))
+            for barcode, book_id, lend_id, due_date in cursor.fetchall():
+                self.set(barcode, book_id, lend_id, due_date)
+        finally:
+            cursor.close()
+
+barcode_index = BarcodeIndex()
@@ -0,0 +1,197 @@
+from db_config import mysql
+from models.versions import bump_versions
+from models.books import insert_barcodes
+import csv
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000  # Rows per multi-row INSERT and commit
+MAX_REPORTED_ERRORS = 1000  # Per-row errors kept in the report; the rest are only counted
+
+# Header names accepted for each column, compared case-insensitively
+COLUMN_ALIASES = {
+    "title": ("title", "name"),
+    "author": ("author", "authors", "creator"),
+    "genre": ("genre", "category", "subject"),
+    "isbn": ("isbn", "isbn13", "isbn10"),
+    "copies": ("copies", "quantity", "qty"),
+}
+
+def read_catalog(text_stream):
+    """
+    Yield (line_number, row) for each record of a CSV or tab-separated catalog
+    file, reading it one line at a time. `row` maps the canonical column names
+    (title, author, genre, isbn, copies) to the raw values.
+    """
+    header_line = text_stream.readline()
+    if not header_line:
+        return
+    delimiter = "\t" if header_line.count("\t") > header_line.count(",") else ","
+    header = next(csv.reader([header_line], delimiter=delimiter))
+
+    positions = {}
+    normalized = [name.strip().lower() for name in header]
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[column] = normalized.index(alias)
+                break
+
+    missing = [column for column in ("title", "author", "isbn") if column not in positions]
+    if missing:
+        raise ValueError(f"Catalog header is missing required columns: {', '.join(missing)}")
+
+    for line_number, values in enumerate(csv.reader(text_stream, delimiter=delimiter), start=2):
+        if not any(value.strip() for value in values):
+            continue  # Blank line
+        yield line_number, {column: values[index] if index < len(values) else ""
+                            for column, index in positions.items()}
+
+def validate_row(row, default_copies=1):
+    """
+    Normalize one catalog row.
+
+    :return: (title, author, genre, isbn, copies) and None, or None and an error message.
+    """
+    title = row.get("title", "").strip()
+    author = row.get("author", "").strip()
+    genre = row.get("genre", "").strip() or "Unknown"
+    isbn = row.get("isbn", "").strip().replace("-", "").replace(" ", "")
+    copies_text = row.get("copies", "").strip()
+
+    if not title:
+        return None, "Missing title"
+    if not author:
+        return None, "Missing author"
+    if not isbn:
+        return None, "Missing ISBN"
+
+    try:
+        copies = int(copies_text) if copies_text else default_copies
+    except ValueError:
+        return None, f"Invalid copies value: {copies_text!r}"
+    if copies < 0:
+        return None, "Copies cannot be negative"
+
+    return (title, author, genre, isbn, copies), None
+
+class ImportReport:
+    """Running totals of an import, reported as progress and as the final result."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.barcodes = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line_number, isbn, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "isbn": isbn, "error": message})
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "barcodes": self.barcodes,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+def import_books(rows, generate_barcodes=True, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Import catalog rows into Books (and Barcodes) in batches.
+
+    Rows are validated and de-duplicated by ISBN, both within the file and
+    against the catalog. Each batch is written with multi-row INSERTs and
+    committed on its own, so memory stays flat and a failure only loses the
+    current batch; if a batch is rejected it is retried row by row so the
+    bad rows can be reported and the rest still imported.
+
+    :param rows: Iterable of (line_number, row) as produced by read_catalog().
+    :param progress: Optional callable, called with the report dict after each batch.
+    :return: ImportReport as a dictionary.
+    """
+    report = ImportReport()
+    seen_isbns = set()
+    batch = []
+
+    for line_number, row in rows:
+        report.rows += 1
+        values, error = validate_row(row)
+        if error:
+            report.error(line_number, row.get("isbn"), error)
+            continue
+        isbn = values[3]
+        if isbn in seen_isbns:
+            report.duplicates += 1
+            continue
+        seen_isbns.add(isbn)
+
+        batch.append((line_number, values))
+        if len(batch) >= batch_size:
+            _import_batch(batch, generate_barcodes, report)
+            batch = []
+            if progress:
+                progress(report.to_dict())
+
+    if batch:
+        _import_batch(batch, generate_barcodes, report)
+        if progress:
+            progress(report.to_dict())
+
+    logger.info(f"Catalog import finished: {report.inserted} books and {report.barcodes} barcodes "
+                f"from {report.rows} rows ({report.duplicates} duplicates, {report.failed} failed)")
+    return report.to_dict()
+
+def _import_batch(batch, generate_barcodes, report):
+    cursor = mysql.connection.cursor()
+    try:
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"SELECT ISBN FROM Books WHERE ISBN IN ({placeholders})",
+                       [values[3] for _, values in batch])
+        existing = {isbn for (isbn,) in cursor.fetchall()}
+        new_rows = [(line_number, values) for line_number, values in batch if values[3] not in existing]
+        report.duplicates += len(batch) - len(new_rows)
+        if not new_rows:
+            return
+
+        try:
+            barcodes = _insert_books(cursor, [values for _, values in new_rows], generate_barcodes)
+            bump_versions(cursor, 'Books', 'Barcodes')
+            mysql.connection.commit()
+            report.inserted += len(new_rows)
+            report.barcodes += barcodes
+        except Exception as e:
+            mysql.connection.rollback()
+            logger.warning(f"Import batch of {len(new_rows)} rows failed ({str(e)}), retrying row by row")
+            for line_number, values in new_rows:
+                try:
+                    barcodes = _insert_books(cursor, [values], generate_barcodes)
+                    bump_versions(cursor, 'Books', 'Barcodes')
+                    mysql.connection.commit()
+                    report.inserted += 1
+                    report.barcodes += barcodes
+                except Exception as row_error:
+                    mysql.connection.rollback()
+                    report.error(line_number, values[3], str(row_error))
+    finally:
+        cursor.close()
+
+def _insert_books(cursor, books, generate_barcodes):
+    """Insert (title, author, genre, isbn, copies) rows and their barcodes. Returns the barcode count."""
+    # MySQLdb turns executemany on INSERT ... VALUES into one multi-row statement
+    cursor.executemany("INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)", books)
+    if not generate_barcodes:
+        return 0
+
+    copies_by_isbn = {isbn: copies for _, _, _, isbn, copies in books}
+    placeholders = ", ".join(["%s"] * len(books))
+    cursor.execute(f"SELECT BookID, ISBN FROM Books WHERE ISBN IN ({placeholders})", list(copies_by_isbn))
+    return insert_barcodes(cursor, {book_id: copies_by_isbn[isbn] for book_id, isbn in cursor.fetchall()})
@@ -1,10 +1,16 @@
 from db_config import mysql
+from models.versions import bump_versions
+from models.rows import record, map_rows
+from cache import cache, book_key, book_isbn_key
 import logging
+import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_SEARCH_LIMIT = 50
+
 def add_book(title, author, genre, isbn, copies):
     try:
         cursor = mysql.connection.cursor()
@@ -12,6 +18,7 @@ def add_book(title, author, genre, isbn, copies):
         logger.info(f"Executing query: {query} with parameters: {(title, author, genre, isbn, copies)}")
         cursor.execute(query, (title, author, genre, isbn, copies))
 
+        bump_versions(cursor, 'Books')
         mysql.connection.commit()
         logger.info(f"Successfully added book: {title} by {author} with ISBN: {isbn} and Copies: {copies}")
         return True
@@ -22,7 +29,10 @@ def add_book(title, author, genre, isbn, copies):
     finally:
         cursor.close()
 def get_book_by_id(book_id):
-    """Fetch a single book by its ID"""
+    """Fetch a single book by its ID (served from the cache when possible)"""
+    return cache.get_or_load(book_key(book_id), lambda: _load_book_by_id(book_id))
+
+def _load_book_by_id(book_id):
     try:
         cursor = mysql.connection.cursor()
         query = "SELECT * FROM Books WHERE BookID = %s"
@@ -86,7 +96,9 @@ def update_book(book_id, title=None, author=None, genre=None, isbn=None, copies=
         params.append(book_id)
         
         cursor.execute(query, tuple(params))
+        bump_versions(cursor, 'Books')
         mysql.connection.commit()
+        invalidate_book(book_id, isbn, existing_book[4] if existing_book else None)
         logger.info(f"Successfully updated book ID {book_id}")
         return True
     except Exception as e:
@@ -97,34 +109,116 @@ def update_book(book_id, title=None, author=None, genre=None, isbn=None, copies=
         if 'cursor' in locals():
             cursor.close()
 
-def get_books():
+@record
+class Book:
+    """A catalog entry as listed by the API (lower-case keys)."""
+    id: int
+    title: str
+    author: str
+    genre: str
+    isbn: str
+    copies: int
+    availability: str
+
+    @classmethod
+    def from_row(cls, book_id, title, author, genre, isbn, copies):
+        return cls(book_id, title, author, genre, isbn, copies, "Available" if copies > 0 else "Borrowed")
+
+@record
+class RankedBook:
+    """A search hit, with its number of open loans."""
+    id: int
+    title: str
+    author: str
+    genre: str
+    isbn: str
+    copies: int
+    availability: str
+    popularity: int
+
+    @classmethod
+    def from_row(cls, book_id, title, author, genre, isbn, copies, popularity):
+        return cls(book_id, title, author, genre, isbn, copies, "Available" if copies > 0 else "Borrowed", popularity)
+
+def books_query(limit=None, after=None):
+    """SQL and parameters of get_books()."""
+    query = "SELECT BookID, Title, Author, Genre, ISBN, Copies FROM Books"
+    params = []
+
+    if after is not None:
+        query += " WHERE BookID > %s"
+        params.append(after)
+
+    query += " ORDER BY BookID"
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, tuple(params)
+
+def get_books(limit=None, after=None):
+    """
+    Fetch books ordered by BookID.
+
+    Without a limit the whole catalog is returned. With a limit, keyset (seek)
+    pagination is used: only books with a BookID greater than `after` are read,
+    so every page costs the same regardless of how deep into the catalog it is.
+
+    :param limit: Maximum number of books to return (optional).
+    :param after: BookID of the last book of the previous page (optional).
+    :return: List of Book records.
+    """
     cursor = mysql.connection.cursor()
-    query = "SELECT * FROM Books"
-    cursor.execute(query)
+    cursor.execute(*books_query(limit, after))
     books = cursor.fetchall()
     cursor.close()
-    
-    # Convert tuples to dictionaries
-    book_list = []
-    for book in books:
-        book_id, title, author, genre, isbn, copies = book
-        book_list.append({
-            "id": book_id,
-            "title": title,
-            "author": author,
-            "genre": genre,
-            "isbn": isbn,
-            "copies": copies,
-            "availability": "Available" if copies > 0 else "Borrowed"
-        })
-    return book_list
+    return list(map_rows(Book.from_row, books))
+
+def get_books_page(limit, after=None):
+    """
+    Fetch one page of books using keyset pagination on BookID.
+
+    :param limit: Page size.
+    :param after: Cursor returned with the previous page (optional).
+    :return: Tuple of (books, next_cursor). next_cursor is None on the last page.
+    """
+    # Read one extra row to find out whether another page exists
+    books = get_books(limit + 1, after)
+    if len(books) > limit:
+        books = books[:limit]
+        return books, books[-1].id
+    return books, None
 
 def get_book_by_isbn(isbn):
-    """Fetch a single book by its ISBN"""
+    """
+    Fetch a single book by its ISBN (served from the cache when possible).
+
+    The cache maps the ISBN to a BookID and reuses the by-ID entry, so copy
+    changes only have to invalidate one key. The by-ID entry is filled by
+    get_book_by_id() on the next lookup, which checks for racing writes itself.
+    """
+    found, book_id = cache.get(book_isbn_key(isbn))
+    if found:
+        book = get_book_by_id(book_id)
+        if book and book[4] == isbn:
+            return book
+
+    generation = cache.generation(book_isbn_key(isbn))
+    book = _load_book_by_isbn(isbn)
+    if book:
+        cache.set_if_unchanged(book_isbn_key(isbn), book[0], generation)
+    return book
+
+def invalidate_book(book_id, *isbns):
+    """Drop cached entries for a book after it changed"""
+    cache.invalidate(book_key(book_id), *(book_isbn_key(isbn) for isbn in isbns if isbn))
+
+BOOK_BY_ISBN_QUERY = "SELECT * FROM Books WHERE ISBN = %s"
+
+def _load_book_by_isbn(isbn):
     try:
         cursor = mysql.connection.cursor()
-        query = "SELECT * FROM Books WHERE ISBN = %s"
-        cursor.execute(query, (isbn,))
+        cursor.execute(BOOK_BY_ISBN_QUERY, (isbn,))
         book = cursor.fetchone()
         cursor.close()
         
@@ -138,11 +232,14 @@ def get_book_by_isbn(isbn):
 
 def delete_book(book_id):
     """Delete a book from the database by its ID"""
+    existing_book = get_book_by_id(book_id)
     try:
         cursor = mysql.connection.cursor()
         query = "DELETE FROM Books WHERE BookID = %s"
         cursor.execute(query, (book_id,))
+        bump_versions(cursor, 'Books')
         mysql.connection.commit()
+        invalidate_book(book_id, existing_book[4] if existing_book else None)
         logger.info(f"Successfully deleted book ID {book_id}")
         return True
     except Exception as e:
@@ -153,81 +250,138 @@ def delete_book(book_id):
         if 'cursor' in locals():
             cursor.close()
 
-def advanced_search_books(title=None, author=None, isbn=None, genre=None, available_only=False, sort_by_popularity=False):
+def _fulltext_terms(text):
     """
-    Search books by title, author, ISBN, genre and apply filters for availability and popularity.
-
-    :param title: Title of the book (optional).
-    :param author: Author of the book (optional).
-    :param isbn: ISBN of the book (optional).
-    :param genre: Genre of the book (optional).
-    :param available_only: Boolean flag to filter only available books.
-    :param sort_by_popularity: Boolean flag to sort books by popularity (borrowed count).
-    :return: List of dictionaries containing book information.
-    """
-
-    cursor = mysql.connection.cursor()
-    query = """
-        SELECT 
-            Books.BookID, Books.Title, Books.Author, Books.Genre, Books.ISBN, Books.Copies, COUNT(Lending.LendID) AS Popularity
-        FROM Books
-        LEFT JOIN Lending ON Books.BookID = Lending.BookID AND Lending.ReturnDate IS NULL
-        WHERE 1=1
+    Turn free text into a FULLTEXT boolean-mode query that requires every word,
+    matching it as a prefix (so "harr pot" finds "Harry Potter").
+    Returns None if the text has no searchable words.
     """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f"+{word}*" for word in words)
 
+def advanced_search_query(title=None, author=None, isbn=None, genre=None, available_only=False,
+                          sort_by_popularity=False, q=None, limit=DEFAULT_SEARCH_LIMIT):
+    """SQL and parameters of advanced_search_books()."""
+    conditions = []
     params = []
+    relevance = []
+    relevance_params = []
 
-    if title:
-        query += " AND Books.Title LIKE %s"
-        params.append(f"%{title}%")
-
-    if author:
-        query += " AND Books.Author LIKE %s"
-        params.append(f"%{author}%")
+    for columns, text in (("Books.Title, Books.Author", q), ("Books.Title", title), ("Books.Author", author)):
+        terms = _fulltext_terms(text) if text else None
+        if terms:
+            match = f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+            conditions.append(match)
+            params.append(terms)
+            relevance.append(match)
+            relevance_params.append(terms)
 
     if isbn:
-        query += " AND Books.ISBN LIKE %s"
-        params.append(f"%{isbn}%")
+        conditions.append("Books.ISBN LIKE %s")
+        params.append(f"{isbn}%")
 
     if genre:
-        query += " AND Books.Genre LIKE %s"
-        params.append(f"%{genre}%")
-
-    query += " GROUP BY Books.BookID"
+        conditions.append("Books.Genre LIKE %s")
+        params.append(f"{genre}%")
 
     if available_only:
-        query += " HAVING (Books.Copies - COUNT(Lending.LendID)) > 0"
+        # Copies holds the copies currently on the shelf (lending decrements it)
+        conditions.append("Books.Copies > 0")
+
+    query = """
+        SELECT 
+            Books.BookID, Books.Title, Books.Author, Books.Genre, Books.ISBN, Books.Copies,
+            (SELECT COUNT(*) FROM Lending
+             WHERE Lending.BookID = Books.BookID AND Lending.ReturnDate IS NULL) AS Popularity
+        FROM Books
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
 
     if sort_by_popularity:
         query += " ORDER BY Popularity DESC"
+    elif relevance:
+        query += f" ORDER BY ({' + '.join(relevance)}) DESC"
+        params.extend(relevance_params)
+    else:
+        query += " ORDER BY Books.BookID"
+
+    query += " LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+def advanced_search_books(title=None, author=None, isbn=None, genre=None, available_only=False,
+                          sort_by_popularity=False, q=None, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Search books by title, author, ISBN, genre and apply filters for availability and popularity.
 
-    cursor.execute(query, tuple(params))
+    Title/author/q terms are answered from the FULLTEXT indexes on Books (see
+    migrations/0003_books_fulltext.sql) and ranked by relevance; ISBN and genre are prefix
+    matches that can use ordinary indexes. Popularity is only counted for the
+    matching books instead of joining every book against Lending.
+
+    :param title: Title of the book (optional).
+    :param author: Author of the book (optional).
+    :param isbn: ISBN of the book (optional).
+    :param genre: Genre of the book (optional).
+    :param available_only: Boolean flag to filter only available books.
+    :param sort_by_popularity: Boolean flag to sort books by popularity (borrowed count).
+    :param q: Free text matched against title and author (optional).
+    :param limit: Maximum number of books to return.
+    :return: List of RankedBook records.
+    """
+    cursor = mysql.connection.cursor()
+    cursor.execute(*advanced_search_query(title, author, isbn, genre, available_only, sort_by_popularity, q, limit))
     books = cursor.fetchall()
     cursor.close()
-    return books
+    return list(map_rows(RankedBook.from_row, books))
+
+def format_barcode(number):
+    """Barcode text for a sequence number, e.g. 42 -> LIB0000000042"""
+    return f"LIB{number:010d}"
+
+def allocate_barcodes(cursor, count):
+    """
+    Reserve `count` consecutive barcodes from BarcodeSequence with one UPDATE.
+
+    LAST_INSERT_ID(expr) hands the new counter value back to this connection
+    only, so concurrent allocations get disjoint ranges. The row stays locked
+    until the caller commits; a rollback gives the range back.
+    """
+    cursor.execute("UPDATE BarcodeSequence SET NextValue = LAST_INSERT_ID(NextValue + %s) WHERE ID = 1", (count,))
+    cursor.execute("SELECT LAST_INSERT_ID()")
+    end = cursor.fetchone()[0]
+    return [format_barcode(number) for number in range(end - count, end)]
+
+def insert_barcodes(cursor, copies_by_book):
+    """
+    Create barcodes for {book_id: copies} in one multi-row INSERT.
+
+    :return: Number of barcodes created.
+    """
+    total = sum(copies_by_book.values())
+    if not total:
+        return 0
+    barcodes = iter(allocate_barcodes(cursor, total))
+    rows = [(book_id, next(barcodes)) for book_id, copies in copies_by_book.items() for _ in range(copies)]
+    cursor.executemany("INSERT INTO Barcodes (BookID, Barcode) VALUES (%s, %s)", rows)
+    return total
 
 def add_book_with_barcodes(title, author, genre, isbn, copies):
     cursor = mysql.connection.cursor()
     try:
         # Insert the book
         query = "INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)"
-        logger.info(f"Executing query: {query} with parameters: {(title, author, genre, isbn, copies)}")
         cursor.execute(query, (title, author, genre, isbn, copies))
         book_id = cursor.lastrowid
-        logger.info(f"Inserted book with ID: {book_id}")
 
-        # Generate unique barcodes
-        for i in range(1, copies + 1):
-            barcode = f"#_{title.replace(' ', '')}_{book_id}_{i}"  # Ensure unique barcode
-            logger.info(f"Generated barcode: {barcode} for book ID: {book_id}")
-            
-            # Insert barcode into the barcodes table
-            query = "INSERT INTO barcodes (BookID, Barcode) VALUES (%s, %s)"
-            cursor.execute(query, (book_id, barcode))
-            logger.info(f"Inserted barcode: {barcode} for book ID: {book_id}")
+        insert_barcodes(cursor, {book_id: copies})
 
+        bump_versions(cursor, 'Books', 'Barcodes')
         mysql.connection.commit()
-        logger.info(f"Successfully added {copies} copies of '{title}' with barcodes for ISBN: {isbn}.")
+        logger.info(f"Added book ID {book_id} '{title}' (ISBN {isbn}) with {copies} barcoded copies")
         return True  # Indicate success
     except Exception as e:
         mysql.connection.rollback()  # Rollback the transaction on error
@@ -235,12 +389,14 @@ def add_book_with_barcodes(title, author, genre, isbn, copies):
         return False  # Indicate failure
     finally:
         cursor.close()
+
+BARCODES_OF_BOOK_QUERY = "SELECT Barcode FROM Barcodes WHERE BookID = %s"
+
 def get_barcodes_by_book_id(book_id):
     """Fetch barcodes for a specific book by its ID"""
     cursor = mysql.connection.cursor()
     try:
-        query = "SELECT Barcode FROM Barcodes WHERE BookID = %s"
-        cursor.execute(query, (book_id,))
+        cursor.execute(BARCODES_OF_BOOK_QUERY, (book_id,))
         barcodes = cursor.fetchall()
         
         # Convert tuples to a list of barcodes
@@ -0,0 +1,141 @@
+from db_config import mysql
+from models.versions import bump_versions
+from models.lending import take_loan_slot, lock_loan_members, release_loan_slots, LOAN_PERIOD_DAYS
+from models.fines import settle_loan_fines
+from models.barcode_index import barcode_index
+from cache import cache, book_key, member_key
+from datetime import datetime, timedelta
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+def scan(barcode, member_id=None, action="auto"):
+    """
+    Check a copy in or out from a barcode scan.
+
+    With action "auto" a copy that is on loan is returned, and an available
+    copy is lent to `member_id`. "checkout" and "return" force one direction.
+
+    :return: Dictionary with "success", "action", "message" and, on success,
+             "lend_id" plus "due_date" (checkout) or "fine" (return). On failure
+             "error" is one of "not_found", "member_required", "member_not_found",
+             "limit_exceeded", "unavailable", "not_on_loan" or "internal".
+    """
+    cursor = mysql.connection.cursor()
+    try:
+        (book_id, lend_id, due_date), fresh = barcode_index.lookup(cursor, barcode)
+        for _ in range(3):
+            result = _refusal(barcode, book_id, lend_id, member_id, action)
+            if result is None:
+                on_loan = lend_id is not None
+                if action == "return" or (action == "auto" and on_loan):
+                    result = _return_copy(cursor, barcode, book_id, lend_id, due_date)
+                else:
+                    result = _checkout_copy(cursor, barcode, book_id, member_id)
+                if result is not None:
+                    return result
+            elif fresh:
+                return result  # Refused on what the database says
+
+            # The index entry may be stale: reload the copy and decide again (including "auto")
+            book_id, lend_id, due_date = barcode_index.reload(cursor, barcode)
+            fresh = True
+
+        return {"success": False, "error": "internal", "barcode": barcode, "message": "Copy changed during the scan."}
+    except Exception as e:
+        mysql.connection.rollback()
+        logger.error(f"Error processing scan of barcode {barcode}: {str(e)}")
+        return {"success": False, "error": "internal", "barcode": barcode, "message": "Error processing scan."}
+    finally:
+        cursor.close()
+
+def _refusal(barcode, book_id, lend_id, member_id, action):
+    """The failure dictionary if the scan cannot go ahead for this copy state, else None."""
+    if book_id is None:
+        return {"success": False, "error": "not_found", "barcode": barcode, "message": "Unknown barcode."}
+
+    on_loan = lend_id is not None
+    if action == "auto":
+        action = "return" if on_loan else "checkout"
+    if action == "return":
+        if not on_loan:
+            return {"success": False, "error": "not_on_loan", "action": "return", "barcode": barcode,
+                    "message": "This copy is not on loan."}
+        return None
+    if member_id is None:
+        return {"success": False, "error": "member_required", "action": "checkout", "barcode": barcode,
+                "message": "A member is required to lend this copy."}
+    if on_loan:
+        return {"success": False, "error": "unavailable", "action": "checkout", "barcode": barcode,
+                "message": "This copy is already on loan."}
+    return None
+
+def _return_copy(cursor, barcode, book_id, lend_id, due_date):
+    """Close exactly the loan the copy is out on. Returns None if the copy is not on that loan any more."""
+    return_date = datetime.now()
+    lock_loan_members(cursor, [lend_id])  # Members first, like every lend and return path
+    cursor.execute("""
+        UPDATE Barcodes
+        JOIN Lending ON Lending.LendID = %s
+        JOIN Books ON Books.BookID = Lending.BookID
+        SET Lending.ReturnDate = %s, Books.Copies = Books.Copies + 1,
+            Barcodes.CurrentLendID = NULL, Barcodes.IsBorrowed = FALSE
+        WHERE Barcodes.Barcode = %s AND Barcodes.CurrentLendID = %s AND Lending.ReturnDate IS NULL
+    """, (lend_id, return_date, barcode, lend_id))
+    if cursor.rowcount == 0:
+        mysql.connection.rollback()
+        return None
+    cursor.execute("SELECT MemberID FROM Lending WHERE LendID = %s", (lend_id,))
+    member_id = cursor.fetchone()[0]
+    release_loan_slots(cursor, {member_id: 1})
+    cursor.execute("DELETE FROM OverdueLoans WHERE LendID = %s", (lend_id,))
+    fine = float(settle_loan_fines(cursor, [lend_id]).get(lend_id, 0))
+
+    bump_versions(cursor, 'Books', 'Lending', 'Barcodes', 'Members')
+    mysql.connection.commit()
+    barcode_index.set(barcode, book_id)
+    cache.invalidate(book_key(book_id), member_key(member_id))  # Copies and ActiveLoans changed
+
+    logger.info(f"Scan return: barcode {barcode}, LendID {lend_id}, Fine: {fine}")
+    return {"success": True, "action": "return", "barcode": barcode, "book_id": book_id, "lend_id": lend_id,
+            "fine": fine, "message": "Book returned successfully!"}
+
+def _checkout_copy(cursor, barcode, book_id, member_id):
+    """Lend the copy to the member. Returns None if the copy turned out not to be available."""
+    error = take_loan_slot(cursor, member_id)
+    if error:
+        mysql.connection.rollback()
+        return dict(error, action="checkout", barcode=barcode)
+
+    # Claim the copy and take it off the available count in one statement
+    cursor.execute("""
+        UPDATE Barcodes
+        JOIN Books ON Books.BookID = Barcodes.BookID
+        SET Barcodes.IsBorrowed = TRUE, Books.Copies = Books.Copies - 1
+        WHERE Barcodes.Barcode = %s AND Barcodes.CurrentLendID IS NULL AND Books.Copies > 0
+    """, (barcode,))
+    if cursor.rowcount == 0:
+        cursor.execute("SELECT CurrentLendID FROM Barcodes WHERE Barcode = %s", (barcode,))
+        row = cursor.fetchone()
+        mysql.connection.rollback()
+        if row and row[0] is None:
+            # The copy is free but the title has no available copies left on record
+            return {"success": False, "error": "unavailable", "action": "checkout", "barcode": barcode,
+                    "message": "No available copies."}
+        return None
+
+    due_date = (datetime.now() + timedelta(days=LOAN_PERIOD_DAYS)).date()
+    cursor.execute("INSERT INTO Lending (BookID, MemberID, DueDate, Barcode) VALUES (%s, %s, %s, %s)",
+                   (book_id, member_id, due_date, barcode))
+    lend_id = cursor.lastrowid
+    cursor.execute("UPDATE Barcodes SET CurrentLendID = %s WHERE Barcode = %s", (lend_id, barcode))
+
+    bump_versions(cursor, 'Books', 'Lending', 'Barcodes', 'Members')
+    mysql.connection.commit()
+    barcode_index.set(barcode, book_id, lend_id, due_date)
+    cache.invalidate(book_key(book_id), member_key(member_id))  # Copies and ActiveLoans changed
+
+    logger.info(f"Scan checkout: barcode {barcode}, BookID {book_id}, MemberID {member_id}")
+    return {"success": True, "action": "checkout", "barcode": barcode, "book_id": book_id, "lend_id": lend_id,
+            "due_date": due_date.isoformat(), "message": "Book lent successfully!"}
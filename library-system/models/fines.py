@@ -0,0 +1,229 @@
+from db_config import mysql
+from models.jobs import claim_daily_run
+from models.rows import record, map_rows
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import logging
+import uuid
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+ACCRUAL_JOB = 'accrue_fines'
+PAYMENT_KINDS = ("payment", "waiver")
+NO_FINE_CAP = 99999999  # Stands in for a NULL MaxFine
+
+def due_fine_sql(until):
+    """
+    SQL expression for the fine a loan owes as of `until` (an SQL date
+    expression), by the FineRates row of the member's type. Expects Lending
+    and FineRates in the query.
+    """
+    return (f"LEAST(GREATEST(DATEDIFF({until}, Lending.DueDate), 0) * FineRates.PerDay, "
+            f"COALESCE(FineRates.MaxFine, {NO_FINE_CAP}))")
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+def _accrue(cursor, loans_sql, params, until):
+    """
+    Bring the accrued fines of the selected loans up to date in one set-based
+    INSERT ... SELECT: each loan gets an accrual entry for the difference
+    between what it owes as of `until` and what it has already accrued.
+    Runs on the caller's transaction.
+
+    :param loans_sql: Subquery selecting the LendIDs to accrue.
+    :return: Number of ledger entries written.
+    """
+    batch_id = uuid.uuid4().hex
+    fine = due_fine_sql(until)
+    cursor.execute(f"""
+        INSERT INTO FineLedger (BatchID, LendID, MemberID, EntryDate, Kind, Amount)
+        SELECT %s, Lending.LendID, Lending.MemberID, CURDATE(), 'accrual', {fine} - COALESCE(Accrued.Amount, 0)
+        FROM Lending
+        JOIN Members ON Members.MemberID = Lending.MemberID
+        JOIN FineRates ON FineRates.MemberType = Members.MemberType
+        LEFT JOIN (
+            SELECT LendID, SUM(Amount) AS Amount FROM FineLedger
+            WHERE Kind = 'accrual' AND LendID IN ({loans_sql})
+            GROUP BY LendID
+        ) AS Accrued ON Accrued.LendID = Lending.LendID
+        WHERE Lending.LendID IN ({loans_sql}) AND {fine} > COALESCE(Accrued.Amount, 0)
+    """, (batch_id, *params, *params))
+    entries = cursor.rowcount
+    if entries:
+        _add_batch_to_totals(cursor, batch_id)
+    return entries
+
+def _add_batch_to_totals(cursor, batch_id):
+    """Increment MemberFineTotals by the ledger entries of one batch."""
+    cursor.execute("""
+        INSERT INTO MemberFineTotals (MemberID, Accrued, Paid)
+        SELECT MemberID,
+               SUM(IF(Kind = 'accrual', Amount, 0)),
+               SUM(IF(Kind = 'accrual', 0, -Amount))
+        FROM FineLedger
+        WHERE BatchID = %s
+        GROUP BY MemberID
+        ON DUPLICATE KEY UPDATE Accrued = Accrued + VALUES(Accrued), Paid = Paid + VALUES(Paid)
+    """, (batch_id,))
+
+def accrue_fines(force=False):
+    """
+    Nightly batch: accrue fines for every open overdue loan up to today.
+
+    :return: Number of ledger entries written, or None if the job already ran today.
+    """
+    cursor = mysql.connection.cursor()
+    try:
+        if not claim_daily_run(cursor, ACCRUAL_JOB, force):
+            mysql.connection.rollback()
+            return None
+        entries = _accrue(cursor, "SELECT LendID FROM Lending WHERE ReturnDate IS NULL AND DueDate < CURDATE()",
+                          (), "CURDATE()")
+        mysql.connection.commit()
+        logger.info(f"Fine accrual: {entries} ledger entries written")
+        return entries
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def settle_loan_fines(cursor, lend_ids):
+    """
+    Accrue the final fines of loans that were just returned (their ReturnDate
+    set on the caller's transaction) and return {lend_id: total fine}.
+    """
+    if not lend_ids:
+        return {}
+    placeholders = _placeholders(lend_ids)
+    _accrue(cursor, f"SELECT LendID FROM Lending WHERE LendID IN ({placeholders})", tuple(lend_ids),
+            "Lending.ReturnDate")
+    cursor.execute(accrued_fines_query(lend_ids), tuple(lend_ids))
+    return dict(cursor.fetchall())
+
+def accrued_fines_query(lend_ids):
+    """SQL of the accrued fine per loan read by settle_loan_fines(); takes the lend IDs as parameters."""
+    return f"""
+        SELECT LendID, SUM(Amount) FROM FineLedger
+        WHERE Kind = 'accrual' AND LendID IN ({_placeholders(lend_ids)})
+        GROUP BY LendID
+    """
+
+def record_payment(member_id, amount, kind="payment"):
+    """
+    Record a payment (or waiver) against a member's fines.
+
+    :return: Dictionary with "success", "message" and, on success, the member's
+             new totals. On failure "error" is "invalid", "member_not_found" or "internal".
+    """
+    try:
+        amount = Decimal(str(amount)).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        return {"success": False, "error": "invalid", "message": "Amount must be a number."}
+    if not amount.is_finite() or amount <= 0 or kind not in PAYMENT_KINDS:
+        return {"success": False, "error": "invalid",
+                "message": f"Amount must be positive and kind one of {', '.join(PAYMENT_KINDS)}."}
+
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("SELECT MemberID FROM Members WHERE MemberID = %s", (member_id,))
+        if not cursor.fetchone():
+            mysql.connection.rollback()
+            return {"success": False, "error": "member_not_found", "message": "Member not found."}
+
+        batch_id = uuid.uuid4().hex
+        cursor.execute("""
+            INSERT INTO FineLedger (BatchID, MemberID, EntryDate, Kind, Amount)
+            VALUES (%s, %s, CURDATE(), %s, %s)
+        """, (batch_id, member_id, kind, -amount))
+        _add_batch_to_totals(cursor, batch_id)
+        mysql.connection.commit()
+        logger.info(f"Fine {kind} of {amount} recorded for MemberID {member_id}")
+        return {"success": True, "message": f"{kind.capitalize()} recorded.", "totals": get_member_totals(member_id)}
+    except Exception as e:
+        mysql.connection.rollback()
+        logger.error(f"Error recording fine {kind} for MemberID {member_id}: {str(e)}")
+        return {"success": False, "error": "internal", "message": f"Error recording {kind}."}
+    finally:
+        cursor.close()
+
+@record
+class FineTotals:
+    member_id: int
+    name: str
+    member_type: str
+    accrued: Decimal
+    paid: Decimal
+    outstanding: Decimal
+
+@record
+class LedgerEntry:
+    entry_id: int
+    lend_id: int
+    date: date
+    kind: str
+    amount: Decimal
+
+def get_member_totals(member_id):
+    """Precomputed fine totals of one member (zeros if they never had a fine)."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT Members.MemberID, Members.Name, Members.MemberType,
+                   COALESCE(MemberFineTotals.Accrued, 0), COALESCE(MemberFineTotals.Paid, 0),
+                   COALESCE(MemberFineTotals.Outstanding, 0)
+            FROM Members
+            LEFT JOIN MemberFineTotals ON MemberFineTotals.MemberID = Members.MemberID
+            WHERE Members.MemberID = %s
+        """, (member_id,))
+        row = cursor.fetchone()
+        return FineTotals(*row) if row else None
+    finally:
+        cursor.close()
+
+def get_fine_totals(limit, after=None, outstanding_only=True):
+    """
+    Page through the per-member totals, ordered by MemberID (keyset pagination).
+
+    :return: (list of FineTotals records, next_cursor or None).
+    """
+    cursor = mysql.connection.cursor()
+    try:
+        query = """
+            SELECT MemberFineTotals.MemberID, Members.Name, Members.MemberType,
+                   MemberFineTotals.Accrued, MemberFineTotals.Paid, MemberFineTotals.Outstanding
+            FROM MemberFineTotals
+            JOIN Members ON Members.MemberID = MemberFineTotals.MemberID
+            WHERE MemberFineTotals.MemberID > %s
+        """
+        params = [after or 0]
+        if outstanding_only:
+            query += " AND MemberFineTotals.Outstanding > 0"
+        query += " ORDER BY MemberFineTotals.MemberID LIMIT %s"
+        params.append(limit + 1)
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    totals = list(map_rows(FineTotals, rows[:limit]))
+    next_cursor = totals[-1].member_id if len(rows) > limit else None
+    return totals, next_cursor
+
+MEMBER_LEDGER_QUERY = """
+    SELECT EntryID, LendID, EntryDate, Kind, Amount FROM FineLedger
+    WHERE MemberID = %s
+    ORDER BY EntryID DESC
+    LIMIT %s
+"""
+
+def get_member_ledger(member_id, limit=100):
+    """Most recent ledger entries of a member, newest first."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute(MEMBER_LEDGER_QUERY, (member_id, limit))
+        return list(map_rows(LedgerEntry, cursor.fetchall()))
+    finally:
+        cursor.close()
@@ -0,0 +1,24 @@
+from db_config import mysql
+
+def claim_daily_run(cursor, job_name, force=False):
+    """
+    Mark `job_name` as run today, on the caller's transaction.
+
+    Returns False if it already ran today (unless `force`). The ScheduledJobs
+    row stays locked until the caller commits, so a concurrent claim waits and
+    then sees the run as done: only one worker process runs the job per day.
+    """
+    query = "UPDATE ScheduledJobs SET LastRunOn = CURDATE(), LastRunAt = NOW() WHERE JobName = %s"
+    if not force:
+        query += " AND (LastRunOn IS NULL OR LastRunOn < CURDATE())"
+    cursor.execute(query, (job_name,))
+    return force or cursor.rowcount > 0
+
+def ran_today(job_name):
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("SELECT LastRunOn >= CURDATE() FROM ScheduledJobs WHERE JobName = %s", (job_name,))
+        row = cursor.fetchone()
+        return bool(row and row[0])
+    finally:
+        cursor.close()
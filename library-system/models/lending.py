@@ -1,127 +1,433 @@
 from db_config import mysql
-from datetime import datetime, timedelta, date
+from MySQLdb.cursors import SSCursor
+from models.versions import bump_versions
+from models.rows import record, map_rows
+from models.fines import settle_loan_fines
+from models.jobs import claim_daily_run
+from models.barcode_index import barcode_index
+from cache import cache, book_key, member_key
+from datetime import date, datetime, timedelta
 import logging
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
-# Lend Book Function (borrow book logic)
-def lend_book(book_id, member_id, is_class_monitor=False):
-    """Insert a new lending record into the database and check availability."""
+STREAM_FETCH_SIZE = 1000  # Rows pulled per round trip by the streaming queries
+LOAN_PERIOD_DAYS = 14
+STUDENT_LOAN_LIMIT = 5
+CLASS_MONITOR_LOAN_LIMIT = 10
+LOAN_LIMITS = {"student": STUDENT_LOAN_LIMIT, "class_monitor": CLASS_MONITOR_LOAN_LIMIT}  # By Members.MemberType
+RECONCILE_JOB = 'reconcile_active_loans'
+
+# Borrowing limit of the Members row being updated, from its MemberType
+LOAN_LIMIT_SQL = "CASE MemberType {} ELSE {} END".format(
+    " ".join(f"WHEN '{member_type}' THEN {limit}" for member_type, limit in LOAN_LIMITS.items()), STUDENT_LOAN_LIMIT)
+
+TAKE_LOAN_SLOT_QUERY = f"UPDATE Members SET ActiveLoans = ActiveLoans + 1 WHERE MemberID = %s AND ActiveLoans < {LOAN_LIMIT_SQL}"
+OPEN_LOAN_COUNT_QUERY = "SELECT COUNT(*) FROM Lending WHERE MemberID = %s AND ReturnDate IS NULL"
+FREE_BARCODE_QUERY = "UPDATE Barcodes SET CurrentLendID = NULL, IsBorrowed = FALSE WHERE CurrentLendID = %s"
+
+def loan_limit(member_type):
+    """Number of books a member of this MemberType may have on loan at once."""
+    return LOAN_LIMITS.get(member_type, STUDENT_LOAN_LIMIT)
+
+def take_loan_slot(cursor, member_id):
+    """
+    Count one more active loan for the member, if they are under the limit of
+    their MemberType.
+
+    Members.ActiveLoans is incremented with a conditional UPDATE on the primary
+    key, so the check costs one row lookup however long the member's history
+    is. The row stays locked until the caller's transaction ends: concurrent
+    checkouts for the same member cannot both pass, and rolling back releases
+    the slot again.
+
+    :return: None if the slot was taken, otherwise a failure dictionary
+             with "error" set to "member_not_found" or "limit_exceeded".
+    """
+    cursor.execute(TAKE_LOAN_SLOT_QUERY, (member_id,))
+    if cursor.rowcount > 0:
+        return None
+
+    cursor.execute("SELECT MemberType FROM Members WHERE MemberID = %s", (member_id,))
+    row = cursor.fetchone()
+    if not row:
+        logger.warning(f"Member not found: MemberID {member_id}.")
+        return {"success": False, "error": "member_not_found", "message": "Member not found."}
+
+    limit = loan_limit(row[0])
+    logger.warning(f"Limit exceeded for MemberID {member_id}. Can only borrow {limit} books.")
+    return {"success": False, "error": "limit_exceeded",
+            "message": f"Limit exceeded. You can only borrow {limit} books."}
+
+def lock_loan_members(cursor, lend_ids):
+    """
+    Lock the Members rows of the borrowers of these loans, in MemberID order.
+
+    Every path that lends or returns locks its members first and only then
+    touches Lending, Books and Barcodes, so a return can never hold a loan or
+    book row that a lend of the same member is waiting for while it waits for
+    the member row itself (a deadlock). A loan's MemberID never changes, so it
+    is read without locking.
+    """
+    cursor.execute(f"SELECT DISTINCT MemberID FROM Lending WHERE LendID IN ({_placeholders(lend_ids)})",
+                   tuple(lend_ids))
+    member_ids = sorted(row[0] for row in cursor.fetchall())
+    if member_ids:
+        cursor.execute(f"SELECT MemberID FROM Members WHERE MemberID IN ({_placeholders(member_ids)}) "
+                       "ORDER BY MemberID FOR UPDATE", tuple(member_ids))
+        cursor.fetchall()
+
+def release_loan_slots(cursor, returned_by_member):
+    """Count returned loans off Members.ActiveLoans ({member_id: loans returned})."""
+    cursor.executemany("UPDATE Members SET ActiveLoans = GREATEST(ActiveLoans - %s, 0) WHERE MemberID = %s",
+                       [(count, member_id) for member_id, count in returned_by_member.items()])
+
+def reconcile_active_loans(force=False):
+    """
+    Daily job: repair Members.ActiveLoans wherever it drifted from the open
+    loans actually in Lending (e.g. after rows were edited by hand).
+
+    Drifted members are found with one aggregate query, then each is fixed in
+    its own short transaction: the member row is locked before its loans are
+    counted, so a checkout or return running at the same time either finishes
+    first and is counted, or waits and applies its change to the fixed value.
+
+    :return: Number of members repaired, or None if the job already ran today.
+    """
     cursor = mysql.connection.cursor()
-    
     try:
-        # Check if there are available copies
-        query = "SELECT Copies FROM Books WHERE BookID = %s"
+        if not claim_daily_run(cursor, RECONCILE_JOB, force):
+            mysql.connection.rollback()
+            return None
+        mysql.connection.commit()
+
+        cursor.execute("""
+            SELECT Members.MemberID
+            FROM Members
+            LEFT JOIN (
+                SELECT MemberID, COUNT(*) AS Loans FROM Lending
+                WHERE ReturnDate IS NULL
+                GROUP BY MemberID
+            ) AS OpenLoans ON OpenLoans.MemberID = Members.MemberID
+            WHERE Members.ActiveLoans <> COALESCE(OpenLoans.Loans, 0)
+        """)
+        drifted = [row[0] for row in cursor.fetchall()]
+        mysql.connection.commit()  # Start each repair from a fresh snapshot
+
+        repaired = 0
+        for member_id in drifted:
+            cursor.execute("SELECT ActiveLoans FROM Members WHERE MemberID = %s FOR UPDATE", (member_id,))
+            row = cursor.fetchone()
+            cursor.execute(OPEN_LOAN_COUNT_QUERY, (member_id,))
+            loans = cursor.fetchone()[0]
+            if row and row[0] != loans:
+                logger.warning(f"ActiveLoans drift for MemberID {member_id}: counter {row[0]}, open loans {loans}")
+                cursor.execute("UPDATE Members SET ActiveLoans = %s WHERE MemberID = %s", (loans, member_id))
+                bump_versions(cursor, 'Members')
+                repaired += 1
+            mysql.connection.commit()
+            if row and row[0] != loans:
+                cache.invalidate(member_key(member_id))
+
+        logger.info(f"Active loan counters reconciled: {repaired} of {len(drifted)} flagged members repaired")
+        return repaired
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# Lend Book Function (borrow book logic)
+def lend_book(book_id, member_id):
+    """
+    Lend one copy of a book to a member in a single short transaction.
+
+    The member's ActiveLoans counter is taken with take_loan_slot() (which
+    locks the member row), and the copy with a conditional UPDATE so the
+    available copies can never go negative.
+
+    :return: Dictionary with "success", "message" and, on success, "lend_id".
+             On failure "error" is one of "member_not_found", "limit_exceeded",
+             "unavailable" or "internal".
+    """
+    cursor = None
+    try:
+        cursor = mysql.connection.cursor()
+        error = take_loan_slot(cursor, member_id)
+        if error:
+            mysql.connection.rollback()
+            return error
+
+        # Check availability and take a copy in one statement
+        query = "UPDATE Books SET Copies = Copies - 1 WHERE BookID = %s AND Copies > 0"
         cursor.execute(query, (book_id,))
-        result = cursor.fetchone()
-        
-        if result and result[0] > 0:  # There are available copies
-            # Determine borrowing limit based on whether it's a student or class monitor
-            limit = 5 if not is_class_monitor else 10  # 5 for students, 10 for class monitors
-            
-            # Check if the borrower has exceeded their limit
-            query = "SELECT COUNT(*) FROM Lending WHERE MemberID = %s AND ReturnDate IS NULL"
-            cursor.execute(query, (member_id,))
-            borrowed_count = cursor.fetchone()[0]
-            
-            if borrowed_count < limit:
-                # Calculate due date (14 days from today)
-                due_date = datetime.now() + timedelta(days=14)
-                
-                # Update the number of available copies
-                query = "UPDATE Books SET Copies = Copies - 1 WHERE BookID = %s"
-                cursor.execute(query, (book_id,))
-                
-                # Insert lending record into Lending table
-                query = """
-                    INSERT INTO Lending (BookID, MemberID, DueDate)
-                    VALUES (%s, %s, %s)
-                """
-                cursor.execute(query, (book_id, member_id, due_date))
-                
-                # Commit changes
-                mysql.connection.commit()
-                logger.info(f"Book lent successfully: BookID {book_id}, MemberID {member_id}")
-                return {"message": "Book lent successfully!"}
-            else:
-                logger.warning(f"Limit exceeded for MemberID {member_id}. Can only borrow {limit} books.")
-                return {"message": f"Limit exceeded. You can only borrow {limit} books."}
-        else:
+        if cursor.rowcount == 0:
+            mysql.connection.rollback()
             logger.warning(f"No available copies for BookID {book_id}.")
-            return {"message": "No available copies."}
+            return {"success": False, "error": "unavailable", "message": "No available copies."}
+
+        # Calculate due date (14 days from today)
+        due_date = datetime.now() + timedelta(days=LOAN_PERIOD_DAYS)
+
+        # Insert lending record into Lending table
+        query = """
+            INSERT INTO Lending (BookID, MemberID, DueDate)
+            VALUES (%s, %s, %s)
+        """
+        cursor.execute(query, (book_id, member_id, due_date))
+        lend_id = cursor.lastrowid
+
+        # Commit changes
+        bump_versions(cursor, 'Books', 'Lending', 'Members')
+        mysql.connection.commit()
+        cache.invalidate(book_key(book_id), member_key(member_id))  # Copies and ActiveLoans changed
+        logger.info(f"Book lent successfully: BookID {book_id}, MemberID {member_id}")
+        return {"success": True, "message": "Book lent successfully!", "lend_id": lend_id}
     except Exception as e:
+        if cursor is not None:  # Otherwise no connection was obtained (e.g. PoolTimeout)
+            mysql.connection.rollback()
         logger.error(f"Error lending book: {str(e)}")
-        return {"message": "Error lending book."}
+        return {"success": False, "error": "internal", "message": "Error lending book."}
     finally:
-        cursor.close()
+        if cursor is not None:
+            cursor.close()
 
 # Return Book Function (return book logic)
 def return_book(lend_id):
-    """Update the lending record to set the ReturnDate and handle overdue fines."""
-    cursor = mysql.connection.cursor()
-    
+    """
+    Mark a loan as returned and put the copy back, reporting any overdue fine.
+
+    The borrower's row is locked first, as lend_book does. Closing the loan and
+    incrementing the copies then happen in one multi-table UPDATE that only
+    matches an open loan, so a loan can never be returned twice.
+
+    :return: Dictionary with "success", "message" and, on success, "fine".
+             On failure "error" is "not_found" or "internal".
+    """
+    cursor = None
     try:
-        # Check if the lending record exists and if it was borrowed
-        query = "SELECT BookID, DueDate FROM Lending WHERE LendID = %s AND ReturnDate IS NULL"
-        cursor.execute(query, (lend_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            book_id, due_date = result
-            return_date = datetime.now()
-            
-            # Ensure both dates are datetime objects
-            if isinstance(due_date, date):
-                due_date = datetime.combine(due_date, datetime.min.time())
-            if isinstance(return_date, date):
-                return_date = datetime.combine(return_date, datetime.min.time())
-
-            # Calculate overdue days safely
-            overdue_days = max((return_date - due_date).days, 0)
-
-            # Calculate fine for late return
-            fine = overdue_days * 1  # $1 fine for each day overdue
-            
-            # Update the Lending table with the return date
-            query = "UPDATE Lending SET ReturnDate = %s WHERE LendID = %s"
-            cursor.execute(query, (return_date, lend_id))
-            
-            # Update the Books table (increase available copies)
-            query = "UPDATE Books SET Copies = Copies + 1 WHERE BookID = %s"
-            cursor.execute(query, (book_id,))
-            
-            # Commit changes
-            mysql.connection.commit()
-            logger.info(f"Book returned successfully: LendID {lend_id}, Fine: {fine}")
-            return {"message": "Book returned successfully!", "fine": fine}
-        else:
+        cursor = mysql.connection.cursor()
+        return_date = datetime.now()
+        lock_loan_members(cursor, [lend_id])
+
+        # Close the loan and increase available copies in one statement
+        query = """
+            UPDATE Lending
+            JOIN Books ON Books.BookID = Lending.BookID
+            SET Lending.ReturnDate = %s, Books.Copies = Books.Copies + 1
+            WHERE Lending.LendID = %s AND Lending.ReturnDate IS NULL
+        """
+        cursor.execute(query, (return_date, lend_id))
+        if cursor.rowcount == 0:
+            mysql.connection.rollback()
             logger.warning(f"Lending record does not exist for LendID {lend_id}.")
-            return {"message": "This lending record does not exist."}
+            return {"success": False, "error": "not_found", "message": "This lending record does not exist."}
+
+        cursor.execute("SELECT BookID, MemberID, Barcode FROM Lending WHERE LendID = %s", (lend_id,))
+        book_id, member_id, barcode = cursor.fetchone()
+        release_loan_slots(cursor, {member_id: 1})
+
+        # Free the copy if the loan was issued by barcode
+        cursor.execute(FREE_BARCODE_QUERY, (lend_id,))
+        cursor.execute("DELETE FROM OverdueLoans WHERE LendID = %s", (lend_id,))
+
+        # Record the final fine for a late return in the fine ledger
+        fine = float(settle_loan_fines(cursor, [lend_id]).get(lend_id, 0))
+
+        # Commit changes
+        bump_versions(cursor, 'Books', 'Lending', 'Barcodes', 'Members')
+        mysql.connection.commit()
+        cache.invalidate(book_key(book_id), member_key(member_id))  # Copies and ActiveLoans changed
+        barcode_index.forget(barcode)  # The copy is back on the shelf
+
+        logger.info(f"Book returned successfully: LendID {lend_id}, Fine: {fine}")
+        return {"success": True, "message": "Book returned successfully!", "fine": fine}
     except Exception as e:
+        if cursor is not None:  # Otherwise no connection was obtained (e.g. PoolTimeout)
+            mysql.connection.rollback()
         logger.error(f"Error returning book: {str(e)}")
-        return {"message": "Error returning book."}
+        return {"success": False, "error": "internal", "message": "Error returning book."}
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+def _placeholders(values):
+    """Comma-separated %s placeholders for an IN (...) list."""
+    return ", ".join(["%s"] * len(values))
+
+# Bulk Lend Function (class-set checkout)
+def bulk_lend_books(items):
+    """
+    Lend many books in one transaction.
+
+    Members and books involved are locked once (in ID order, members first like
+    lend_book), the per-member limit (Members.ActiveLoans against the limit of
+    the member's MemberType) and copy availability are enforced in a single pass
+    over the items, and the accepted loans and counter changes are written with
+    executemany calls.
+
+    :param items: List of {"book_id", "member_id"} dictionaries.
+    :return: List of per-item result dictionaries, in input order.
+    """
+    results = [{"book_id": item.get("book_id"), "member_id": item.get("member_id")} for item in items]
+    member_ids = sorted({item["member_id"] for item in items})
+    book_ids = sorted({item["book_id"] for item in items})
+    if not items:
+        return results
+
+    cursor = mysql.connection.cursor()
+    try:
+        query = f"""
+            SELECT MemberID, ActiveLoans, MemberType FROM Members
+            WHERE MemberID IN ({_placeholders(member_ids)})
+            ORDER BY MemberID FOR UPDATE
+        """
+        cursor.execute(query, tuple(member_ids))
+        borrowed = {}
+        limits = {}
+        for member_id, active_loans, member_type in cursor.fetchall():
+            borrowed[member_id] = active_loans
+            limits[member_id] = loan_limit(member_type)
+        existing_members = set(borrowed)
+        lent = {}
+
+        query = f"SELECT BookID, Copies FROM Books WHERE BookID IN ({_placeholders(book_ids)}) ORDER BY BookID FOR UPDATE"
+        cursor.execute(query, tuple(book_ids))
+        copies = dict(cursor.fetchall())
+
+        due_date = datetime.now() + timedelta(days=LOAN_PERIOD_DAYS)
+        loans = []
+        taken = {}
+
+        for item, result in zip(items, results):
+            book_id, member_id = item["book_id"], item["member_id"]
+
+            if member_id not in existing_members:
+                result.update(success=False, error="member_not_found", message="Member not found.")
+            elif borrowed[member_id] >= limits[member_id]:
+                result.update(success=False, error="limit_exceeded",
+                              message=f"Limit exceeded. You can only borrow {limits[member_id]} books.")
+            elif copies.get(book_id, 0) <= 0:
+                result.update(success=False, error="unavailable", message="No available copies.")
+            else:
+                borrowed[member_id] += 1
+                lent[member_id] = lent.get(member_id, 0) + 1
+                copies[book_id] -= 1
+                taken[book_id] = taken.get(book_id, 0) + 1
+                loans.append((book_id, member_id, due_date))
+                result.update(success=True, message="Book lent successfully!")
+
+        if loans:
+            cursor.executemany("INSERT INTO Lending (BookID, MemberID, DueDate) VALUES (%s, %s, %s)", loans)
+            cursor.executemany("UPDATE Books SET Copies = Copies - %s WHERE BookID = %s",
+                               [(count, book_id) for book_id, count in taken.items()])
+            cursor.executemany("UPDATE Members SET ActiveLoans = ActiveLoans + %s WHERE MemberID = %s",
+                               [(count, member_id) for member_id, count in lent.items()])
+            bump_versions(cursor, 'Books', 'Lending', 'Members')
+        mysql.connection.commit()
+        cache.invalidate(*(book_key(book_id) for book_id in taken), *(member_key(member_id) for member_id in lent))
+        logger.info(f"Bulk lend: {len(loans)} of {len(items)} books lent.")
+        return results
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# Bulk Return Function
+def bulk_return_books(lend_ids):
+    """
+    Return many loans in one transaction. The borrowers' rows are locked
+    first, then the loans, in the same order as bulk_lend_books.
+
+    :param lend_ids: List of LendIDs.
+    :return: List of per-item result dictionaries ("lend_id", "success", "message",
+             "fine" on success), in input order.
+    """
+    results = [{"lend_id": lend_id} for lend_id in lend_ids]
+    if not lend_ids:
+        return results
+
+    unique_ids = sorted(set(lend_ids))
+    cursor = mysql.connection.cursor()
+    try:
+        lock_loan_members(cursor, unique_ids)
+        query = f"""
+            SELECT LendID, BookID, MemberID, Barcode FROM Lending
+            WHERE LendID IN ({_placeholders(unique_ids)}) AND ReturnDate IS NULL
+            ORDER BY LendID FOR UPDATE
+        """
+        cursor.execute(query, tuple(unique_ids))
+        open_loans = {lend_id: (book_id, member_id, barcode) for lend_id, book_id, member_id, barcode in cursor.fetchall()}
+
+        return_date = datetime.now()
+        returned = []
+        restocked = {}
+        released = {}
+        returned_results = []
+        barcodes = []
+
+        for lend_id, result in zip(lend_ids, results):
+            loan = open_loans.pop(lend_id, None)  # pop so a repeated ID is only returned once
+            if loan is None:
+                result.update(success=False, error="not_found", message="This lending record does not exist.")
+                continue
+            book_id, member_id, barcode = loan
+            barcodes.append(barcode)
+            returned.append(lend_id)
+            returned_results.append(result)
+            restocked[book_id] = restocked.get(book_id, 0) + 1
+            released[member_id] = released.get(member_id, 0) + 1
+            result.update(success=True, message="Book returned successfully!")
+
+        if returned:
+            query = f"UPDATE Lending SET ReturnDate = %s WHERE LendID IN ({_placeholders(returned)})"
+            cursor.execute(query, (return_date, *returned))
+            cursor.executemany("UPDATE Books SET Copies = Copies + %s WHERE BookID = %s",
+                               [(count, book_id) for book_id, count in restocked.items()])
+            query = f"UPDATE Barcodes SET CurrentLendID = NULL, IsBorrowed = FALSE WHERE CurrentLendID IN ({_placeholders(returned)})"
+            cursor.execute(query, tuple(returned))
+            cursor.execute(f"DELETE FROM OverdueLoans WHERE LendID IN ({_placeholders(returned)})", tuple(returned))
+            release_loan_slots(cursor, released)
+            fines = settle_loan_fines(cursor, returned)
+            for result in returned_results:
+                result["fine"] = float(fines.get(result["lend_id"], 0))
+            bump_versions(cursor, 'Books', 'Lending', 'Barcodes', 'Members')
+        mysql.connection.commit()
+        cache.invalidate(*(book_key(book_id) for book_id in restocked), *(member_key(member_id) for member_id in released))
+        barcode_index.forget(*barcodes)
+        logger.info(f"Bulk return: {len(returned)} of {len(lend_ids)} loans returned.")
+        return results
+    except Exception:
+        mysql.connection.rollback()
+        raise
     finally:
         cursor.close()
 
+# Column names of the loan listing tuples; returned and all-record listings add ReturnDate
+ACTIVE_LOAN_COLUMNS = ("LendID", "BookTitle", "MemberName", "IssueDate", "DueDate")
+LOAN_COLUMNS = ACTIVE_LOAN_COLUMNS + ("ReturnDate",)
+
 # Fetch Lending Records (fetch details of lent books, including members and due dates)
+ACTIVE_LOANS_QUERY = """
+    SELECT 
+        Lending.LendID,
+        Books.Title AS BookTitle,
+        Members.Name AS MemberName,
+        Lending.IssueDate,
+        Lending.DueDate
+    FROM Lending
+    JOIN Books ON Lending.BookID = Books.BookID
+    JOIN Members ON Lending.MemberID = Members.MemberID
+    WHERE Lending.ReturnDate IS NULL
+"""
+
 def get_active_loans():
     """Fetch all active lending records (not yet returned)."""
     cursor = mysql.connection.cursor()
     try:
-        query = """
-            SELECT 
-                Lending.LendID,
-                Books.Title AS BookTitle,
-                Members.Name AS MemberName,
-                Lending.IssueDate,
-                Lending.DueDate
-            FROM Lending
-            JOIN Books ON Lending.BookID = Books.BookID
-            JOIN Members ON Lending.MemberID = Members.MemberID
-            WHERE Lending.ReturnDate IS NULL
-        """
-        cursor.execute(query)
+        cursor.execute(ACTIVE_LOANS_QUERY)
         active_loans = cursor.fetchall()
         return active_loans
     except Exception as e:
@@ -130,86 +436,180 @@ def get_active_loans():
     finally:
         cursor.close()
 
-def get_returned_loans():
-    """Fetch all returned lending records."""
+# Sort keys accepted by find_loans(), mapped to SQL columns
+LOAN_SORT_COLUMNS = {
+    "lend_id": "Lending.LendID",
+    "title": "Books.Title",
+    "member": "Members.Name",
+    "issue_date": "Lending.IssueDate",
+    "due_date": "Lending.DueDate",
+    "return_date": "Lending.ReturnDate",
+}
+
+def find_loans_queries(active_only, sort="lend_id", order="asc", q=None, due_before=None, due_after=None,
+                       member_id=None):
+    """
+    SQL of find_loans(): (page query, count query, filter parameters). The
+    page query takes LIMIT and OFFSET after the filter parameters.
+    """
+    conditions = []
+    params = []
+    if active_only:
+        conditions.append("Lending.ReturnDate IS NULL")
+    if member_id is not None:
+        conditions.append("Lending.MemberID = %s")
+        params.append(member_id)
+    if due_before is not None:
+        conditions.append("Lending.DueDate < %s")
+        params.append(due_before)
+    if due_after is not None:
+        conditions.append("Lending.DueDate > %s")
+        params.append(due_after)
+    if q:
+        matches = ["Books.Title LIKE %s", "Members.Name LIKE %s"]
+        params.extend([f"{q}%", f"{q}%"])
+        if q.isdigit():
+            matches.append("Lending.LendID = %s")
+            params.append(int(q))
+        conditions.append(f"({' OR '.join(matches)})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    direction = "DESC" if order == "desc" else "ASC"
+    order_by = f"{LOAN_SORT_COLUMNS[sort]} {direction}"
+    if sort != "lend_id":
+        order_by += f", Lending.LendID {direction}"
+    columns = "Lending.LendID, Books.Title AS BookTitle, Members.Name AS MemberName, Lending.IssueDate, Lending.DueDate"
+    if not active_only:
+        columns += ", Lending.ReturnDate"
+    joins = """
+        FROM Lending
+        JOIN Books ON Lending.BookID = Books.BookID
+        JOIN Members ON Lending.MemberID = Members.MemberID
+    """
+    return (f"SELECT {columns} {joins} {where} ORDER BY {order_by} LIMIT %s OFFSET %s",
+            f"SELECT COUNT(*) {joins} {where}", params)
+
+def find_loans(active_only, sort="lend_id", order="asc", q=None, due_before=None, due_after=None,
+               member_id=None, limit=100, offset=0):
+    """
+    Fetch one page of loans, sorted and filtered in SQL.
+
+    Every sort key is backed by an index (see migrations/0006 and 0011), and
+    LendID breaks ties so pages never overlap. `q` matches a book title or
+    member name prefix, or a LendID when it is a number.
+
+    :param active_only: Only loans not yet returned (/lending/active) instead of all of them.
+    :param sort: A key of LOAN_SORT_COLUMNS.
+    :param order: "asc" or "desc".
+    :param due_before: Only loans due before this date (optional).
+    :param due_after: Only loans due after this date (optional).
+    :return: Tuple of (rows, total). Rows are (LendID, BookTitle, MemberName,
+             IssueDate, DueDate), plus ReturnDate unless `active_only`; total
+             is the number of loans matching the filters.
+    """
+    page_query, count_query, params = find_loans_queries(active_only, sort, order, q, due_before, due_after, member_id)
     cursor = mysql.connection.cursor()
     try:
-        query = """
-            SELECT 
-                Lending.LendID,
-                Books.Title AS BookTitle,
-                Members.Name AS MemberName,
-                Lending.IssueDate,
-                Lending.DueDate,
-                Lending.ReturnDate
-            FROM Lending
-            JOIN Books ON Lending.BookID = Books.BookID
-            JOIN Members ON Lending.MemberID = Members.MemberID
-            WHERE Lending.ReturnDate IS NOT NULL
-        """
-        cursor.execute(query)
-        returned_loans = cursor.fetchall()
-        return returned_loans
-    except Exception as e:
-        logger.error(f"Error fetching returned loans: {str(e)}")
-        return []
+        cursor.execute(page_query, (*params, limit, offset))
+        rows = cursor.fetchall()
+        if offset == 0 and len(rows) < limit:
+            total = len(rows)  # The whole result fit on the first page
+        else:
+            cursor.execute(count_query, tuple(params))
+            total = cursor.fetchone()[0]
+        return rows, total
     finally:
         cursor.close()
 
-# Get Overdue Books (fetch lending records where books are overdue)
-def get_overdue_books():
-    """Fetch all overdue lending records where books are not returned."""
-    cursor = mysql.connection.cursor()
+RETURNED_LOANS_QUERY = """
+    SELECT 
+        Lending.LendID,
+        Books.Title AS BookTitle,
+        Members.Name AS MemberName,
+        Lending.IssueDate,
+        Lending.DueDate,
+        Lending.ReturnDate
+    FROM Lending
+    JOIN Books ON Lending.BookID = Books.BookID
+    JOIN Members ON Lending.MemberID = Members.MemberID
+    WHERE Lending.ReturnDate IS NOT NULL
+"""
+
+def stream_query(query, params=()):
+    """
+    Yield the rows of `query` one at a time from an unbuffered (server-side)
+    cursor, so memory stays flat however many rows match.
+
+    The request's connection cannot run anything else until the generator is
+    exhausted or closed.
+    """
+    cursor = mysql.connection.cursor(SSCursor)
     try:
-        query = """
-            SELECT 
-                Lending.LendID,
-                Books.Title AS BookTitle,
-                Members.Name AS MemberName,
-                Lending.IssueDate,
-                Lending.DueDate
-            FROM Lending
-            JOIN Books ON Lending.BookID = Books.BookID
-            JOIN Members ON Lending.MemberID = Members.MemberID
-            WHERE Lending.DueDate < CURDATE() AND Lending.ReturnDate IS NULL
-        """
-        cursor.execute(query)
-        overdue_books = cursor.fetchall()
-        return overdue_books
-    except Exception as e:
-        logger.error(f"Error fetching overdue books: {str(e)}")
-        return []
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(STREAM_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
     finally:
         cursor.close()
 
+def iter_returned_loans():
+    """Stream all returned lending records."""
+    return stream_query(RETURNED_LOANS_QUERY)
+
+def get_returned_loans():
+    """Fetch all returned lending records."""
+    try:
+        return list(iter_returned_loans())
+    except Exception as e:
+        logger.error(f"Error fetching returned loans: {str(e)}")
+        return []
+
 # Get Lending Records (fetch all lending records)
+LENDING_RECORDS_QUERY = """
+    SELECT 
+        Lending.LendID,
+        Books.Title AS BookTitle,
+        Members.Name AS MemberName,
+        Lending.IssueDate,
+        Lending.DueDate,
+        Lending.ReturnDate
+    FROM Lending
+    JOIN Books ON Lending.BookID = Books.BookID
+    JOIN Members ON Lending.MemberID = Members.MemberID
+"""
+
+def iter_lending_records():
+    """Stream all lending records including book and member details."""
+    return stream_query(LENDING_RECORDS_QUERY)
+
 def get_lending_records():
     """Fetch all lending records including book and member details."""
-    cursor = mysql.connection.cursor()
     try:
-        query = """
-            SELECT 
-                Lending.LendID,
-                Books.Title AS BookTitle,
-                Members.Name AS MemberName,
-                Lending.IssueDate,
-                Lending.DueDate,
-                Lending.ReturnDate
-            FROM Lending
-            JOIN Books ON Lending.BookID = Books.BookID
-            JOIN Members ON Lending.MemberID = Members.MemberID
-        """
-        cursor.execute(query)
-        lending_records = cursor.fetchall()
-        return lending_records
+        return list(iter_lending_records())
     except Exception as e:
         logger.error(f"Error fetching lending records: {str(e)}")
         return []
-    finally:
-        cursor.close()
+
+@record
+class MemberLoanRecord:
+    LendID: int
+    BookID: int
+    IssueDate: date
+    DueDate: date
+    ReturnDate: date
+
+@record
+class BookLoanRecord:
+    LendID: int
+    MemberName: str
+    IssueDate: date
+    DueDate: date
+    ReturnDate: date
 
 def get_borrowing_history(member_id):
-    """Fetch borrowing history for a specific member."""
+    """Fetch borrowing history for a specific member, as MemberLoanRecord records."""
     cursor = mysql.connection.cursor()
     try:
         query = """
@@ -218,102 +618,34 @@ def get_borrowing_history(member_id):
             WHERE MemberID = %s
         """
         cursor.execute(query, (member_id,))
-        records = cursor.fetchall()
-
-        # Convert records to a list of dictionaries
-        borrowing_history = []
-        for record in records:
-            borrowing_history.append({
-                "LendID": record[0],
-                "BookID": record[1],
-                "IssueDate": record[2].strftime("%Y-%m-%d") if record[2] else None,
-                "DueDate": record[3].strftime("%Y-%m-%d") if record[3] else None,
-                "ReturnDate": record[4].strftime("%Y-%m-%d") if record[4] else None
-            })
-        return borrowing_history
+        return list(map_rows(MemberLoanRecord, cursor.fetchall()))
     except Exception as e:
         logger.error(f"Error fetching borrowing history for MemberID {member_id}: {str(e)}")
         return []
     finally:
         cursor.close()
 
+BOOK_HISTORY_QUERY = """
+    SELECT 
+        Lending.LendID,
+        Members.Name AS MemberName,
+        Lending.IssueDate,
+        Lending.DueDate,
+        Lending.ReturnDate
+    FROM Lending
+    JOIN Members ON Lending.MemberID = Members.MemberID
+    WHERE BookID = %s
+    ORDER BY Lending.IssueDate DESC
+"""
+
+def iter_book_borrowing_history(book_id):
+    """Stream the borrowing history of a specific book, newest first, as BookLoanRecord records."""
+    yield from map_rows(BookLoanRecord, stream_query(BOOK_HISTORY_QUERY, (book_id,)))
+
 def get_book_borrowing_history(book_id):
     """Fetch borrowing history for a specific book."""
-    cursor = mysql.connection.cursor()
     try:
-        query = """
-            SELECT 
-                Lending.LendID,
-                Members.Name AS MemberName,
-                Lending.IssueDate,
-                Lending.DueDate,
-                Lending.ReturnDate
-            FROM Lending
-            JOIN Members ON Lending.MemberID = Members.MemberID
-            WHERE BookID = %s
-            ORDER BY Lending.IssueDate DESC
-        """
-        cursor.execute(query, (book_id,))
-        records = cursor.fetchall()
-
-        # Convert records to a list of dictionaries
-        borrowing_history = []
-        for record in records:
-            borrowing_history.append({
-                "LendID": record[0],
-                "MemberName": record[1],
-                "IssueDate": record[2].strftime("%Y-%m-%d") if record[2] else None,
-                "DueDate": record[3].strftime("%Y-%m-%d") if record[3] else None,
-                "ReturnDate": record[4].strftime("%Y-%m-%d") if record[4] else None
-            })
-        return borrowing_history
+        return list(iter_book_borrowing_history(book_id))
     except Exception as e:
         logger.error(f"Error fetching borrowing history for BookID {book_id}: {str(e)}")
         return []
-    finally:
-        cursor.close()
-
-def lend_book(member_id, barcode):
-    # Check if barcode exists and is available
-    cursor = mysql.connection.cursor()
-    try:
-        cursor.execute("""SELECT BookID FROM Barcodes WHERE Barcode = %s AND IsBorrowed = FALSE""", (barcode,))
-        book = cursor.fetchone()
-
-        if not book:
-            return "Book not available or already lent."
-
-        # Record lending and update barcode status
-        book_id = book['BookID']
-        cursor.execute("""INSERT INTO Lending (BookID, MemberID, IssueDate, DueDate) VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 14 DAY))""", (book_id, member_id))
-
-        cursor.execute("""UPDATE Barcodes SET IsBorrowed = TRUE WHERE Barcode = %s""", (barcode,))
-        mysql.connection.commit()
-        return "Book successfully lent."
-    except Exception as e:
-        logger.error(f"Error lending book with barcode {barcode}: {str(e)}")
-        return "Error lending book."
-    finally:
-        cursor.close()
-
-def return_book(barcode):
-    # Verify if barcode exists
-    cursor = mysql.connection.cursor()
-    try:
-        cursor.execute("""SELECT BookID FROM Barcodes WHERE Barcode = %s AND IsBorrowed = TRUE""", (barcode,))
-        book = cursor.fetchone()
-
-        if not book:
-            return "Invalid barcode or book not borrowed."
-
-        # Update return status
-        book_id = book['BookID']
-        cursor.execute("""UPDATE Lending SET ReturnDate = CURDATE() WHERE BookID = %s AND ReturnDate IS NULL""", (book_id,))
-        cursor.execute("""UPDATE Barcodes SET IsBorrowed = FALSE WHERE Barcode = %s""", (barcode,))
-        mysql.connection.commit()
-        return "Book returned successfully."
-    except Exception as e:
-        logger.error(f"Error returning book with barcode {barcode}: {str(e)}")
-        return "Error returning book."
-    finally:
-        cursor.close()
@@ -1,33 +1,75 @@
 from db_config import mysql
+from datetime import date
+from models.versions import bump_versions
+from models.rows import record, map_rows
+from cache import cache, member_key
 
-def add_member(name, contact):
+MEMBER_TYPES = ("student", "class_monitor")  # Each has a row in FineRates
+MEMBER_COLUMNS = ("MemberID", "Name", "Contact", "JoinDate", "MemberType", "ActiveLoans")  # Listing row order
+
+def add_member(name, contact, member_type="student"):
     cursor = mysql.connection.cursor()
-    query = "INSERT INTO Members (Name, Contact) VALUES (%s, %s)"
-    cursor.execute(query, (name, contact))
+    query = "INSERT INTO Members (Name, Contact, MemberType) VALUES (%s, %s, %s)"
+    cursor.execute(query, (name, contact, member_type))
+    bump_versions(cursor, 'Members')
     mysql.connection.commit()
     cursor.close()
 
 def get_members():
     cursor = mysql.connection.cursor()
-    query = "SELECT * FROM Members"
+    query = f"SELECT {', '.join(MEMBER_COLUMNS)} FROM Members"
     cursor.execute(query)
     members = cursor.fetchall()
     cursor.close()
     return members
 
+def search_members_query(term, limit=50):
+    """SQL and parameters of search_members()."""
+    query = f"SELECT {', '.join(MEMBER_COLUMNS)} FROM Members WHERE Name LIKE %s"
+    params = [f"{term}%"]
+    if term.isdigit():
+        query += " OR MemberID = %s"
+        params.append(int(term))
+    query += " ORDER BY Name LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+def search_members(term, limit=50):
+    """
+    Find members whose name starts with `term` (prefix match, so an index on
+    Name can be used) or whose ID equals it.
+    """
+    cursor = mysql.connection.cursor()
+    cursor.execute(*search_members_query(term, limit))
+    members = cursor.fetchall()
+    cursor.close()
+    return members
+
 def get_member(member_id):
+    """Fetch a single member by ID (served from the cache when possible)"""
+    return cache.get_or_load(member_key(member_id), lambda: _load_member(member_id))
+
+def _load_member(member_id):
     cursor = mysql.connection.cursor()
     query = "SELECT * FROM Members WHERE MemberID = %s"
     cursor.execute(query, (member_id,))
     member = cursor.fetchone()
     cursor.close()
     return member
-def update_member(member_id, name, contact):
+def update_member(member_id, name, contact, member_type=None):
     cursor = mysql.connection.cursor()
-    query = "UPDATE Members SET Name = %s, Contact = %s WHERE MemberID = %s"
-    cursor.execute(query, (name, contact, member_id))
+    if member_type is None:
+        query = "UPDATE Members SET Name = %s, Contact = %s WHERE MemberID = %s"
+        cursor.execute(query, (name, contact, member_id))
+    else:
+        query = "UPDATE Members SET Name = %s, Contact = %s, MemberType = %s WHERE MemberID = %s"
+        cursor.execute(query, (name, contact, member_type, member_id))
+    rows_affected = cursor.rowcount  # Before bump_versions() runs its own UPDATE on this cursor
+    if rows_affected > 0:
+        bump_versions(cursor, 'Members')
     mysql.connection.commit()
-    rows_affected = cursor.rowcount
+    if rows_affected > 0:
+        cache.invalidate(member_key(member_id))
     cursor.close()
     return rows_affected > 0  # Returns True if update was successful
 
@@ -35,35 +77,89 @@ def delete_member(member_id):
     cursor = mysql.connection.cursor()
     query = "DELETE FROM Members WHERE MemberID = %s"
     cursor.execute(query, (member_id,))
+    rows_affected = cursor.rowcount  # Before bump_versions() runs its own UPDATE on this cursor
+    if rows_affected > 0:
+        bump_versions(cursor, 'Members')
     mysql.connection.commit()
-    rows_affected = cursor.rowcount
+    if rows_affected > 0:
+        cache.invalidate(member_key(member_id))
     cursor.close()
     return rows_affected > 0 
 
-def get_borrowing_history(member_id):
-    connection = mysql.connection  # Use the existing database connection
-    cursor = connection.cursor()
+HISTORY_STATUSES = ("active", "returned", "overdue")
+
+@record
+class HistoryEntry:
+    LendID: int
+    BookTitle: str
+    IssueDate: date
+    DueDate: date
+    ReturnDate: date
 
+def borrowing_history_query(member_id, limit=None, after=None, date_from=None, date_to=None, status=None):
+    """SQL and parameters of get_borrowing_history()."""
     query = """
-    SELECT 
-        Books.Title AS BookTitle, 
-        Lending.IssueDate, 
-        Lending.DueDate, 
-        Lending.ReturnDate 
-    FROM Lending 
-    JOIN Books ON Lending.BookID = Books.BookID 
-    WHERE Lending.MemberID = %s
-    ORDER BY Lending.IssueDate DESC;
+        SELECT
+            Lending.LendID,
+            Books.Title AS BookTitle,
+            Lending.IssueDate,
+            Lending.DueDate,
+            Lending.ReturnDate
+        FROM Lending
+        JOIN Books ON Lending.BookID = Books.BookID
+        WHERE Lending.MemberID = %s
     """
+    params = [member_id]
 
-    cursor.execute(query, (member_id,))
-    
-    # Fetch column names
-    columns = [col[0] for col in cursor.description]
-    
-    # Convert query result into a list of dictionaries
-    history = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    if after is not None:
+        query += " AND Lending.LendID < %s"
+        params.append(after)
+    if date_from is not None:
+        query += " AND Lending.IssueDate >= %s"
+        params.append(date_from)
+    if date_to is not None:
+        query += " AND Lending.IssueDate <= %s"
+        params.append(date_to)
+    if status == "active":
+        query += " AND Lending.ReturnDate IS NULL"
+    elif status == "returned":
+        query += " AND Lending.ReturnDate IS NOT NULL"
+    elif status == "overdue":
+        query += " AND Lending.ReturnDate IS NULL AND Lending.DueDate < CURDATE()"
+
+    query += " ORDER BY Lending.LendID DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, tuple(params)
+
+def get_borrowing_history(member_id, limit=None, after=None, date_from=None, date_to=None, status=None):
+    """
+    Fetch a member's loans, newest first (by LendID).
+
+    With a limit, keyset pagination is used: only loans with a LendID below
+    `after` are read, so deep pages cost the same as the first one.
 
+    :param date_from: Only loans issued on or after this date (optional).
+    :param date_to: Only loans issued on or before this date (optional).
+    :param status: "active", "returned" or "overdue" (optional).
+    :return: List of HistoryEntry records.
+    """
+    cursor = mysql.connection.cursor()
+    cursor.execute(*borrowing_history_query(member_id, limit, after, date_from, date_to, status))
+    history = list(map_rows(HistoryEntry, cursor.fetchall()))
     cursor.close()
+    return history
 
-    return history
\ No newline at end of file
+def get_borrowing_history_page(member_id, limit, after=None, **filters):
+    """
+    Fetch one page of a member's history using keyset pagination on LendID.
+
+    :return: Tuple of (loans, next_cursor). next_cursor is None on the last page.
+    """
+    # Read one extra row to find out whether another page exists
+    history = get_borrowing_history(member_id, limit + 1, after, **filters)
+    if len(history) > limit:
+        history = history[:limit]
+        return history, history[-1].LendID
+    return history, None
@@ -0,0 +1,88 @@
+from db_config import mysql
+from models.jobs import claim_daily_run, ran_today
+from models.fines import due_fine_sql
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+REFRESH_JOB = 'refresh_overdue'
+
+REFRESH_QUERY = f"""
+    INSERT INTO OverdueLoans (LendID, BookID, MemberID, IssueDate, DueDate, DaysOverdue, Fine)
+    SELECT Lending.LendID, Lending.BookID, Lending.MemberID, Lending.IssueDate, Lending.DueDate,
+           DATEDIFF(CURDATE(), Lending.DueDate), {due_fine_sql("CURDATE()")}
+    FROM Lending
+    JOIN Members ON Members.MemberID = Lending.MemberID
+    JOIN FineRates ON FineRates.MemberType = Members.MemberType
+    WHERE Lending.ReturnDate IS NULL AND Lending.DueDate < CURDATE()
+"""
+
+def refresh_overdue(force=False):
+    """
+    Rebuild OverdueLoans for today: every open loan past its due date, with
+    the days overdue and the fine owed so far at its member's FineRates.
+
+    The job row in ScheduledJobs is claimed in the same transaction, so when
+    several workers try at once only the first rebuilds and the others return
+    without doing anything.
+
+    :param force: Rebuild even if it already ran today.
+    :return: Number of overdue loans, or None if another worker did the refresh.
+    """
+    cursor = mysql.connection.cursor()
+    try:
+        if not claim_daily_run(cursor, REFRESH_JOB, force):
+            mysql.connection.rollback()
+            return None
+
+        cursor.execute("DELETE FROM OverdueLoans")
+        cursor.execute(REFRESH_QUERY)
+        count = cursor.rowcount
+        mysql.connection.commit()
+        logger.info(f"Overdue loans refreshed: {count} overdue")
+        return count
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def ensure_overdue_fresh():
+    """Refresh OverdueLoans now if the scheduled run has not happened yet today."""
+    if not ran_today(REFRESH_JOB):
+        refresh_overdue()
+
+# Column names of get_overdue_books() rows
+OVERDUE_COLUMNS = ("LendID", "BookTitle", "MemberName", "IssueDate", "DueDate", "DaysOverdue", "Fine")
+
+def get_overdue_books():
+    """
+    Fetch all overdue loans from the precomputed OverdueLoans table.
+
+    :return: List of tuples (LendID, BookTitle, MemberName, IssueDate, DueDate, DaysOverdue, Fine).
+    """
+    try:
+        ensure_overdue_fresh()
+        cursor = mysql.connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT
+                    OverdueLoans.LendID,
+                    Books.Title AS BookTitle,
+                    Members.Name AS MemberName,
+                    OverdueLoans.IssueDate,
+                    OverdueLoans.DueDate,
+                    OverdueLoans.DaysOverdue,
+                    OverdueLoans.Fine
+                FROM OverdueLoans
+                JOIN Books ON OverdueLoans.BookID = Books.BookID
+                JOIN Members ON OverdueLoans.MemberID = Members.MemberID
+                ORDER BY OverdueLoans.DueDate
+            """)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:
+        logger.error(f"Error fetching overdue books: {str(e)}")
+        return []
@@ -0,0 +1,34 @@
+"""
+Compact records for query results.
+
+A record is a slotted dataclass: each row becomes one small fixed-layout
+object instead of a dict carrying its own copy of every key. Values are kept
+as the driver returns them (dates stay dates); json_provider.py serializes
+records and dates directly, natively when orjson is installed.
+"""
+from dataclasses import dataclass
+from itertools import starmap
+
+def record(cls):
+    """
+    Class decorator: turn a class of field annotations into a slotted dataclass.
+
+    Fields are in annotation order, matching the column order of the query
+    the record is built from, so a row tuple maps with `Record(*row)`.
+    """
+    fields = tuple(cls.__annotations__)
+    namespace = {name: value for name, value in vars(cls).items() if name not in ("__dict__", "__weakref__")}
+    namespace["__slots__"] = fields
+    namespace["__record_fields__"] = fields
+    return dataclass(type(cls.__name__, cls.__bases__, namespace))
+
+def is_record(obj):
+    return hasattr(type(obj), "__record_fields__")
+
+def as_dict(obj):
+    """A record's fields as a dictionary, in field order."""
+    return {name: getattr(obj, name) for name in obj.__record_fields__}
+
+def map_rows(record_type, rows):
+    """Build one record per row tuple (lazily, so it also works on streamed rows)."""
+    return starmap(record_type, rows)
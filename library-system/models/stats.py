@@ -0,0 +1,39 @@
+from db_config import mysql
+from models.overdue import ensure_overdue_fresh
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+LIBRARY_STATS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM Books) AS TotalBooks,
+        (SELECT COUNT(*) FROM Members) AS TotalMembers,
+        (SELECT COUNT(*) FROM Lending WHERE ReturnDate IS NULL) AS IssuedBooks,
+        (SELECT COUNT(*) FROM OverdueLoans) AS OverdueBooks
+"""
+
+def get_library_stats():
+    """
+    Fetch the dashboard counters with a single round-trip of COUNT(*) aggregates.
+    The overdue count comes from the precomputed OverdueLoans table.
+    """
+    try:
+        ensure_overdue_fresh()
+    except Exception as e:
+        logger.error(f"Error refreshing overdue loans: {str(e)}")
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute(LIBRARY_STATS_QUERY)
+        total_books, total_members, issued_books, overdue_books = cursor.fetchone()
+        return {
+            "total_books": total_books,
+            "total_members": total_members,
+            "issued_books": issued_books,
+            "overdue_books": overdue_books
+        }
+    except Exception as e:
+        logger.error(f"Error fetching library stats: {str(e)}")
+        return None
+    finally:
+        cursor.close()
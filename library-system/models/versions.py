@@ -0,0 +1,36 @@
+from db_config import mysql
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+def bump_versions(cursor, *tables):
+    """
+    Increment the change version of each table.
+
+    Call it as the last statement before commit, on the cursor of the write
+    transaction: the version then changes atomically with the data, and the
+    TableVersions row lock is only held for the commit itself.
+    """
+    placeholders = ", ".join(["%s"] * len(tables))
+    query = f"UPDATE TableVersions SET Version = Version + 1 WHERE TableName IN ({placeholders})"
+    cursor.execute(query, tables)
+
+def get_versions(*tables):
+    """
+    Fetch the current change version of each table.
+
+    :return: Dictionary of table name to version, or None if the versions
+             cannot be read (e.g. the TableVersions table is missing).
+    """
+    cursor = mysql.connection.cursor()
+    try:
+        placeholders = ", ".join(["%s"] * len(tables))
+        cursor.execute(f"SELECT TableName, Version FROM TableVersions WHERE TableName IN ({placeholders})", tables)
+        versions = dict(cursor.fetchall())
+        return versions if len(versions) == len(set(tables)) else None
+    except Exception as e:
+        logger.error(f"Error fetching table versions for {tables}: {str(e)}")
+        return None
+    finally:
+        cursor.close()
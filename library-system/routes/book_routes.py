@@ -1,19 +1,68 @@
 from flask import Blueprint, jsonify, request
+import io
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from models.books import add_book, get_books, advanced_search_books, update_book, delete_book, get_book_by_isbn,  add_book_with_barcodes, get_barcodes_by_book_id
-from models.lending import get_book_borrowing_history
+from models.books import add_book, get_books, get_books_page, advanced_search_books, DEFAULT_SEARCH_LIMIT, update_book, delete_book, get_book_by_isbn,  add_book_with_barcodes, get_barcodes_by_book_id
+from models.book_import import read_catalog, import_books
+from models.lending import iter_book_borrowing_history
+from routes.columns import columnar
+from routes.conditional import conditional
+from routes.streaming import stream_json
 
 book_routes = Blueprint('books', __name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _flag(value):
+    """Parse a boolean query-string flag such as ?available_only=true."""
+    return (value or '').lower() in ('1', 'true', 'yes', 'on')
+
 @book_routes.route('/books/all', methods=['GET'])
+@conditional('Books')
 def fetch_books():
-    books = get_books()
-    return jsonify(books)
+    """
+    Fetch books. Passing `limit` and/or `after` switches to keyset pagination and
+    returns {"data": [...], "next_cursor": ...}; pass next_cursor back as `after`
+    to get the following page.
+    """
+    if 'limit' not in request.args and 'after' not in request.args:
+        books = get_books()
+        return jsonify(columnar(books))
+
+    limit = request.args.get('limit', type=int, default=DEFAULT_PAGE_SIZE)
+    after = request.args.get('after', type=int)
+    if limit is None or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    books, next_cursor = get_books_page(limit, after)
+    return jsonify({"data": columnar(books), "next_cursor": next_cursor})
+
+@book_routes.route('/books/import', methods=['POST'])
+def import_books_route():
+    """
+    Import a CSV (or tab-separated) catalog, uploaded as the multipart field
+    `file` or as the raw request body. Pass ?barcodes=false to skip barcode
+    generation. Returns the import report with per-row errors.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    generate_barcodes = _flag(request.args.get('barcodes', 'true'))
+    try:
+        report = import_books(read_catalog(text), generate_barcodes=generate_barcodes)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error importing catalog: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify(report), 200
 
 @book_routes.route('/books/isbn/<string:isbn>', methods=['GET'])
 def get_book_by_isbn_route(isbn):
@@ -68,32 +117,22 @@ def create_book():
         return jsonify({"error": "Internal server error"}), 500
 
 @book_routes.route('/books/search', methods=['GET'])
+@conditional('Books', 'Lending')
 def search_books():
     """Search books with advanced filtering options."""
+    q = request.args.get('q')
     title = request.args.get('title')
     author = request.args.get('author')
     isbn = request.args.get('isbn')
     genre = request.args.get('genre')
-    available_only = request.args.get('available_only', type=bool, default=False)
-    sort_by_popularity = request.args.get('sort_by_popularity', type=bool, default=False)
-
-    books = advanced_search_books(title, author, isbn, genre, available_only, sort_by_popularity)
-
-    # Formatting the books to a JSON-friendly structure
-    book_list = []
-    for book in books:
-        book_list.append({
-            "id": book[0],
-            "title": book[1],
-            "author": book[2],
-            "genre": book[3],
-            "isbn": book[4],
-            "copies": book[5],
-            "availability": "Available" if book[5] > 0 else "Borrowed",
-            "popularity": book[6]
-        })
-
-    return jsonify(book_list)
+    available_only = _flag(request.args.get('available_only'))
+    sort_by_popularity = _flag(request.args.get('sort_by_popularity'))
+    limit = min(request.args.get('limit', type=int, default=DEFAULT_SEARCH_LIMIT), MAX_PAGE_SIZE)
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    books = advanced_search_books(title, author, isbn, genre, available_only, sort_by_popularity, q, limit)
+    return jsonify(columnar(books))
 
 @book_routes.route('/books/update/<int:book_id>', methods=['PUT'])
 def update_book_route(book_id):
@@ -132,10 +171,9 @@ def delete_book_route(book_id):
 
 @book_routes.route('/books/history/<int:book_id>', methods=['GET'])
 def get_book_history(book_id):
-    """Get borrowing history for a specific book"""
+    """Stream the borrowing history for a specific book"""
     try:
-        history = get_book_borrowing_history(book_id)
-        return jsonify(history), 200
+        return stream_json(iter_book_borrowing_history(book_id), f"history of book {book_id}")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -0,0 +1,43 @@
+from flask import Blueprint, jsonify, request
+from models.circulation import scan
+
+circulation_routes = Blueprint('circulation', __name__)
+
+SCAN_ACTIONS = ("auto", "checkout", "return")
+
+# HTTP status for each scan() failure
+SCAN_ERROR_STATUS = {
+    "not_found": 404,
+    "member_not_found": 404,
+    "member_required": 400,
+    "limit_exceeded": 400,
+    "unavailable": 409,
+    "not_on_loan": 409,
+    "internal": 500,
+}
+
+@circulation_routes.route('/circulation/scan', methods=['POST'])
+def scan_route():
+    """
+    Check a copy in or out by barcode. A copy on loan is returned; an available
+    copy is lent to member_id. Send "action": "checkout" or "return" to force one.
+    """
+    data = request.json or {}
+    barcode = str(data.get('barcode') or '').strip()
+    action = data.get('action', 'auto')
+    member_id = data.get('member_id')
+
+    if not barcode:
+        return jsonify({"message": "Barcode is required."}), 400
+    if action not in SCAN_ACTIONS:
+        return jsonify({"message": f"action must be one of {', '.join(SCAN_ACTIONS)}."}), 400
+    if member_id is not None:
+        try:
+            member_id = int(member_id)
+        except (TypeError, ValueError):
+            return jsonify({"message": "member_id must be a number."}), 400
+
+    result = scan(barcode, member_id, action)
+    if result["success"]:
+        return jsonify(result), 200
+    return jsonify(result), SCAN_ERROR_STATUS.get(result.get("error"), 400)
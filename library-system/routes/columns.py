@@ -0,0 +1,57 @@
+"""
+Opt-in columnar wire format for list responses.
+
+With ?format=columns a list of rows is sent as
+{"columns": [...], "rows": [[...], ...]}: the column names once, then every
+row as an array of values in that order, instead of one object per row
+repeating every key. frontend/api_client.py turns it back into rows that can
+be read by position or by column name.
+"""
+from operator import attrgetter, itemgetter
+
+from flask import request
+
+from models.rows import is_record
+
+COLUMNS_FORMAT = 'columns'
+
+def wants_columns():
+    return request.args.get('format') == COLUMNS_FORMAT
+
+def column_names(row, columns=None):
+    """
+    Column names of `row`: a record's fields, a dict's keys, or `columns`
+    for tuple rows, which do not carry their names.
+    """
+    if is_record(row):
+        return list(row.__record_fields__)
+    if isinstance(row, dict):
+        return list(row)
+    if columns is None:
+        raise ValueError("Column names are required for tuple rows")
+    return list(columns)
+
+def row_values(row, names):
+    """Function returning the values of rows shaped like `row`, in `names` order"""
+    if is_record(row):
+        getter = attrgetter(*names)
+    elif isinstance(row, dict):
+        getter = itemgetter(*names)
+    else:
+        return tuple
+    return getter if len(names) > 1 else lambda row: (getter(row),)
+
+def columnar(rows, columns=None):
+    """
+    `rows` for a JSON list response: unchanged, or in the columnar format when
+    the request has ?format=columns.
+
+    :param rows: List of records, dicts or tuples.
+    :param columns: Column names of tuple rows (optional for records and dicts).
+    """
+    if not wants_columns():
+        return rows
+    if not rows:
+        return {"columns": list(columns or ()), "rows": []}
+    names = column_names(rows[0], columns)
+    return {"columns": names, "rows": list(map(row_values(rows[0], names), rows))}
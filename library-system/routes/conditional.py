@@ -0,0 +1,43 @@
+from functools import wraps
+from hashlib import sha1
+from datetime import date
+
+from flask import request, make_response
+
+from models.versions import get_versions
+
+def conditional(*tables, daily=False):
+    """
+    Decorator giving a GET list endpoint an ETag built from the change versions
+    of the tables it reads, and answering a matching If-None-Match with 304
+    before the view (and its query) runs.
+
+    :param tables: Tables whose contents the response depends on.
+    :param daily: Also vary the ETag by date, for results that depend on CURDATE().
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(*tables)
+            if versions is None:
+                return view(*args, **kwargs)  # No versions available: always send the body
+
+            # Versions are read before the data, so a write racing with this
+            # request can only make the ETag older than the body, never newer.
+            parts = [request.full_path] + [f"{table}:{versions[table]}" for table in sorted(versions)]
+            if daily:
+                parts.append(date.today().isoformat())
+            etag = sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+            # Weak comparison: compression.py weakens the ETag of compressed bodies
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
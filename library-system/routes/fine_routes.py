@@ -0,0 +1,55 @@
+from flask import Blueprint, jsonify, request
+from models.fines import get_fine_totals, get_member_totals, get_member_ledger, record_payment
+
+fine_routes = Blueprint('fines', __name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# HTTP status for each record_payment() failure
+PAYMENT_ERROR_STATUS = {
+    "invalid": 400,
+    "member_not_found": 404,
+    "internal": 500,
+}
+
+@fine_routes.route('/fines', methods=['GET'])
+def fetch_fine_totals():
+    """
+    Per-member fine totals from the precomputed aggregates, paged by MemberID
+    (?limit=&after=). Pass ?all=true to include members with nothing outstanding.
+    """
+    limit = request.args.get('limit', type=int, default=DEFAULT_PAGE_SIZE)
+    after = request.args.get('after', type=int)
+    if limit is None or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    outstanding_only = request.args.get('all', '').lower() not in ('1', 'true', 'yes', 'on')
+
+    try:
+        totals, next_cursor = get_fine_totals(min(limit, MAX_PAGE_SIZE), after, outstanding_only)
+    except Exception as e:
+        return jsonify({"message": "Error fetching fines.", "error": str(e)}), 500
+    return jsonify({"data": totals, "next_cursor": next_cursor})
+
+@fine_routes.route('/fines/member/<int:member_id>', methods=['GET'])
+def fetch_member_fines(member_id):
+    """A member's fine totals and most recent ledger entries."""
+    try:
+        totals = get_member_totals(member_id)
+        if totals is None:
+            return jsonify({"error": "Member not found"}), 404
+        return jsonify({"totals": totals, "ledger": get_member_ledger(member_id)})
+    except Exception as e:
+        return jsonify({"message": "Error fetching fines.", "error": str(e)}), 500
+
+@fine_routes.route('/fines/member/<int:member_id>/payments', methods=['POST'])
+def create_fine_payment(member_id):
+    """Record a payment or waiver ({"amount": ..., "kind": "payment" | "waiver"})."""
+    data = request.json or {}
+    if 'amount' not in data:
+        return jsonify({"message": "Amount is required."}), 400
+
+    result = record_payment(member_id, data['amount'], data.get('kind', 'payment'))
+    if result["success"]:
+        return jsonify(result), 201
+    return jsonify(result), PAYMENT_ERROR_STATUS.get(result.get("error"), 400)
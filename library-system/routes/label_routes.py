@@ -0,0 +1,83 @@
+import os
+import re
+
+from flask import Blueprint, jsonify, request, send_file
+
+from labels import labels
+from models.books import get_barcodes_by_book_id
+
+label_routes = Blueprint('labels', __name__)
+
+MAX_LABELS_PER_JOB = 20000
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+def _job_status(job_id):
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        return None
+    return labels.status(job_id)
+
+@label_routes.route('/labels/jobs', methods=['POST'])
+def create_label_job():
+    """
+    Start rendering a printable label sheet, for every copy of a book
+    ({"book_id": ...}) or for a list of barcodes ({"barcodes": [...]}).
+    Returns 202 with the job id; poll the job and download the PDF when done.
+    """
+    data = request.json or {}
+    if 'book_id' in data:
+        try:
+            book_id = int(data['book_id'])
+        except (TypeError, ValueError):
+            return jsonify({"error": "book_id must be a number"}), 400
+        barcodes = get_barcodes_by_book_id(book_id)
+        title = f"Book {book_id}"
+    else:
+        barcodes = data.get('barcodes')
+        if not isinstance(barcodes, list) or not all(isinstance(b, str) and b for b in barcodes):
+            return jsonify({"error": "Provide a book_id or a list of barcodes"}), 400
+        title = data.get('title')
+
+    if not barcodes:
+        return jsonify({"error": "No barcodes to print"}), 404
+    if len(barcodes) > MAX_LABELS_PER_JOB:
+        return jsonify({"error": f"At most {MAX_LABELS_PER_JOB} labels per job"}), 400
+
+    job_id = labels.submit(barcodes, title)
+    return jsonify(labels.status(job_id)), 202
+
+@label_routes.route('/labels/jobs/<job_id>', methods=['GET'])
+def fetch_label_job(job_id):
+    """Progress of a label job (state is rendering, assembling, done or failed)."""
+    status = _job_status(job_id)
+    if status is None:
+        return jsonify({"error": "Label job not found"}), 404
+    return jsonify(status)
+
+@label_routes.route('/labels/jobs/<job_id>/sheet.pdf', methods=['GET'])
+def download_label_sheet(job_id):
+    """Stream the finished PDF sheet from disk."""
+    status = _job_status(job_id)
+    if status is None:
+        return jsonify({"error": "Label job not found"}), 404
+    if status["state"] != "done":
+        return jsonify(status), 409
+    return send_file(labels.sheet_path(job_id), mimetype='application/pdf',
+                     download_name=f"labels-{job_id[:8]}.pdf", conditional=True)
+
+@label_routes.route('/labels/jobs/<job_id>/pages/<int:page>.png', methods=['GET'])
+def download_label_page(job_id, page):
+    """One rendered page of a sheet as PNG, available as soon as that page is done."""
+    status = _job_status(job_id)
+    path = labels.page_path(job_id, page) if status is not None else None
+    if path is None or not os.path.exists(path):
+        return jsonify({"error": "Page not found"}), 404
+    return send_file(path, mimetype='image/png', conditional=True)
+
+@label_routes.route('/labels/barcode/<path:barcode>.png', methods=['GET'])
+def fetch_barcode_label(barcode):
+    """A single label as PNG, served from the label cache."""
+    try:
+        path = labels.render_label(barcode)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    return send_file(path, mimetype='image/png', conditional=True)
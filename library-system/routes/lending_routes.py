@@ -1,34 +1,93 @@
 from flask import Blueprint, jsonify, request
-from db_config import mysql
-
-from models.lending import lend_book, return_book, get_lending_records, get_overdue_books, get_active_loans, get_returned_loans
+from models.lending import lend_book, return_book, bulk_lend_books, bulk_return_books, iter_lending_records, get_active_loans, iter_returned_loans, find_loans, LOAN_SORT_COLUMNS, ACTIVE_LOAN_COLUMNS, LOAN_COLUMNS
+from models.overdue import get_overdue_books, OVERDUE_COLUMNS
+from routes.columns import columnar
+from routes.conditional import conditional
+from routes.query_args import date_arg
+from routes.streaming import stream_json
 
 lending_routes = Blueprint('lending', __name__)
 
+# HTTP status for each lend_book() failure
+LEND_ERROR_STATUS = {
+    "member_not_found": 404,
+    "limit_exceeded": 400,
+    "unavailable": 400,
+    "internal": 500,
+}
+
+MAX_BULK_ITEMS = 1000
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+LOAN_QUERY_ARGS = ('sort', 'order', 'q', 'due_before', 'due_after', 'member_id', 'limit', 'offset')
+
+def _loan_query():
+    """
+    Parse the sorting, filtering and paging arguments of the loan listings.
+
+    :return: (find_loans keyword arguments, None), or (None, error response).
+    """
+    args = request.args
+    sort = args.get('sort', 'lend_id')
+    order = args.get('order', 'asc')
+    limit = args.get('limit', type=int, default=DEFAULT_PAGE_SIZE)
+    offset = args.get('offset', type=int, default=0)
+    member_id = args.get('member_id', type=int)
+
+    if sort not in LOAN_SORT_COLUMNS:
+        return None, (jsonify({"error": f"sort must be one of {', '.join(LOAN_SORT_COLUMNS)}"}), 400)
+    if order not in ('asc', 'desc'):
+        return None, (jsonify({"error": "order must be asc or desc"}), 400)
+    if limit is None or limit < 1 or offset is None or offset < 0:
+        return None, (jsonify({"error": "limit must be a positive integer and offset a non-negative one"}), 400)
+    if 'member_id' in args and member_id is None:
+        return None, (jsonify({"error": "member_id must be an integer"}), 400)
+    try:
+        due_before, due_after = date_arg('due_before'), date_arg('due_after')
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+
+    return {"sort": sort, "order": order, "q": args.get('q', '').strip() or None,
+            "due_before": due_before, "due_after": due_after, "member_id": member_id,
+            "limit": min(limit, MAX_PAGE_SIZE), "offset": offset}, None
+
+def _loan_page(active_only, query):
+    rows, total = find_loans(active_only, **query)
+    columns = ACTIVE_LOAN_COLUMNS if active_only else LOAN_COLUMNS
+    return jsonify({"data": columnar(rows, columns), "total": total, "limit": query["limit"], "offset": query["offset"]})
+
 @lending_routes.route('/lending/active', methods=['GET'])
+@conditional('Lending', 'Books', 'Members')
 def fetch_active_loans():
-    """Fetch and return all active (unreturned) lending records."""
+    """
+    Fetch and return all active (unreturned) lending records.
+
+    Passing any of sort, order, q, due_before, due_after, member_id, limit or
+    offset returns one sorted and filtered page instead:
+    {"data": [...], "total": ..., "limit": ..., "offset": ...}.
+    """
     try:
+        if any(arg in request.args for arg in LOAN_QUERY_ARGS):
+            query, error = _loan_query()
+            return error or _loan_page(True, query)
         active_loans = get_active_loans()
-        return jsonify(active_loans)
+        return jsonify(columnar(active_loans, ACTIVE_LOAN_COLUMNS))
     except Exception as e:
         return jsonify({"message": "Error fetching active loans.", "error": str(e)}), 500
 
 @lending_routes.route('/lending/returned', methods=['GET'])
+@conditional('Lending', 'Books', 'Members')
 def fetch_returned_loans():
-    """Fetch and return all returned lending records."""
+    """Stream all returned lending records as a JSON array (NDJSON with ?format=ndjson, columnar with ?format=columns)."""
     try:
-        returned_loans = get_returned_loans()
-        return jsonify(returned_loans)
+        return stream_json(iter_returned_loans(), "returned loans", LOAN_COLUMNS)
     except Exception as e:
         return jsonify({"message": "Error fetching returned loans.", "error": str(e)}), 500
 
 # Route to lend a book to a member
 @lending_routes.route('/lending/create', methods=['POST'])
 def create_lending():
-    """Lend a book to a member, setting the due date to today's date (CURDATE)."""
-    print("Received request to lend a book.")  # Log the request for debugging
-
+    """Lend a book to a member, due back in 14 days."""
     data = request.json
     book_id = data.get('book_id')
     member_id = data.get('member_id')
@@ -36,46 +95,10 @@ def create_lending():
     if not book_id or not member_id:
         return jsonify({"message": "Book ID and Member ID are required."}), 400
 
-    try:
-        # Check if the MemberID exists in the Members table
-        print(f"Checking if member ID {member_id} exists.")  # Log for debugging
-
-        cursor = mysql.connection.cursor()
-        cursor.execute("SELECT MemberID FROM Members WHERE MemberID = %s", (member_id,))
-        member = cursor.fetchone()
-
-        if not member:
-            return jsonify({"message": "Member not found."}), 404
-
-        # Check if the book is available
-        print(f"Checking availability for book ID {book_id}.")  # Log for debugging
-
-        cursor.execute("SELECT copies FROM Books WHERE BookID = %s", (book_id,))
-
-        book = cursor.fetchone()
-        if not book or book[0] <= 0:
-            return jsonify({"message": "Book is not available."}), 400
-
-        # Insert lending record with CURDATE() for due date
-        print(f"Inserting lending record for book ID {book_id} and member ID {member_id}.")  # Log for debugging
-
-        query = """
-            INSERT INTO Lending (BookID, MemberID, DueDate)
-            VALUES (%s, %s, CURDATE())
-        """
-        cursor.execute(query, (book_id, member_id))
-        
-        # Decrease the number of available copies
-        print(f"Decreasing available copies for book ID {book_id}.")  # Log for debugging
-
-        cursor.execute("UPDATE Books SET copies = copies - 1 WHERE BookID = %s", (book_id,))
-
-        mysql.connection.commit()
-        cursor.close()
-        
-        return jsonify({"message": "Book lent successfully!"}), 201
-    except Exception as e:
-        return jsonify({"message": "Error lending book.", "error": str(e)}), 500
+    result = lend_book(book_id, member_id)
+    if result["success"]:
+        return jsonify(result), 201
+    return jsonify(result), LEND_ERROR_STATUS.get(result.get("error"), 400)
 
 # Route to return a book (mark as returned)
 @lending_routes.route('/lending/id<int:lend_id>', methods=['PUT'])
@@ -84,35 +107,94 @@ def return_lending(lend_id):
     if not lend_id:
         return jsonify({"message": "Lend ID is required."}), 400
 
+    result = return_book(lend_id)
+    if result["success"]:
+        return jsonify(result), 200
+    return jsonify(result), 404 if result.get("error") == "not_found" else 500
+
+def _parse_bulk_items(raw_items):
+    """Accept {"book_id", "member_id"} objects or [book_id, member_id] pairs."""
+    items = []
+    for raw in raw_items:
+        if isinstance(raw, dict):
+            item = {"book_id": int(raw["book_id"]), "member_id": int(raw["member_id"])}
+        else:
+            book_id, member_id = raw
+            item = {"book_id": int(book_id), "member_id": int(member_id)}
+        items.append(item)
+    return items
+
+# Route to lend many books at once
+@lending_routes.route('/lending/bulk-create', methods=['POST'])
+def bulk_create_lending():
+    """Lend a batch of books in one transaction and report the outcome of each item."""
+    data = request.json or {}
+    try:
+        items = _parse_bulk_items(data.get('items', []))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"message": "Each item needs a numeric book_id and member_id."}), 400
+
+    if not items:
+        return jsonify({"message": "No items provided."}), 400
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({"message": f"At most {MAX_BULK_ITEMS} items per request."}), 400
+
     try:
-        return_book(lend_id)
-        
-        # Increase the number of available copies
-        cursor = mysql.connection.cursor()
-        cursor.execute("UPDATE Books SET copies = copies + 1 WHERE BookID = (SELECT BookID FROM Lending WHERE LendID = %s)", (lend_id,))
-
-        mysql.connection.commit()
-        cursor.close()
-        
-        return jsonify({"message": "Book returned successfully!"}), 200
+        results = bulk_lend_books(items)
     except Exception as e:
-        return jsonify({"message": "Error returning book.", "error": str(e)}), 500
+        return jsonify({"message": "Error lending books.", "error": str(e)}), 500
+
+    lent = sum(1 for result in results if result["success"])
+    return jsonify({"lent": lent, "failed": len(results) - lent, "results": results}), 200
+
+# Route to return many books at once
+@lending_routes.route('/lending/bulk-return', methods=['POST'])
+def bulk_return_lending():
+    """Return a batch of loans in one transaction and report the outcome of each item."""
+    data = request.json or {}
+    try:
+        lend_ids = [int(lend_id) for lend_id in data.get('lend_ids', [])]
+    except (TypeError, ValueError):
+        return jsonify({"message": "lend_ids must be a list of numbers."}), 400
+
+    if not lend_ids:
+        return jsonify({"message": "No lend IDs provided."}), 400
+    if len(lend_ids) > MAX_BULK_ITEMS:
+        return jsonify({"message": f"At most {MAX_BULK_ITEMS} items per request."}), 400
+
+    try:
+        results = bulk_return_books(lend_ids)
+    except Exception as e:
+        return jsonify({"message": "Error returning books.", "error": str(e)}), 500
+
+    returned = sum(1 for result in results if result["success"])
+    return jsonify({"returned": returned, "failed": len(results) - returned, "results": results}), 200
 
 # Route to fetch all lending records
 @lending_routes.route('/lending/records', methods=['GET'])
+@conditional('Lending', 'Books', 'Members')
 def fetch_lending_records():
-    """Fetch and return all lending records."""
+    """
+    Stream all lending records as a JSON array (NDJSON with ?format=ndjson,
+    {"columns": [...], "rows": [[...], ...]} with ?format=columns).
+
+    Takes the same sorting, filtering and paging arguments as /lending/active,
+    in which case one page is returned instead of the stream.
+    """
     try:
-        lending_records = get_lending_records()
-        return jsonify(lending_records)
+        if any(arg in request.args for arg in LOAN_QUERY_ARGS):
+            query, error = _loan_query()
+            return error or _loan_page(False, query)
+        return stream_json(iter_lending_records(), "lending records", LOAN_COLUMNS)
     except Exception as e:
         return jsonify({"message": "Error fetching lending records.", "error": str(e)}), 500
 
 @lending_routes.route('/lending/overdue', methods=['GET'])
+@conditional('Lending', 'Books', 'Members', daily=True)
 def fetch_overdue_books():
-    """Fetch all overdue lending records."""
+    """Fetch all overdue lending records, with days overdue and the fine accrued so far."""
     try:
         overdue_books = get_overdue_books()
-        return jsonify(overdue_books)
+        return jsonify(columnar(overdue_books, OVERDUE_COLUMNS))
     except Exception as e:
         return jsonify({"message": "Error fetching overdue books.", "error": str(e)}), 500
@@ -1,12 +1,33 @@
 from flask import Blueprint, jsonify, request
-from models.members import add_member, get_members, get_member, update_member, delete_member, get_borrowing_history
+from models.members import add_member, get_members, search_members, get_member, update_member, delete_member, get_borrowing_history, get_borrowing_history_page, MEMBER_TYPES, MEMBER_COLUMNS, HISTORY_STATUSES
+from routes.columns import columnar
+from routes.conditional import conditional
+from routes.query_args import date_arg
 
 member_routes = Blueprint('members', __name__)
 
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 1000
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+HISTORY_PAGE_ARGS = ('limit', 'after', 'from', 'to', 'status')
+
 @member_routes.route('/members/all', methods=['GET'])
+@conditional('Members')
 def fetch_members():
     members = get_members()
-    return jsonify(members)
+    return jsonify(columnar(members, MEMBER_COLUMNS))
+
+@member_routes.route('/members/search', methods=['GET'])
+def search_members_route():
+    """Search members by name prefix or exact ID (?q=...&limit=...)."""
+    term = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', type=int, default=DEFAULT_SEARCH_LIMIT), MAX_SEARCH_LIMIT)
+    if not term:
+        return jsonify({"error": "q is required"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    return jsonify(columnar(search_members(term, limit), MEMBER_COLUMNS))
 
 @member_routes.route('/members/id/<int:member_id>', methods=['GET'])
 def fetch_member(member_id):
@@ -16,13 +37,19 @@ def fetch_member(member_id):
 @member_routes.route('/members/create', methods=['POST'])
 def create_member():
     data = request.json
-    add_member(data['name'], data.get('contact'))
+    member_type = data.get('member_type', 'student')
+    if member_type not in MEMBER_TYPES:
+        return jsonify({"error": f"member_type must be one of {', '.join(MEMBER_TYPES)}"}), 400
+    add_member(data['name'], data.get('contact'), member_type)
     return jsonify({"message": "Member added successfully!"})
 
 @member_routes.route('/members/update/<int:member_id>', methods=['PUT'])
 def update_member_route(member_id):
     data = request.json
-    success = update_member(member_id, data.get('name'), data.get('contact'))
+    member_type = data.get('member_type')
+    if member_type is not None and member_type not in MEMBER_TYPES:
+        return jsonify({"error": f"member_type must be one of {', '.join(MEMBER_TYPES)}"}), 400
+    success = update_member(member_id, data.get('name'), data.get('contact'), member_type)
     if success:
         return jsonify({"message": "Member updated successfully!"})
     else:
@@ -39,12 +66,34 @@ def delete_member_route(member_id):
 @member_routes.route('/members/<int:member_id>/borrowing-history', methods=['GET'])
 def fetch_borrowing_history(member_id):
     """
-    Fetch borrowing history for a specific member.
+    Fetch borrowing history for a specific member, newest first.
+
+    Passing any of `limit`, `after`, `from`, `to` (issue dates, YYYY-MM-DD) or
+    `status` (active, returned or overdue) switches to keyset pagination and
+    returns {"data": [...], "next_cursor": ...}; pass next_cursor back as
+    `after` to get the following page.
     :param member_id: ID of the member.
     :return: JSON list of borrowing records.
     """
-    borrowing_history = get_borrowing_history(member_id)
-    if borrowing_history:
-        return jsonify(borrowing_history)
-    else:
-        return jsonify({"error": "No borrowing history found"}), 404
+    if not any(arg in request.args for arg in HISTORY_PAGE_ARGS):
+        borrowing_history = get_borrowing_history(member_id)
+        if borrowing_history:
+            return jsonify(columnar(borrowing_history))
+        else:
+            return jsonify({"error": "No borrowing history found"}), 404
+
+    limit = request.args.get('limit', type=int, default=DEFAULT_PAGE_SIZE)
+    after = request.args.get('after', type=int)
+    status = request.args.get('status') or None
+    if limit is None or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if status is not None and status not in HISTORY_STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(HISTORY_STATUSES)}"}), 400
+    try:
+        date_from, date_to = date_arg('from'), date_arg('to')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    history, next_cursor = get_borrowing_history_page(member_id, min(limit, MAX_PAGE_SIZE), after,
+                                                      date_from=date_from, date_to=date_to, status=status)
+    return jsonify({"data": columnar(history), "next_cursor": next_cursor})
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from flask import request
+
+def date_arg(name):
+    """Parse an optional YYYY-MM-DD query-string argument (ValueError if malformed)."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
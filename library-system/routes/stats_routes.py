@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify
+from db_config import mysql
+from cache import cache
+from models.stats import get_library_stats
+
+stats_routes = Blueprint('stats', __name__)
+
+@stats_routes.route('/stats', methods=['GET'])
+def fetch_stats():
+    """Fetch aggregate counts for the dashboard."""
+    stats = get_library_stats()
+    if stats is None:
+        return jsonify({"message": "Error fetching stats."}), 500
+    return jsonify(stats)
+
+@stats_routes.route('/stats/pool', methods=['GET'])
+def fetch_pool_stats():
+    """Fetch database connection pool metrics."""
+    return jsonify(mysql.pool.metrics())
+
+@stats_routes.route('/stats/cache', methods=['GET'])
+def fetch_cache_stats():
+    """Fetch cache hit/miss/eviction counters."""
+    return jsonify(cache.stats())
@@ -0,0 +1,66 @@
+import logging
+
+from flask import Response, current_app, request, stream_with_context
+
+from routes.columns import column_names, row_values, wants_columns
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+ROWS_PER_CHUNK = 500  # Rows serialized into each chunk written to the socket
+
+_END = object()
+
+def stream_json(rows, description="rows", columns=None):
+    """
+    Stream an iterable of rows as a chunked JSON array, as NDJSON (one row
+    per line) when the request has ?format=ndjson, or in the columnar format
+    of routes/columns.py with ?format=columns.
+
+    Rows are serialized a chunk at a time as they are pulled from `rows`, so
+    memory does not grow with the size of the result. The first row is fetched
+    before the response starts, so a failing query still raises here and the
+    caller can answer 500; an error after that can only end the stream early,
+    which leaves the JSON array unterminated for the client to notice.
+
+    :param columns: Column names of tuple rows, for ?format=columns.
+    """
+    ndjson = request.args.get('format') == 'ndjson'
+    rows = iter(rows)
+    first = next(rows, _END)
+    dumps = current_app.json.dumps
+
+    values = None
+    if ndjson:
+        start, separator, end = "", "\n", "\n"
+    elif wants_columns():
+        names = column_names(first, columns) if first is not _END else list(columns or ())
+        values = row_values(first, names) if first is not _END else None
+        start, separator, end = f'{{"columns":{dumps(names)},"rows":[', ",", "]}"
+    else:
+        start, separator, end = "[", ",", "]"
+
+    def generate():
+        if first is _END:
+            yield start + (end if not ndjson else "")
+            return
+
+        encode = dumps if values is None else lambda row: dumps(values(row))
+        chunk = [start + encode(first)]
+        try:
+            for row in rows:
+                chunk.append(encode(row))
+                if len(chunk) >= ROWS_PER_CHUNK:
+                    yield separator.join(chunk)
+                    chunk = [""]  # Joining puts the separator in front of the next row
+        except Exception as e:
+            logger.error(f"Error streaming {description}: {str(e)}")
+            return
+        finally:
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close()  # Release the server-side cursor if the client went away
+        yield separator.join(chunk) + end
+
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
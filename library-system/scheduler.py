@@ -0,0 +1,74 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """
+    Runs daily jobs on a background thread, each inside an app context.
+
+    Jobs must be safe to call from several processes at once (every worker
+    may run a scheduler); the jobs claim their run in ScheduledJobs (see
+    models/jobs.py) so only one of them does the work.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.jobs = []  # (name, hour, minute, func)
+        self.thread = None
+        self.stopping = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+
+    def daily(self, name, at, func):
+        """Run `func()` every day at `at` ("HH:MM", local time), and once on start()."""
+        hour, minute = (int(part) for part in at.split(":"))
+        self.jobs.append((name, hour, minute, func))
+
+    def start(self):
+        if not self.app.config['SCHEDULER_ENABLED'] or self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _next_run(self, hour, minute, now):
+        run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return run_at if run_at > now else run_at + timedelta(days=1)
+
+    def _run_job(self, name, func):
+        try:
+            with self.app.app_context():
+                func()
+        except Exception:
+            logger.exception(f"Scheduled job {name} failed")
+
+    def _run(self):
+        # Catch up at start-up, e.g. when the server was down at the scheduled time
+        for name, _, _, func in self.jobs:
+            self._run_job(name, func)
+
+        now = datetime.now()
+        schedule = [(self._next_run(hour, minute, now), name, hour, minute, func)
+                    for name, hour, minute, func in self.jobs]
+        while schedule:
+            schedule.sort(key=lambda entry: entry[0])
+            run_at, name, hour, minute, func = schedule[0]
+            if self.stopping.wait(max((run_at - datetime.now()).total_seconds(), 0)):
+                return
+            self._run_job(name, func)
+            schedule[0] = (self._next_run(hour, minute, datetime.now()), name, hour, minute, func)
+
+scheduler = Scheduler()
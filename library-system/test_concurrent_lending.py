@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app  # Import the Flask app
+from db_config import mysql
+from models.lending import lend_book, STUDENT_LOAN_LIMIT
+
+COPIES = 50  # Copies of the contested book
+MEMBERS = 400  # Members racing for it
+THREADS = 32
+
+def setup_fixtures():
+    """Insert one book with COPIES copies and MEMBERS members."""
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("INSERT INTO Books (Title, Author, Genre, ISBN, Copies) VALUES (%s, %s, %s, %s, %s)",
+                       ("Concurrency Test", "Test", "Test", "CONCURRENCY-TEST", COPIES))
+        book_id = cursor.lastrowid
+        member_ids = []
+        for i in range(MEMBERS):
+            cursor.execute("INSERT INTO Members (Name, Contact) VALUES (%s, %s)", (f"Concurrency Member {i}", "test"))
+            member_ids.append(cursor.lastrowid)
+        mysql.connection.commit()
+        cursor.close()
+    return book_id, member_ids
+
+def teardown_fixtures(book_id, member_ids):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        cursor.execute("DELETE FROM Lending WHERE BookID = %s", (book_id,))
+        cursor.execute("DELETE FROM Books WHERE BookID = %s", (book_id,))
+        cursor.executemany("DELETE FROM Members WHERE MemberID = %s", [(m,) for m in member_ids])
+        mysql.connection.commit()
+        cursor.close()
+
+def lend_in_own_context(book_id, member_id):
+    with app.app_context():  # Each lend gets its own pooled connection
+        return lend_book(book_id, member_id)
+
+def test_parallel_lends_never_oversell():
+    book_id, member_ids = setup_fixtures()
+    try:
+        # Every member tries to borrow more than their limit, all at once
+        attempts = [m for m in member_ids for _ in range(STUDENT_LOAN_LIMIT + 1)]
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            results = list(executor.map(lambda m: lend_in_own_context(book_id, m), attempts))
+
+        assert not [r for r in results if r.get("error") == "internal"]
+        assert sum(1 for r in results if r["success"]) == COPIES
+
+        with app.app_context():
+            cursor = mysql.connection.cursor()
+            cursor.execute("SELECT Copies FROM Books WHERE BookID = %s", (book_id,))
+            assert cursor.fetchone()[0] == 0
+
+            cursor.execute("SELECT COUNT(*) FROM Lending WHERE BookID = %s AND ReturnDate IS NULL", (book_id,))
+            assert cursor.fetchone()[0] == COPIES
+
+            cursor.execute("""
+                SELECT MAX(Loans) FROM (
+                    SELECT COUNT(*) AS Loans FROM Lending WHERE BookID = %s GROUP BY MemberID
+                ) AS PerMember
+            """, (book_id,))
+            assert cursor.fetchone()[0] <= STUDENT_LOAN_LIMIT
+
+            # Rolled-back attempts must not leave slots taken on the counters
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM Members
+                LEFT JOIN (
+                    SELECT MemberID, COUNT(*) AS Loans FROM Lending
+                    WHERE BookID = %s AND ReturnDate IS NULL GROUP BY MemberID
+                ) AS OpenLoans ON OpenLoans.MemberID = Members.MemberID
+                WHERE Members.MemberID IN ({', '.join(['%s'] * len(member_ids))})
+                  AND Members.ActiveLoans <> COALESCE(OpenLoans.Loans, 0)
+            """, (book_id, *member_ids))
+            assert cursor.fetchone()[0] == 0
+            cursor.close()
+    finally:
+        teardown_fixtures(book_id, member_ids)
+
+if __name__ == "__main__":
+    test_parallel_lends_never_oversell()
+    print("No copies oversold.")
@@ -0,0 +1,95 @@
+import pytest
+
+from app import app  # Import the Flask app
+from db_config import mysql
+
+from models import barcode_index, books, fines, lending, members, overdue, stats
+
+# Any index on these columns serves the query; MySQL drops the implicit index
+# of a foreign key once a wider index starting with the same column exists.
+LENDING_OPEN = {"ix_lending_open_due", "ix_lending_open_issued"}
+LENDING_BY_BOOK = {"ix_lending_book_open", "fk_lending_book"}
+
+# The hot queries of models/, as the models build them, with representative
+# parameters and the index expected for each table. Tables not listed must
+# still not be scanned (type ALL). get_overdue_books is not listed: it reads
+# all of OverdueLoans, which holds only its result rows.
+HOT_QUERIES = {
+    "loan slot (take_loan_slot)": (
+        lending.TAKE_LOAN_SLOT_QUERY, (1,), {"Members": {"PRIMARY"}}),
+    "active loan count for a member (reconcile_active_loans)": (
+        lending.OPEN_LOAN_COUNT_QUERY, (1,), {"Lending": {"ix_lending_member_open"}}),
+    "active loans (get_active_loans)": (
+        lending.ACTIVE_LOANS_QUERY, (),
+        {"Lending": LENDING_OPEN, "Books": {"PRIMARY"}, "Members": {"PRIMARY"}}),
+    "active loans by due date (find_loans)": (
+        lending.find_loans_queries(True, sort="due_date")[0], (100, 0),
+        {"Lending": {"ix_lending_open_due"}, "Books": {"PRIMARY"}, "Members": {"PRIMARY"}}),
+    "active loans by issue date (find_loans)": (
+        lending.find_loans_queries(True, sort="issue_date", order="desc")[0], (100, 0),
+        {"Lending": {"ix_lending_open_issued"}, "Books": {"PRIMARY"}, "Members": {"PRIMARY"}}),
+    "loans of a member due before a date (find_loans)": (
+        lending.find_loans_queries(True, due_before="2030-01-01", member_id=1)[0], (1, "2030-01-01", 100, 0),
+        {"Lending": {"ix_lending_member_open"}, "Books": {"PRIMARY"}, "Members": {"PRIMARY"}}),
+    "free barcode of a returned loan (return_book)": (
+        lending.FREE_BARCODE_QUERY, (1,), {"Barcodes": {"ix_barcodes_current_lend"}}),
+    "book history (iter_book_borrowing_history)": (
+        lending.BOOK_HISTORY_QUERY, (1,), {"Lending": LENDING_BY_BOOK, "Members": {"PRIMARY"}}),
+    "overdue refresh (refresh_overdue)": (
+        overdue.REFRESH_QUERY, (),
+        {"Lending": {"ix_lending_open_due"}, "Members": {"PRIMARY"}, "FineRates": {"PRIMARY"}}),
+    "dashboard counters (get_library_stats)": (
+        stats.LIBRARY_STATS_QUERY, (), {"Lending": LENDING_OPEN}),
+    "member history page (get_borrowing_history)": (
+        *members.borrowing_history_query(1, limit=101, after=10 ** 9),
+        {"Lending": {"ix_lending_member_history"}, "Books": {"PRIMARY"}}),
+    "member name search (search_members)": (
+        *members.search_members_query("Ann"), {"Members": {"ix_members_name"}}),
+    "search with popularity (advanced_search_books)": (
+        *books.advanced_search_query(isbn="978", sort_by_popularity=True),
+        {"Books": {"ux_books_isbn"}, "Lending": LENDING_BY_BOOK}),
+    "full-text search (advanced_search_books)": (
+        *books.advanced_search_query(q="history"), {"Books": {"ft_books_title_author"}}),
+    "genre filter (advanced_search_books)": (
+        *books.advanced_search_query(genre="Fic"), {"Books": {"ix_books_genre"}}),
+    "book page (get_books)": (
+        *books.books_query(limit=100, after=0), {"Books": {"PRIMARY"}}),
+    "book by ISBN (get_book_by_isbn)": (
+        books.BOOK_BY_ISBN_QUERY, ("9780000000000",), {"Books": {"ux_books_isbn"}}),
+    "copies of a book (get_barcodes_by_book_id)": (
+        books.BARCODES_OF_BOOK_QUERY, (1,), {"Barcodes": {"fk_barcodes_book"}}),
+    "barcode scan (BarcodeIndex.reload)": (
+        barcode_index.RELOAD_QUERY, ("LIB0000000001",),
+        {"Barcodes": {"ux_barcodes_barcode"}, "Lending": {"PRIMARY"}}),
+    "accrued fine of a loan (settle_loan_fines)": (
+        fines.accrued_fines_query([1]), (1,), {"FineLedger": {"ix_fineledger_lend"}}),
+    "member ledger (get_member_ledger)": (
+        fines.MEMBER_LEDGER_QUERY, (1, 100), {"FineLedger": {"ix_fineledger_member"}}),
+}
+
+def explain(query, params):
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        # Cost lookups as if the tables were large, so the near-empty test
+        # database gets the plan production gets instead of a cheap full scan
+        cursor.execute("SET SESSION max_seeks_for_key = 1")
+        cursor.execute("EXPLAIN " + query, params)
+        columns = [column[0] for column in cursor.description]
+        plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.close()
+    return plan
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(name):
+    query, params, expected_keys = HOT_QUERIES[name]
+    plan = explain(query, params)
+    for step in plan:
+        table = step["table"]
+        if table is None or table.startswith("<") or step["select_type"] == "INSERT":
+            continue  # No table access, a derived table, or the target of INSERT ... SELECT
+        assert step["type"] != "ALL", f"{name}: full scan of {table}"
+        if table in expected_keys:
+            assert step["key"] in expected_keys[table], \
+                f"{name}: {table} read with {step['key']}, expected one of {sorted(expected_keys[table])}"
+    missing = set(expected_keys) - {step["table"] for step in plan}
+    assert not missing, f"{name}: {sorted(missing)} not in the plan"
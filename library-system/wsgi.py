@@ -0,0 +1,29 @@
+"""
+Production entry point.
+
+On Linux/macOS run the app under gunicorn, with several worker processes
+and threads per worker (settings in gunicorn.conf.py, from db_config.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+`kill -HUP <master pid>` reloads gracefully: new workers start with the new
+code and the old ones finish their requests first. The workers share no
+memory, so the book/member cache needs CACHE_BACKEND = 'redis' there; with
+the default 'local' backend gunicorn.conf.py turns caching off whenever
+more than one worker runs. The barcode index of models/barcode_index.py
+stays per worker: it only hints, and every scan is checked against the
+database. Windows cannot fork, so
+there `python wsgi.py` serves the app with waitress in one process, with
+WSGI_THREADS threads.
+
+`python app.py` remains the development server (debugger and reloader).
+"""
+from app import app
+from scheduler import scheduler
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    scheduler.start()
+    host, port = app.config['WSGI_BIND'].rsplit(':', 1)
+    serve(app, host=host, port=int(port), threads=app.config['WSGI_THREADS'])